@@ -14,15 +14,8 @@ class Alien(Sprite):
         self.settings = ai_game.settings
         self.stats = ai_game.stats
         
-        # Load the alien image and set its starting position
-        try:
-            original_image = pygame.image.load('images/alien2.png')
-            self.image = pygame.transform.scale(original_image, (75, 50))
-        except:
-            # Fallback to a colored rectangle if image loading fails
-            self.image = pygame.Surface((75, 50))
-            self.image.fill(self.settings.alien_color)
-        
+        # Use the shared, pre-scaled alien image
+        self.image = ai_game.sprites.get('alien')
         self.rect = self.image.get_rect()
 
         #This will start a new alien near the top left of the screen.
@@ -10,15 +10,8 @@ class AlienBullet(Sprite):
         self.screen = ai_game.screen
         self.settings = ai_game.settings
         
-        # Load the bullet image and set its rect
-        try:
-            original_image = pygame.image.load('images/alien_bullet.png')
-            self.image = pygame.transform.scale(original_image, (3, 15))
-        except:
-            # Fallback to a colored rectangle if image loading fails
-            self.image = pygame.Surface((3, 15))
-            self.image.fill((255, 0, 0))  # Red color for alien bullets
-        
+        # Use the shared, pre-scaled bullet image
+        self.image = ai_game.sprites.get('alien_bullet')
         self.rect = self.image.get_rect()
         self.rect.midbottom = alien.rect.midbottom
         
@@ -1,37 +1,62 @@
+import time
+STARTED = time.perf_counter()  # Start of the startup profile
+
+import argparse
 import sys
-from time import sleep
+from time import sleep, monotonic_ns
 import pygame
 import os
-import threading
-import multiprocessing
-import signal
-from os_game_utils import GameOSUtils
-from game_os_wrapper import GameOSWrapper
-from pygame.sprite import Group
+from itertools import islice, repeat
+from game_os_wrapper import (GameOSWrapper, COLLISION_MODE_RADIUS, COLLISION_MODE_MASK, CMD_MOVE_PRESS,
+                             CMD_MOVE_RELEASE, CMD_FIRE, INPUT_LEFT, INPUT_RIGHT,
+                             INPUT_UP, INPUT_DOWN, interpolate)
 
 from settings import Settings #Creating an instance of settings in this class
 from game_stats import GameStats #Creating and instance of gamestats in this class
 from ship import Ship #Creating an instance of ship in this class
-from bullet import Bullet # Creating an instance of bullet in this class
-from alien import Alien # Creating an instance of alien in this class
 from button import Button # Creating an instance of button in this class
-from alien_bullet import AlienBullet
+from ui_layer import UILayer
+from entity_pool import PositionPool
 from star_field import StarField
 from scoreboard import Scoreboard
+from sprite_cache import SpriteCache
+from text_cache import TextCache
+from dirty_renderer import DirtyRectRenderer
+from perf_overlay import FrameProfiler, PerfOverlay, StartupProfiler
+from high_scores import HighScoreStore
+from asset_loader import AssetLoader
 
 class AlienInvasion:
     #This class will manage game assets and behavior.
 
-    def __init__(self):
-        # Initialize pygame only if it hasn't been initialized
-        if not pygame.get_init():
-            pygame.init()
-            pygame.mixer.init()
+    def __init__(self, replay_path=None, profile_startup=False, settings=None):
+        self.startup = StartupProfiler(STARTED, enabled=profile_startup)
+        self.startup.mark('imports')
+
+        # Only what the first frame needs; the mixer is opened by the loader
+        pygame.display.init()
+        pygame.font.init()
+        self.startup.mark('pygame init')
         
         self.clock = pygame.time.Clock()
-        self.settings = Settings()
-        self.os_utils = GameOSUtils()
-        self.game_os = GameOSWrapper()  # Initialize OS wrapper
+        self.settings = settings or Settings()
+        self.replay = None
+        # Other processes can follow the game under this name (spectator.py)
+        name = self.settings.spectator_name
+        self.spectator_name = name.format(pid=os.getpid()) if name else None
+        if replay_path:
+            # Replays drive a headless engine from the log instead of the keyboard
+            from replay import read_session
+            self.replay_session = read_session(replay_path)
+            self.game_os = GameOSWrapper(headless=True,
+                                         max_aliens=self.replay_session.max_aliens,
+                                         max_bullets=self.replay_session.max_bullets,
+                                         name=self.spectator_name)
+        else:
+            self.game_os = GameOSWrapper(max_aliens=self.settings.max_aliens,
+                                         max_bullets=self.settings.max_bullets,
+                                         name=self.spectator_name)  # Initialize OS wrapper
+        self.startup.mark('engine')
 
         # Show cursor by default
         pygame.mouse.set_visible(True)
@@ -45,12 +70,29 @@ class AlienInvasion:
         self.settings.screen_height = self.screen.get_rect().height"""
 
         pygame.display.set_caption("Alien Invasion")
+        self.render_fps = self.settings.render_fps or self._display_refresh_rate()
+        self.startup.mark('window')
+
+        # The background image and the music load while the start screen is up
+        self.loader = AssetLoader(background=self.settings.background_loading)
+
+        # Load, convert and scale every sprite once
+        self.sprites = SpriteCache(self.settings, loader=self.loader,
+                                   bundle_path=self.settings.asset_bundle)
+        self.background = self.sprites.get('background')
+        self.assets_pending = True
+        if replay_path:
+            from replay import ReplayPlayer
+            self.replay = ReplayPlayer(self.game_os, self.replay_session)
+            self.game_os.set_tick_rate(self.replay_session.tick_rate)
+            self.replay_started = None
+            self.replay_done = False
+        else:
+            self._configure_engine()
+        self.startup.mark('sprites')
 
-        # Load and scale the background image
-        self.background = pygame.image.load('images/background.jpg')
-        self.background = pygame.transform.scale(self.background, 
-                                              (self.settings.screen_width, 
-                                               self.settings.screen_height))
+        # Shared fonts and rendered text, so HUD strings render only on change
+        self.text_cache = TextCache(self.settings.text_cache_size)
 
         self.stats = GameStats(self)
         self.sb = Scoreboard(self)
@@ -58,15 +100,52 @@ class AlienInvasion:
         # Create the ship first
         self.ship = Ship(self)
         
-        # Then create other game elements
-        self.bullets = Group()
-        self.aliens = Group()
-        self.alien_bullets = Group()
+        # Aliens and bullets live in the engine's pools; the draw list
+        # reuses its [x, y] positions from frame to frame
+        self.draw_positions = PositionPool()
         
         self.star_field = StarField(self.screen, self.settings)
+
+        # Optional renderer that only redraws regions that changed
+        self.renderer = DirtyRectRenderer(self.screen, self.background,
+                                          self.settings.dirty_rect_max_rects,
+                                          self.settings.dirty_rect_max_area)
+        self.startup.mark('hud and stars')
+
+        # Record this session so it can be replayed exactly
+        self.recorder = None
+        if self.settings.record_sessions and self.replay is None:
+            from replay import SessionRecorder
+            name = time.strftime('session-%Y%m%d-%H%M%S.airp')
+            precise = self.settings.precise_collisions
+            self.recorder = SessionRecorder(
+                self.game_os, os.path.join(self.settings.replay_dir, name),
+                COLLISION_MODE_MASK if precise else COLLISION_MODE_RADIUS,
+                self.sprites.mask('alien') if precise else None,
+                self.sprites.mask('bullet') if precise else None)
+
+        # Per-phase frame timing, shown by the F3 overlay
+        self.profiler = FrameProfiler(self.settings.perf_history,
+                                      enabled=bool(self.settings.perf_csv))
+        self.perf_overlay = PerfOverlay(self, self.profiler)
+        if self.settings.perf_overlay:
+            self.perf_overlay.toggle()
         
         self.create_fleet()
         
+        # Latest frame state from C, refreshed once per frame in run_game
+        self.snapshot = self.game_os.snapshot()
+        self.alpha = 1.0  # Where between its last two ticks the frame is drawn
+
+        # Input commands collected from this frame's events, sent in one batch
+        self.input_commands = []
+        self.move_keys = {
+            pygame.K_LEFT: INPUT_LEFT,
+            pygame.K_RIGHT: INPUT_RIGHT,
+            pygame.K_UP: INPUT_UP,
+            pygame.K_DOWN: INPUT_DOWN,
+        }
+
         self.bg_color = (0, 0, 0) #Keeping this for reference
         self.showing_high_scores = False
 
@@ -80,18 +159,78 @@ class AlienInvasion:
         self.back_button = Button(self, "Back")
         # Make the Exit Button
         self.exit_button = Button(self, "Exit")
-        
-        # Load high scores
-        self.high_scores = self.game_os.load_high_scores()
-        print("Current high scores:", self.high_scores)
-        
-        # Start background music in a separate thread
-        self.os_utils.start_music_thread("sounds/background_music.mp3")
+        self._layout_buttons()
+
+        # Menu screens are composed once into cached layers and rebuilt
+        # only when what they show changes (score, scores, hover state)
+        screen_size = (self.settings.screen_width, self.settings.screen_height)
+        self.menu_overlay = pygame.Surface(screen_size, pygame.SRCALPHA)
+        self.menu_overlay.fill((0, 0, 0, 200))  # Semi-transparent black
+        self.start_layer = UILayer(screen_size, self._build_start_screen)
+        self.game_over_layer = UILayer(screen_size, self._build_game_over, alpha=False)
+        self.high_scores_layer = UILayer(screen_size, self._build_high_scores)
+        
+        # Leaderboard, loaded once; saves happen on a background thread
+        self.scores = HighScoreStore(self.settings.high_score_file)
+        self.high_scores_page = 0
+        self.stats.high_score = self.scores.best()
+        self.was_game_over = False
+        print("Current high scores:", [record.score for record in self.scores.top()])
+        
+        # Start background music on the loader thread
+        self.loader.submit('music', lambda: self._start_music("sounds/background_music.mp3"))
+        self.startup.mark('high scores and menus')
+
+    def _start_music(self, music_file):
+        """Open the mixer and loop the music; runs on the loader thread."""
+        try:
+            if not os.path.exists(music_file):
+                print(f"Music file not found: {music_file}. Continuing without background music.")
+                return False
+            if not pygame.mixer.get_init():
+                pygame.mixer.init()
+            pygame.mixer.music.load(music_file)
+            pygame.mixer.music.play(-1)  # -1 for infinite loop
+            return True
+        except pygame.error as e:
+            print(f"Error playing music: {e}. Continuing without background music.")
+            return False
+
+    def _poll_assets(self, wait=False):
+        """Pick up images the loader has finished, or wait for all of them."""
+        if wait:
+            self.sprites.wait()
+        else:
+            self.sprites.poll()
+        background = self.sprites.get('background')
+        if self.background is not background:
+            self.background = background
+            self.renderer.background = background
+            self.renderer.invalidate()
+        self.ship.image = self.sprites.get('ship')
+        self.assets_pending = bool(self.sprites.deferred)
     
+    def _display_refresh_rate(self):
+        """The monitor's refresh rate, or 60 where SDL can't tell."""
+        try:
+            rate = pygame.display.get_current_refresh_rate()
+        except (AttributeError, pygame.error):
+            rate = 0
+        return rate if rate > 0 else 60
+
+    def _configure_engine(self):
+        """Apply engine options from settings to the current GameOSWrapper."""
+        self.game_os.set_tick_rate(self.settings.tick_rate)
+        if self.settings.precise_collisions:
+            self.game_os.set_collision_masks(self.sprites.mask('alien'), self.sprites.mask('bullet'))
+            self.game_os.set_collision_mode(COLLISION_MODE_MASK)
+
     def run_game(self):
         """Main game loop"""
         running = True
+        profiler = self.profiler
         while running:
+            profiler.begin_frame()
             # Handle events in the main thread
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
@@ -101,58 +240,110 @@ class AlienInvasion:
                     if event.key == pygame.K_q:
                         running = False
                         break
-                    self._check_keydown_events(event)
-                elif event.type == pygame.KEYUP:
+                    # A replay only takes input for the overlay
+                    if self.replay is None or event.key == pygame.K_F3:
+                        self._check_keydown_events(event)
+                elif event.type == pygame.KEYUP and self.replay is None:
                     self._check_keyup_events(event)
-                elif event.type == pygame.MOUSEBUTTONDOWN:
+                elif event.type == pygame.MOUSEBUTTONDOWN and self.replay is None:
                     mouse_pos = pygame.mouse.get_pos()
                     self._check_play_button(mouse_pos)
                     self._check_play_again_button(mouse_pos)
                     self._check_high_scores_button(mouse_pos)
                     self._check_back_button(mouse_pos)
                     self._check_exit_button(mouse_pos)
-
-            # Get game state from C
-            game_state = self.game_os.get_game_state()
+            self._flush_input()
+            if self.assets_pending:
+                self._poll_assets()
+            if self.replay is not None:
+                self._advance_replay()
+            elif self.recorder is not None:
+                self.recorder.poll()
+            profiler.mark('events')
+
+            # Get the whole frame state from C in one call
+            self.snapshot = self.game_os.snapshot()
+            self.alpha = self._interpolation_alpha()
             
             # Update ship position based on C state
-            self.ship.rect.x = game_state['player_x']
-            self.ship.rect.y = game_state['player_y']
+            snapshot = self.snapshot
+            alpha = self.alpha
+            self.ship.rect.x = round(snapshot.prev_player_x + (snapshot.player_x - snapshot.prev_player_x) * alpha)
+            self.ship.rect.y = round(snapshot.prev_player_y + (snapshot.player_y - snapshot.prev_player_y) * alpha)
             
             # Update game stats
-            self.stats.score = game_state['score']
-            self.stats.game_active = game_state['game_active']
-            self.stats.game_over = game_state['game_over']
-            self.stats.ships_left = game_state['player_health']
+            self.stats.score = self.snapshot.score
+            self.stats.game_active = self.snapshot.game_active
+            self.stats.game_over = self.snapshot.game_over
+            self.stats.ships_left = self.snapshot.player_health
+            if self.stats.game_over and not self.was_game_over:
+                self._record_score()
+            self.was_game_over = self.stats.game_over
             
-            # Check if all aliens are destroyed
-            if self.stats.game_active:
-                alien_positions = self.game_os.get_alien_positions()
-                all_aliens_destroyed = True
-                for x, y, active in alien_positions:
-                    if active:
-                        all_aliens_destroyed = False
-                        break
-
-                if all_aliens_destroyed:
+            # Check if all aliens are destroyed (a replay advances levels from its log)
+            if self.replay is not None:
+                if self.stats.level != self.snapshot.level:
+                    self.stats.level = self.snapshot.level
+                    self.sb.prep_level()
+            elif self.stats.game_active:
+                if self.snapshot.all_aliens_destroyed():
                     # Advance to next level
                     self.game_os.advance_level()
                     self.stats.level = self.game_os.get_level()
                     self.sb.prep_level()
                     
-                    # Clear existing bullets
-                    self.bullets.empty()
-                    self.alien_bullets.empty()
-                    
                     # Pause briefly to show level transition
                     sleep(0.5)
+                    self.snapshot = self.game_os.snapshot()
+            profiler.mark('bridge')
             
             # Update screen
             self.update_screen()
-            self.clock.tick(60)
+            if self.startup.enabled:
+                self._profile_startup()
+            self.clock.tick(self.render_fps)
+            profiler.mark('tick_wait')
+            profiler.end_frame(self.snapshot.tick)
 
         self.cleanup()
 
+    def _profile_startup(self):
+        """Report time to first frame, then when the loader finishes."""
+        startup = self.startup
+        if not startup.first_frame:
+            startup.mark('first frame')
+            startup.first_frame = True
+            for line in startup.report():
+                print(line)
+        if self.loader.all_ready:
+            startup.enabled = False
+            jobs = ', '.join(f"{name} {seconds * 1000:.1f} ms"
+                             for name, seconds in self.loader.timings.items())
+            print(f"background assets ready at {startup.elapsed_ms():.1f} ms ({jobs})")
+
+    def _advance_replay(self):
+        """Run the replay engine up to where real time says it should be,
+        at the tick rate the session was recorded at."""
+        now = time.perf_counter()
+        if self.replay_started is None:
+            self.replay_started = now
+        tick_rate = self.replay_session.tick_rate
+        due = int((now - self.replay_started) * tick_rate) - self.replay.ticks_run
+        if not self.replay.advance(due) and not self.replay_done:
+            self.replay_done = True
+            print(f"Replay finished: {len(self.replay.checkpoints)} checkpoint(s), "
+                  f"{self.replay.mismatches} mismatch(es)")
+
+    def _interpolation_alpha(self):
+        """How far to draw entities between the last two ticks (1 = newest).
+
+        Replays step the engine from the render loop, so their frames are
+        not on the tick clock and are drawn as they are.
+        """
+        if not self.settings.interpolate or self.replay is not None:
+            return 1.0
+        return self.snapshot.tick_fraction(monotonic_ns(), 1_000_000_000 / self.settings.tick_rate)
+
     def _check_events(self):
         """Respond to keypresses and mouse events."""
         for event in pygame.event.get():
@@ -170,37 +361,44 @@ class AlienInvasion:
                 elif not self.stats.game_active:
                     self._check_play_button(mouse_pos)
                     self._check_high_scores_button(mouse_pos)
+        self._flush_input()
 
     def _check_keydown_events(self, event):
         """Respond to keypresses."""
-        if event.key == pygame.K_RIGHT:
-            self.game_os.update_player_movement(0, 1, 0, 0)
-        elif event.key == pygame.K_LEFT:
-            self.game_os.update_player_movement(1, 0, 0, 0)
-        elif event.key == pygame.K_UP:
-            self.game_os.update_player_movement(0, 0, 1, 0)
-        elif event.key == pygame.K_DOWN:
-            self.game_os.update_player_movement(0, 0, 0, 1)
+        if self.showing_high_scores and event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+            step = 1 if event.key == pygame.K_RIGHT else -1
+            pages = self.scores.page_count(self.settings.high_scores_per_page)
+            self.high_scores_page = min(max(0, self.high_scores_page + step), pages - 1)
+        elif event.key in self.move_keys:
+            self.input_commands.append((CMD_MOVE_PRESS, self.move_keys[event.key], monotonic_ns()))
         elif event.key == pygame.K_q:
             sys.exit()
+        elif event.key == pygame.K_F3:
+            self.perf_overlay.toggle()
         elif event.key == pygame.K_SPACE:
-            self.game_os.fire_player_bullet()
+            self.input_commands.append((CMD_FIRE, 0, monotonic_ns()))
     
     def _check_keyup_events(self, event):
         """Respond to key releases."""
-        if event.key == pygame.K_RIGHT:
-            self.game_os.update_player_movement(0, 0, 0, 0)
-        elif event.key == pygame.K_LEFT:
-            self.game_os.update_player_movement(0, 0, 0, 0)
-        elif event.key == pygame.K_UP:
-            self.game_os.update_player_movement(0, 0, 0, 0)
-        elif event.key == pygame.K_DOWN:
-            self.game_os.update_player_movement(0, 0, 0, 0)
+        if event.key in self.move_keys:
+            self.input_commands.append((CMD_MOVE_RELEASE, self.move_keys[event.key], monotonic_ns()))
+
+    def _flush_input(self):
+        """Send this frame's input commands to the engine in one call.
+
+        Commands the full input ring did not take are kept, in order, and
+        sent again next frame, so no key press or release is lost.
+        """
+        if self.input_commands:
+            accepted = self.game_os.push_commands(self.input_commands)
+            del self.input_commands[:accepted]
 
     def _check_play_button(self, mouse_pos):
         """Start a new game when the player clicks Play."""
         button_clicked = self.play_button.rect.collidepoint(mouse_pos)
         if button_clicked and not self.stats.game_active:
+            if self.assets_pending:
+                self._poll_assets(wait=True)  # Don't start with placeholder sprites
             self.stats.reset_stats()
             self.stats.game_active = True
             self.sb.prep_score()
@@ -208,8 +406,15 @@ class AlienInvasion:
             self.sb.prep_ships()
             
             # Reset game state in C
+            if self.recorder is not None:
+                self.recorder.checkpoint()
             self.game_os.cleanup()
-            self.game_os = GameOSWrapper()
+            self.game_os = GameOSWrapper(max_aliens=self.settings.max_aliens,
+                                         max_bullets=self.settings.max_bullets,
+                                         name=self.spectator_name)
+            self._configure_engine()
+            if self.recorder is not None:
+                self.recorder.attach(self.game_os)
             self.game_os.start_game()
             
             # Hide cursor only when game is active
@@ -230,6 +435,7 @@ class AlienInvasion:
         button_clicked = self.high_scores_button.rect.collidepoint(mouse_pos)
         if button_clicked and (self.stats.game_over or not self.stats.game_active):
             self.showing_high_scores = True
+            self.high_scores_page = 0
             pygame.mouse.set_visible(True)  # Show cursor in high scores screen
 
     def _check_back_button(self, mouse_pos):
@@ -254,11 +460,6 @@ class AlienInvasion:
         self.stats.game_active = True
         self.stats.game_over = False
         
-        # Clear existing game elements
-        self.aliens.empty()
-        self.bullets.empty()
-        self.alien_bullets.empty()
-        
         # Create new fleet and center ship
         self.create_fleet()
         self.ship.center_ship()
@@ -269,58 +470,65 @@ class AlienInvasion:
         
         print("Game started")
 
+    def _layout_buttons(self):
+        """Place every menu button; the start and game over screens share High Scores."""
+        centerx = self.screen.get_rect().centerx
+        self.play_button.rect.centerx = centerx
+        self.play_button.rect.centery = self.screen.get_rect().centery - 50
+        self.high_scores_button.rect.centerx = centerx
+        self.high_scores_button.rect.top = self.play_button.rect.bottom + 20
+        self.play_again_button.rect.centerx = centerx
+        self.play_again_button.rect.top = 300
+        self.exit_button.rect.centerx = centerx
+        self.exit_button.rect.top = 500
+        self.back_button.rect.centerx = centerx
+        self.back_button.rect.top = 700
+        for button in (self.play_button, self.high_scores_button, self.play_again_button,
+                       self.exit_button, self.back_button):
+            button._prep_msg()
+
     def _draw_high_scores(self):
-        """Draw the high scores screen."""
-        # Create a semi-transparent overlay
-        overlay = pygame.Surface((self.settings.screen_width, self.settings.screen_height), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 200))  # Semi-transparent black
-        self.screen.blit(overlay, (0, 0))
+        """Draw the high scores screen from its cached layer."""
+        key = (self.high_scores_page, len(self.scores), self.back_button.hovered())
+        self.high_scores_layer.draw(self.screen, key=key)
+
+    def _build_high_scores(self, surface, key):
+        """Compose the high scores screen."""
+        page, _, back_hovered = key
+        surface.blit(self.menu_overlay, (0, 0))
         
         # Draw title
-        font = pygame.font.SysFont(self.settings.ui_font, 64)
-        title = font.render("High Scores", True, self.settings.ui_highlight_color)
+        font = self.text_cache.fonts.get(self.settings.ui_font, 64)
+        title = self.text_cache.render(font, "High Scores", self.settings.ui_highlight_color)
         title_rect = title.get_rect()
-        title_rect.centerx = self.screen.get_rect().centerx
+        title_rect.centerx = surface.get_rect().centerx
         title_rect.top = 100
-        self.screen.blit(title, title_rect)
+        surface.blit(title, title_rect)
         
         # Draw high scores
-        font = pygame.font.SysFont(self.settings.ui_font, 48)
-        try:
-            # Ensure high scores are loaded
-            if not hasattr(self, 'high_scores') or self.high_scores is None:
-                self.high_scores = self.game_os.load_high_scores()
-            
-            # Sort scores in descending order
-            sorted_scores = sorted(self.high_scores, reverse=True)
-            
-            # Display up to 10 scores
-            for i, score in enumerate(sorted_scores[:10]):
-                score_text = font.render(f"{i+1}. {score}", True, self.settings.ui_color)
-                score_rect = score_text.get_rect()
-                score_rect.centerx = self.screen.get_rect().centerx
-                score_rect.top = 200 + i * 50
-                self.screen.blit(score_text, score_rect)
-        except Exception as e:
-            # If there's an error, display a message
-            error_text = font.render("Error loading high scores", True, self.settings.ui_color)
-            error_rect = error_text.get_rect()
-            error_rect.centerx = self.screen.get_rect().centerx
-            error_rect.top = 200
-            self.screen.blit(error_text, error_rect)
-            print(f"Error loading high scores: {e}")
-        
-        # Draw back button
-        self.back_button.rect.centerx = self.screen.get_rect().centerx
-        self.back_button.rect.top = 700
-        self.back_button._prep_msg()
-        self.back_button.draw_button()
-
-    def fire_bullet(self):
-        """Fire a bullet if we haven't reached the limit."""
-        if len(self.bullets) < self.settings.bullets_allowed:
-            new_bullet = Bullet(self)
-            self.bullets.add(new_bullet)
+        font = self.text_cache.fonts.get(self.settings.ui_font, 48)
+        per_page = self.settings.high_scores_per_page
+        first_rank = page * per_page + 1
+        for i, record in enumerate(self.scores.page(page, per_page)):
+            line = f"{first_rank + i}. {record.player}  {record.score}"
+            score_text = self.text_cache.render(font, line, self.settings.ui_color)
+            score_rect = score_text.get_rect()
+            score_rect.centerx = surface.get_rect().centerx
+            score_rect.top = 200 + i * 50
+            surface.blit(score_text, score_rect)
+
+        # Page indicator, flipped with the left and right arrow keys
+        pages = self.scores.page_count(per_page)
+        if pages > 1:
+            small_font = self.text_cache.fonts.get(self.settings.ui_font, 28)
+            page_text = self.text_cache.render(
+                small_font, f"< page {page + 1} of {pages} >", self.settings.ui_color)
+            page_rect = page_text.get_rect()
+            page_rect.centerx = surface.get_rect().centerx
+            page_rect.top = 200 + per_page * 50
+            surface.blit(page_text, page_rect)
+        
+        self.back_button.draw_button(surface, back_hovered)
 
     def create_fleet(self):
         """Create the fleet of aliens using C game logic"""
@@ -331,19 +539,6 @@ class AlienInvasion:
         """This method is no longer needed as aliens are managed by C"""
         pass
 
-    def check_fleet_edges(self):
-        #this will take care of the alien if it touches an edge
-        for alien in self.aliens.sprites():
-            if alien.check_edges():
-                self.change_fleet_direction()
-                break
-
-    def change_fleet_direction(self):
-        #This will drop the entire fleet and change the fleet's direction
-        for alien in self.aliens.sprites():
-            alien.rect.y += self.settings.fleet_drop_speed
-        self.settings.fleet_direction *= -1
-
     def ship_hit(self):
         """Respond to the ship being hit by an alien."""
         if self.stats.ships_left > 0:
@@ -351,11 +546,6 @@ class AlienInvasion:
             self.stats.ships_left -= 1
             print(f"Ships left: {self.stats.ships_left}")
             
-            # Get rid of any remaining aliens and bullets.
-            self.aliens.empty()
-            self.bullets.empty()
-            self.alien_bullets.empty()
-            
             # Create a new fleet and center the ship.
             self.create_fleet()
             self.ship.center_ship()
@@ -367,117 +557,125 @@ class AlienInvasion:
             self.stats.game_over = True
             print("Game Over! No ships left.")
             
-            # Save the score if it's a high score
-            if self.stats.score > 0:
-                print(f"Game over! Final score: {self.stats.score}")
-                self.game_os.save_high_score(self.stats.score)
-                self.high_scores = self.game_os.load_high_scores()
-                print("Updated high scores:", self.high_scores)
+            self._record_score()
 
     def check_aliens_bottom(self):
         #This method is no longer needed as aliens will bounce off the bottom
         pass
 
-    def update_aliens(self):
-        """Update the positions of all aliens in the fleet."""
-        self.aliens.update()
-        
-        # Handle alien shooting
-        for alien in self.aliens.sprites():
-            if alien.can_shoot() and len(self.alien_bullets) < self.settings.alien_bullets_allowed:
-                new_bullet = AlienBullet(self, alien)
-                self.alien_bullets.add(new_bullet)
-
-    def update_bullets(self):
-        """Update bullet positions and handle bullet cleanup"""
-        # Update player bullets
-        self.bullets.update()
-        
-        # Remove bullets that have left the screen
-        for bullet in self.bullets.copy():
-            if bullet.rect.bottom <= 0:
-                self.bullets.remove(bullet)
-        
-        # Update alien bullets
-        self.alien_bullets.update()
-        
-        # Remove alien bullets that have left the screen
-        for bullet in self.alien_bullets.copy():
-            if bullet.rect.top >= self.settings.screen_height:
-                self.alien_bullets.remove(bullet)
-
-    def update_alien_bullets(self):
-        """Update the positions of all alien bullets."""
-        # Update bullet positions
-        self.alien_bullets.update()
-        
-        # Remove bullets that have left the screen
-        for bullet in self.alien_bullets.copy():
-            if bullet.rect.top >= self.settings.screen_height:
-                self.alien_bullets.remove(bullet)
-
     def check_bullet_alien_collisions(self):
         """This method is no longer needed as collisions are handled in C."""
         pass
 
+    def _current_scene(self):
+        """Identify the screen being shown, so scene changes force a full redraw."""
+        if self.showing_high_scores:
+            return 'high_scores'
+        if self.stats.game_active:
+            return ('game', self.stats.level)
+        if self.stats.game_over:
+            return 'game_over'
+        return 'start'
+
     def update_screen(self):
         """Update images on the screen, and flip to the new screen."""
-        self.screen.blit(self.background, (0, 0))
+        dirty = self.settings.dirty_rect_rendering
+        gameplay = self.stats.game_active and not self.showing_high_scores
+        track = False
+        if dirty:
+            if not gameplay:
+                # Menus are redrawn in full every frame, and track nothing
+                self.renderer.invalidate()
+            # Every star, alien and bullet is a rect, plus a few for the HUD
+            expected = (self.settings.star_count + len(self.snapshot.aliens)
+                        + len(self.snapshot.bullets) + 8)
+            track = self.renderer.begin_frame(self._current_scene(), expected) and gameplay
+        else:
+            self.screen.blit(self.background, (0, 0))
         self.star_field.update()
-        self.star_field.draw()
+        star_rects = self.star_field.draw(stamps=track)
+        profiler = self.profiler
+        profiler.mark('stars')
         
         if self.showing_high_scores:
             self._draw_high_scores()
             pygame.mouse.set_visible(True)  # Ensure cursor is visible in high scores
         elif self.stats.game_active:
-            # Get positions from C
-            alien_positions = self.game_os.get_alien_positions()
-            bullet_positions = self.game_os.get_bullet_positions()
-            
             # Draw ship
-            self.ship.blitme()
-            
-            # Draw aliens
-            for x, y, active in alien_positions:
-                if active:  # Only draw active aliens
-                    alien = Alien(self)
-                    alien.rect.x = x
-                    alien.rect.y = y
-                    self.screen.blit(alien.image, alien.rect)
+            rects = [self.ship.blitme()]
             
-            # Draw bullets
-            for x, y, is_player, active in bullet_positions:
-                if active:  # Only draw active bullets
-                    if is_player:
-                        bullet = Bullet(self)
-                    else:
-                        # Create a temporary alien for the bullet
-                        temp_alien = Alien(self)
-                        temp_alien.rect.x = x
-                        temp_alien.rect.y = y
-                        bullet = AlienBullet(self, temp_alien)
-                    bullet.rect.x = x
-                    bullet.rect.y = y
-                    self.screen.blit(bullet.image, bullet.rect)
+            # Draw aliens and bullets straight from this frame's snapshot
+            rects.extend(self._draw_entities(track))
+            profiler.mark('entities')
             
             # Draw score and health
-            self._draw_score()
-            self._draw_health_bar()
+            rects.extend(self._draw_score())
+            rects.extend(self._draw_health_bar())
+            overlay_rect = self.perf_overlay.draw()
+            if overlay_rect:
+                rects.append(overlay_rect)
             pygame.mouse.set_visible(False)  # Ensure cursor is hidden during gameplay
+
+            if track:
+                self.renderer.extend(star_rects)
+                self.renderer.extend(rects)
         elif self.stats.game_over:
             self._draw_game_over_elements(self.screen)
             pygame.mouse.set_visible(True)  # Ensure cursor is visible in game over screen
         else:
             self._draw_start_screen()
             pygame.mouse.set_visible(True)  # Ensure cursor is visible in start screen
-        
-        pygame.display.flip()
+        if not self.stats.game_active or self.showing_high_scores:
+            self.perf_overlay.draw()
+        profiler.mark('hud')
+
+        if dirty:
+            self.renderer.present()
+        else:
+            pygame.display.flip()
+        profiler.mark('flip')
+
+    def _draw_entities(self, dirty=False):
+        """Blit every alien and bullet with one blits() call per sprite.
+
+        The snapshot only holds live entities, so its position columns
+        (interpolated between the last two ticks) feed blits() directly,
+        copied into pooled [x, y] lists rather than a new list per entity.
+        Rects are only built when dirty-rect rendering needs them.
+        """
+        screen = self.screen
+        aliens = self.snapshot.aliens
+        bullets = self.snapshot.bullets
+        player = bullets[:, 2] != 0
+        alpha = self.alpha
+        batches = (
+            (self.sprites.get('alien'), interpolate(aliens, alpha)),
+            (self.sprites.get('bullet'), interpolate(bullets[player], alpha)),
+            (self.sprites.get('alien_bullet'), interpolate(bullets[~player], alpha)),
+        )
+        rects = []
+        pool = self.draw_positions
+        for image, positions in batches:
+            count = pool.fill(positions)
+            drawn = screen.blits(zip(repeat(image), islice(pool.positions, count)), doreturn=dirty)
+            if dirty:
+                rects.extend(drawn)
+        return rects
+
+    def pool_stats(self):
+        """Occupancy of the engine's entity pools and the draw list."""
+        stats = self.game_os.pool_stats()
+        return {
+            'engine_aliens': (stats['live_aliens'], stats['alien_capacity']),
+            'engine_bullets': (stats['live_bullets'], stats['bullet_capacity']),
+            'draw_positions': self.draw_positions.stats(),
+        }
 
     def _draw_score(self):
-        """Draw the score and high score to the screen."""
+        """Draw the score and level to the screen and return the drawn rects."""
         # Don't draw score if game is over
         if self.stats.game_over:
-            return
+            return []
             
         # Create a semi-transparent background for the score
         score_rect = pygame.Rect(0, 0, 200, 100)
@@ -485,35 +683,35 @@ class AlienInvasion:
         score_rect.top = 20
         score_surface = pygame.Surface((score_rect.width, score_rect.height), pygame.SRCALPHA)
         score_surface.fill(self.settings.ui_background_color)
-        self.screen.blit(score_surface, score_rect)
+        drawn = [self.screen.blit(score_surface, score_rect)]
         
         # Set up the font
-        font = pygame.font.SysFont(self.settings.ui_font, self.settings.ui_font_size)
+        font = self.text_cache.fonts.get(self.settings.ui_font, self.settings.ui_font_size)
         
         # Draw current score
         score_str = f"Score: {self.stats.score}"
-        score_image = font.render(score_str, True, self.settings.ui_color)
+        score_image = self.text_cache.render(font, score_str, self.settings.ui_color)
         score_rect = score_image.get_rect()
         score_rect.centerx = self.screen.get_rect().centerx
         score_rect.top = 20
-        self.screen.blit(score_image, score_rect)
+        drawn.append(self.screen.blit(score_image, score_rect))
         
         # Draw level number
         level_str = f"Level: {self.stats.level}"
-        level_image = font.render(level_str, True, self.settings.ui_color)
+        level_image = self.text_cache.render(font, level_str, self.settings.ui_color)
         level_rect = level_image.get_rect()
         level_rect.centerx = self.screen.get_rect().centerx
         level_rect.top = 60
-        self.screen.blit(level_image, level_rect)
+        drawn.append(self.screen.blit(level_image, level_rect))
+        return drawn
 
     def _draw_health_bar(self):
-        """Draw the health bar at the top right of the screen."""
+        """Draw the health bar at the top right of the screen and return the drawn rects."""
         if self.stats.game_over:
-            return
+            return []
 
-        # Get current health from game state
-        game_state = self.game_os.get_game_state()
-        current_health = game_state['player_health']
+        # Get current health from this frame's snapshot
+        current_health = self.snapshot.player_health
         max_health = 100  # Maximum health value
 
         # Health bar dimensions and position
@@ -526,7 +724,7 @@ class AlienInvasion:
         health_rect = pygame.Rect(bar_x - 5, bar_y - 5, bar_width + 10, bar_height + 10)
         health_surface = pygame.Surface((health_rect.width, health_rect.height), pygame.SRCALPHA)
         health_surface.fill(self.settings.ui_background_color)
-        self.screen.blit(health_surface, health_rect)
+        drawn = [self.screen.blit(health_surface, health_rect)]
 
         # Draw background (empty health bar)
         pygame.draw.rect(self.screen, (50, 50, 50), (bar_x, bar_y, bar_width, bar_height))
@@ -546,84 +744,63 @@ class AlienInvasion:
         pygame.draw.rect(self.screen, color, (bar_x, bar_y, health_width, bar_height))
 
         # Draw health text
-        font = pygame.font.SysFont(self.settings.ui_font, self.settings.ui_font_size)
+        font = self.text_cache.fonts.get(self.settings.ui_font, self.settings.ui_font_size)
         health_text = f"HP: {current_health}/{max_health}"
-        text_image = font.render(health_text, True, self.settings.ui_color)
+        text_image = self.text_cache.render(font, health_text, self.settings.ui_color)
         text_rect = text_image.get_rect()
         text_rect.right = bar_x + bar_width
         text_rect.top = bar_y + bar_height + 5
-        self.screen.blit(text_image, text_rect)
+        drawn.append(self.screen.blit(text_image, text_rect))
+        return drawn
 
     def _draw_game_over_elements(self, surface):
-        """Draw game over elements on the given surface."""
-        # Create a new surface for the game over screen
-        game_over_surface = pygame.Surface((self.settings.screen_width, self.settings.screen_height), pygame.SRCALPHA)
-        
-        # Draw background
-        game_over_surface.blit(self.background, (0, 0))
-        
-        # Create a semi-transparent overlay
-        overlay = pygame.Surface((self.settings.screen_width, self.settings.screen_height), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 200))  # Semi-transparent black
-        game_over_surface.blit(overlay, (0, 0))
+        """Draw the game over screen from its cached layer onto the given surface."""
+        key = (self.stats.score, self.background, self.play_again_button.hovered(),
+               self.high_scores_button.hovered(), self.exit_button.hovered())
+        self.game_over_layer.draw(surface, key=key)
+
+    def _build_game_over(self, surface, key):
+        """Compose the game over screen over the dimmed background."""
+        score, background, play_again_hovered, high_scores_hovered, exit_hovered = key
+        surface.blit(background, (0, 0))
+        surface.blit(self.menu_overlay, (0, 0))
         
         # Draw game over message
-        font = pygame.font.SysFont(self.settings.ui_font, 64)
-        game_over_text = font.render("Game Over", True, self.settings.ui_highlight_color)
+        font = self.text_cache.fonts.get(self.settings.ui_font, 64)
+        game_over_text = self.text_cache.render(font, "Game Over", self.settings.ui_highlight_color)
         game_over_rect = game_over_text.get_rect()
-        game_over_rect.centerx = game_over_surface.get_rect().centerx
+        game_over_rect.centerx = surface.get_rect().centerx
         game_over_rect.top = 100
-        game_over_surface.blit(game_over_text, game_over_rect)
+        surface.blit(game_over_text, game_over_rect)
         
         # Draw final score
-        score_text = font.render(f"Final Score: {self.stats.score}", True, self.settings.ui_color)
+        score_text = self.text_cache.render(font, f"Final Score: {score}", self.settings.ui_color)
         score_rect = score_text.get_rect()
-        score_rect.centerx = game_over_surface.get_rect().centerx
+        score_rect.centerx = surface.get_rect().centerx
         score_rect.top = 200
-        game_over_surface.blit(score_text, score_rect)
-        
-        # Position buttons
-        self.play_again_button.rect.centerx = game_over_surface.get_rect().centerx
-        self.play_again_button.rect.top = 300
-        self.play_again_button._prep_msg()
-        
-        self.high_scores_button.rect.centerx = game_over_surface.get_rect().centerx
-        self.high_scores_button.rect.top = 400
-        self.high_scores_button._prep_msg()
-        
-        self.exit_button.rect.centerx = game_over_surface.get_rect().centerx
-        self.exit_button.rect.top = 500
-        self.exit_button._prep_msg()
-        
-        # Blit the complete game over surface to the screen
-        surface.blit(game_over_surface, (0, 0))
+        surface.blit(score_text, score_rect)
         
-        # Draw buttons directly on the screen
-        self.play_again_button.draw_button()
-        self.high_scores_button.draw_button()
-        self.exit_button.draw_button()
+        self.play_again_button.draw_button(surface, play_again_hovered)
+        self.high_scores_button.draw_button(surface, high_scores_hovered)
+        self.exit_button.draw_button(surface, exit_hovered)
 
     def _draw_start_screen(self):
-        """Draw the start screen."""
-        # Draw title
-        font = pygame.font.SysFont(None, 64)
-        title_text = font.render("Alien Invasion", True, (255, 255, 255))
+        """Draw the start screen from its cached layer."""
+        key = (self.play_button.hovered(), self.high_scores_button.hovered())
+        self.start_layer.draw(self.screen, key=key)
+
+    def _build_start_screen(self, surface, key):
+        """Compose the start screen's title and buttons."""
+        play_hovered, high_scores_hovered = key
+        font = self.text_cache.fonts.get(None, 64)
+        title_text = self.text_cache.render(font, "Alien Invasion", (255, 255, 255))
         title_rect = title_text.get_rect()
-        title_rect.centerx = self.screen.get_rect().centerx
+        title_rect.centerx = surface.get_rect().centerx
         title_rect.top = 100
-        self.screen.blit(title_text, title_rect)
-        
-        # Position and draw play button
-        self.play_button.rect.centerx = self.screen.get_rect().centerx
-        self.play_button.rect.centery = self.screen.get_rect().centery - 50
-        self.play_button._prep_msg()  # Re-prep the message after moving the button
-        self.play_button.draw_button()
+        surface.blit(title_text, title_rect)
         
-        # Position and draw high scores button
-        self.high_scores_button.rect.centerx = self.screen.get_rect().centerx
-        self.high_scores_button.rect.top = self.play_button.rect.bottom + 20
-        self.high_scores_button._prep_msg()  # Re-prep the message after moving the button
-        self.high_scores_button.draw_button()
+        self.play_button.draw_button(surface, play_hovered)
+        self.high_scores_button.draw_button(surface, high_scores_hovered)
 
     def _handle_game_over(self):
         """Handle the game over state and transition."""
@@ -635,15 +812,7 @@ class AlienInvasion:
         # Show cursor when game is over
         pygame.mouse.set_visible(True)
         
-        # Save high score if needed
-        if self.stats.score > 0:
-            self.game_os.save_high_score(self.stats.score)
-            self.high_scores = self.game_os.load_high_scores()
-        
-        # Clear all game elements
-        self.aliens.empty()
-        self.bullets.empty()
-        self.alien_bullets.empty()
+        self._record_score()
         
         # Clear the screen
         self.screen.fill(self.settings.bg_color)
@@ -653,10 +822,8 @@ class AlienInvasion:
         self.star_field.update()
         self.star_field.draw()
         
-        # Create a semi-transparent overlay
-        overlay = pygame.Surface((self.settings.screen_width, self.settings.screen_height), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 200))  # Semi-transparent black
-        self.screen.blit(overlay, (0, 0))
+        # Dim the screen
+        self.screen.blit(self.menu_overlay, (0, 0))
         
         # Draw game over elements
         self._draw_game_over_elements(self.screen)
@@ -664,6 +831,14 @@ class AlienInvasion:
         # Force screen update
         pygame.display.flip()
 
+    def _record_score(self):
+        """Add a finished game to the leaderboard; the disk write happens off-thread."""
+        if self.stats.score <= 0 or self.replay is not None:
+            return
+        rank = self.scores.submit(self.settings.player_name, self.stats.score, self.stats.level)
+        self.stats.high_score = self.scores.best()
+        print(f"Game over! Final score: {self.stats.score} (rank {rank})")
+
     def update_ship_position(self):
         """Update ship position using OS wrapper"""
         self.game_os.update_player_position(self.ship.rect.x, self.ship.rect.y)
@@ -675,22 +850,42 @@ class AlienInvasion:
 
     def cleanup(self):
         """Cleanup resources"""
+        if self.settings.perf_csv and self.profiler.count:
+            self.profiler.dump_csv(self.settings.perf_csv)
+        self.profiler.close()
+        if self.recorder is not None:
+            self.recorder.close()
+        self.scores.close()
+        self.loader.close()
         self.game_os.cleanup()
         pygame.quit()
 
 def main():
     """Main function to run the game."""
-    # Initialize pygame only once
-    pygame.init()
-    pygame.mixer.init()
-    
+    parser = argparse.ArgumentParser(description="Alien Invasion")
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='print a breakdown of the time to the first frame')
+    parser.add_argument('--spectate', nargs='?', const='alien-invasion-{pid}', metavar='NAME',
+                        help='let python spectator.py follow the game under NAME '
+                             '(default alien-invasion-{pid})')
+    args = parser.parse_args()
+
+    settings = Settings()
+    if args.spectate:
+        settings.spectator_name = args.spectate
+
+    ai = None
     try:
         # Create game instance
-        ai = AlienInvasion()
+        ai = AlienInvasion(profile_startup=args.profile_startup, settings=settings)
         
         # Run the game
         ai.run_game()
         
+    except KeyboardInterrupt:
+        # Ctrl+C: still close the session log and save pending scores
+        if ai is not None:
+            ai.cleanup()
     except Exception as e:
         print(f"Error running game: {e}")
     finally:
@@ -0,0 +1,151 @@
+"""Prebuilt sprite bundle.
+
+Decoding the PNG and JPEG sources and scaling them to their in-game
+sizes is the slow part of loading sprites. The bundle does that once:
+it stores every image already scaled, as raw BGRA pixels (the byte
+order of the usual 32-bit XRGB/ARGB display format), in one file. At
+startup the file is memory-mapped and each surface is made straight
+from its slice of the mapping, so converting it to the display format
+is a plain copy and nothing is decoded.
+
+The bundle header carries a SHA-256 key over the bundle version, every
+source file's bytes and its target size, so a stale bundle is detected
+and rebuilt whenever an image changes:
+
+    python asset_bundle.py          # build (or rebuild) the bundle now
+"""
+import hashlib
+import mmap
+import os
+import struct
+import sys
+
+import pygame
+
+MAGIC = b'AIAB'
+VERSION = 1
+PIXEL_FORMAT = 'BGRA'
+ALIGN = 64  # Pixel blocks start on cache-line boundaries
+
+HEADER = struct.Struct('<4sHH32s')  # magic, version, entry count, key
+ENTRY = struct.Struct('<24sHHBxxxQQ')  # name, width, height, alpha, offset, length
+
+
+def bundle_key(specs, image_dir):
+    """Hash everything the bundle is built from.
+
+    specs maps a name to (filename, size, alpha, fallback). A missing
+    source file hashes as missing, so adding it later forces a rebuild.
+    """
+    digest = hashlib.sha256(b'%s %d %s' % (MAGIC, VERSION, PIXEL_FORMAT.encode()))
+    for name in sorted(specs):
+        filename, size, alpha, _ = specs[name]
+        digest.update(f'{name} {filename} {size[0]}x{size[1]} {int(bool(alpha))}\n'.encode())
+        try:
+            with open(os.path.join(image_dir, filename), 'rb') as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+        except FileNotFoundError:
+            digest.update(b'missing')
+    return digest.digest()
+
+
+def write_bundle(path, key, images):
+    """Write images, a dict of name -> (surface, alpha), to path atomically."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    entries = []
+    blocks = []
+    offset = HEADER.size + len(images) * ENTRY.size
+    for name, (surface, alpha) in images.items():
+        offset += -offset % ALIGN
+        data = pygame.image.tobytes(surface, PIXEL_FORMAT)
+        width, height = surface.get_size()
+        entries.append(ENTRY.pack(name.encode(), width, height, int(bool(alpha)), offset, len(data)))
+        blocks.append((offset, data))
+        offset += len(data)
+
+    temp = path + '.tmp'
+    with open(temp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(entries), key))
+        for entry in entries:
+            f.write(entry)
+        for block_offset, data in blocks:
+            f.write(b'\0' * (block_offset - f.tell()))
+            f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp, path)
+
+
+def read_bundle(path, key):
+    """Return {name: (surface, alpha)} converted for the display, or None
+    if the bundle is missing, damaged or was built from other sources.
+
+    Needs the display mode to be set.
+    """
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return None
+    with f:
+        try:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return None  # Empty file
+    try:
+        if len(mapping) < HEADER.size:
+            return None
+        magic, version, count, stored_key = HEADER.unpack_from(mapping, 0)
+        if magic != MAGIC or version != VERSION or stored_key != key:
+            return None
+        if len(mapping) < HEADER.size + count * ENTRY.size:
+            return None
+        images = {}
+        view = memoryview(mapping)
+        try:
+            for i in range(count):
+                raw_name, width, height, alpha, offset, length = ENTRY.unpack_from(
+                    mapping, HEADER.size + i * ENTRY.size)
+                if length != width * height * 4 or offset + length > len(mapping):
+                    return None
+                surface = pygame.image.frombuffer(view[offset:offset + length], (width, height),
+                                                  PIXEL_FORMAT)
+                # The converted copy no longer needs the mapping
+                surface = surface.convert_alpha() if alpha else surface.convert()
+                images[raw_name.rstrip(b'\0').decode()] = (surface, bool(alpha))
+        finally:
+            view.release()
+        return images
+    finally:
+        mapping.close()
+
+
+def build(settings=None, image_dir=None, path=None):
+    """Decode and scale every sprite source and write the bundle."""
+    from settings import Settings
+    from sprite_cache import SpriteCache, bundle_specs
+    settings = settings or Settings()
+    image_dir = image_dir or SpriteCache.default_image_dir()
+    path = path or settings.asset_bundle
+    specs = bundle_specs(settings)
+    images = {}
+    for name, (filename, size, alpha, _) in specs.items():
+        try:
+            image = pygame.image.load(os.path.join(image_dir, filename))
+        except (pygame.error, FileNotFoundError):
+            print(f"skipping {name}: {filename} not found")
+            continue
+        images[name] = (pygame.transform.scale(image, size), alpha)
+    write_bundle(path, bundle_key(specs, image_dir), images)
+    return path, images
+
+
+def main():
+    path, images = build()
+    size = os.path.getsize(path)
+    print(f"wrote {path}: {len(images)} images, {size / 1024:.0f} KiB")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""Load slow assets on a background thread.
+
+The game opens its window and draws the start screen straight away,
+while images are decoded and the music is opened on a loader thread.
+Jobs only do work that does not need the display (file reads, decoding,
+scaling, the mixer); anything display-bound, like converting a surface
+to the screen's pixel format, happens on the main thread once the job
+is ready.
+"""
+import queue
+import threading
+import time
+
+
+class AssetLoader:
+    """Run named loading jobs in order on one daemon thread.
+
+    submit() queues a job, ready() says whether it has finished and
+    result() returns what it produced, re-raising anything it raised.
+    With background=False jobs run inline in submit(), which gives the
+    old load-everything-first startup.
+    """
+
+    def __init__(self, background=True):
+        self.background = background
+        self.results = {}
+        self.errors = {}
+        self.timings = {}  # name -> seconds the job took
+        self.pending = []  # Names not finished yet, in submission order
+        self.lock = threading.Lock()
+        self.finished = threading.Condition(self.lock)
+        self.queue = queue.Queue()
+        self.thread = None
+        if background:
+            self.thread = threading.Thread(target=self._loop, name='asset-loader', daemon=True)
+            self.thread.start()
+
+    def submit(self, name, job):
+        """Queue job() under name."""
+        with self.lock:
+            self.pending.append(name)
+        if self.background:
+            self.queue.put((name, job))
+        else:
+            self._run(name, job)
+
+    def _run(self, name, job):
+        start = time.perf_counter()
+        value = error = None
+        try:
+            value = job()
+        except Exception as e:
+            error = e
+        with self.finished:
+            self.timings[name] = time.perf_counter() - start
+            if error is None:
+                self.results[name] = value
+            else:
+                self.errors[name] = error
+            self.pending.remove(name)
+            self.finished.notify_all()
+
+    def _loop(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            self._run(*item)
+
+    def ready(self, name):
+        with self.lock:
+            return name in self.results or name in self.errors
+
+    @property
+    def all_ready(self):
+        with self.lock:
+            return not self.pending
+
+    def progress(self):
+        """Return (finished, submitted) job counts."""
+        with self.lock:
+            done = len(self.results) + len(self.errors)
+            return done, done + len(self.pending)
+
+    def result(self, name, default=None):
+        """Return what a finished job produced, or default if it is still running."""
+        with self.lock:
+            if name in self.errors:
+                raise self.errors[name]
+            return self.results.get(name, default)
+
+    def wait(self, name=None, timeout=None):
+        """Block until one job, or every job, has finished; False on timeout."""
+        with self.finished:
+            return self.finished.wait_for(
+                lambda: (name not in self.pending) if name else not self.pending, timeout)
+
+    def close(self):
+        """Stop the loader thread once the queued jobs are done."""
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
@@ -0,0 +1,392 @@
+"""Benchmarks for the render, bridge and simulation hot paths.
+
+Runs under SDL's dummy video driver, so it works without a display:
+
+    python benchmark.py                    # run and compare to the baseline
+    python benchmark.py --save-baseline    # record a new baseline
+    python benchmark.py --scales 50 500    # only some entity counts
+
+Every benchmark is timed at each entity scale (aliens and bullets) and
+reported as percentiles in microseconds. Results are written as JSON and
+compared against benchmark_baseline.json. Single cases are too noisy to
+gate on, so every delta is printed but the exit status is 1 only if the
+geometric mean over all cases got slower than the allowed threshold.
+--runs repeats the suite and keeps each case's median across runs.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import numpy as np
+import pygame
+
+from game_os_wrapper import (GameOSWrapper, GameSnapshot, CMD_FIRE, CMD_MOVE_PRESS,
+                             CMD_MOVE_RELEASE, INPUT_LEFT, INPUT_RIGHT, SNAP_PLAYER_X,
+                             SNAP_PLAYER_Y, SNAP_PLAYER_HEALTH, SNAP_SCORE,
+                             SNAP_GAME_ACTIVE, SNAP_LEVEL, SNAP_NUM_ALIENS,
+                             SNAP_NUM_BULLETS)
+
+DEFAULT_SCALES = (50, 500, 5000)
+SEED = 1234
+RESULTS_FILE = 'benchmark_results.json'
+BASELINE_FILE = 'benchmark_baseline.json'
+
+
+def percentiles(samples_ns):
+    """Summarize timing samples (in ns) as microsecond percentiles."""
+    us = np.asarray(samples_ns, dtype=np.float64) / 1000.0
+    return {
+        'n': int(us.size),
+        'mean_us': round(float(us.mean()), 3),
+        'p50_us': round(float(np.percentile(us, 50)), 3),
+        'p90_us': round(float(np.percentile(us, 90)), 3),
+        'p99_us': round(float(np.percentile(us, 99)), 3),
+        'max_us': round(float(us.max()), 3),
+    }
+
+
+def time_calls(fn, repeat, warmup=5):
+    """Call fn repeat times and return the duration of each call in ns."""
+    for _ in range(warmup):
+        fn()
+    clock = time.perf_counter_ns
+    samples = []
+    for _ in range(repeat):
+        start = clock()
+        fn()
+        samples.append(clock() - start)
+    return samples
+
+
+def repeat_for(count, small, large):
+    """Fewer samples at large scales keep the whole suite under a minute."""
+    return small if count <= 500 else large
+
+
+def populated_engine(count):
+    """A headless engine holding roughly count aliens and count bullets.
+
+    Levels are advanced until the fleet has at least count aliens, then
+    the ship sweeps sideways firing bursts until there are count bullets
+    in flight (or the attempt gives up). The actual counts are returned
+    alongside the engine, since collisions can remove a few.
+    """
+    capacity = max(1024, count * 2)
+    engine = GameOSWrapper(headless=True, seed=SEED, max_aliens=capacity, max_bullets=capacity)
+    engine.start_game()
+    while engine.pool_stats()['live_aliens'] < count:
+        engine.advance_level()
+
+    direction = INPUT_RIGHT
+    for _ in range(200):
+        if engine.pool_stats()['live_bullets'] >= count:
+            break
+        burst = min(count - engine.pool_stats()['live_bullets'], 64)
+        engine.push_commands([(CMD_MOVE_PRESS, direction, 0)] + [(CMD_FIRE, 0, 0)] * burst)
+        engine.step(1)
+        engine.push_commands([(CMD_MOVE_RELEASE, direction, 0)])
+        direction = INPUT_LEFT if direction == INPUT_RIGHT else INPUT_RIGHT
+
+    stats = engine.pool_stats()
+    return engine, {'aliens': stats['live_aliens'], 'bullets': stats['live_bullets']}
+
+
+def bench_engine(count):
+    """C tick (the logic loop body) and its collision pass, plus bridge calls."""
+    engine, actual = populated_engine(count)
+    results = {}
+    try:
+        engine.set_profiling(True)
+        repeat = repeat_for(count, 2000, 300)
+
+        # The scenario drifts a little while it runs (aliens die, bullets
+        # leave the screen); the recorded entity counts are the starting ones
+        tick_ns = []
+        collision_ns = []
+        for _ in range(repeat):
+            start = time.perf_counter_ns()
+            engine.step(1)
+            tick_ns.append(time.perf_counter_ns() - start)
+            collision_ns.append(engine.tick_profile()[1])
+        results['sim.tick'] = percentiles(tick_ns)
+        results['sim.handle_collisions'] = percentiles(collision_ns)
+        engine.set_profiling(False)
+
+        repeat = repeat_for(count, 2000, 500)
+        results['bridge.snapshot'] = percentiles(time_calls(engine.snapshot, repeat))
+        results['bridge.get_game_state'] = percentiles(time_calls(engine.get_game_state, repeat))
+        results['bridge.pool_stats'] = percentiles(time_calls(engine.pool_stats, repeat))
+        results['bridge.get_alien_positions'] = percentiles(
+            time_calls(engine.get_alien_positions, repeat_for(count, 500, 50)))
+        results['bridge.get_bullet_positions'] = percentiles(
+            time_calls(engine.get_bullet_positions, repeat_for(count, 500, 50)))
+
+        # A typical frame's worth of input; the ring is drained between
+        # samples so every push lands in an empty ring
+        commands = [(CMD_MOVE_PRESS, INPUT_LEFT, 0), (CMD_FIRE, 0, 0), (CMD_MOVE_RELEASE, INPUT_LEFT, 0)]
+        push_ns = []
+        for _ in range(repeat):
+            start = time.perf_counter_ns()
+            engine.push_commands(commands)
+            push_ns.append(time.perf_counter_ns() - start)
+            engine.step(1)
+        results['bridge.push_commands'] = percentiles(push_ns)
+    finally:
+        engine.cleanup()
+
+    for key in results:
+        results[key]['entities'] = actual
+    return results
+
+
+def synthetic_snapshot(count, settings, rng):
+    """A snapshot holding exactly count aliens and count bullets on screen."""
+    snap = GameSnapshot(max(count, 1), max(count, 1))
+    snap.header[:] = 0
+    snap.header[SNAP_PLAYER_X] = settings.screen_width // 2
+    snap.header[SNAP_PLAYER_Y] = settings.screen_height - 50
+    snap.header[SNAP_PLAYER_HEALTH] = 80
+    snap.header[SNAP_SCORE] = 1230
+    snap.header[SNAP_GAME_ACTIVE] = 1
+    snap.header[SNAP_LEVEL] = 3
+    snap.header[SNAP_NUM_ALIENS] = count
+    snap.header[SNAP_NUM_BULLETS] = count
+
+    aliens = snap._aliens[:count]
+    aliens[:, 0] = rng.integers(0, settings.screen_width - 75, count)
+    aliens[:, 1] = rng.integers(0, settings.screen_height // 2, count)
+    aliens[:, 2] = 1
+    aliens[:, 3] = aliens[:, 0] - 2  # Where they were a tick ago
+    aliens[:, 4] = aliens[:, 1]
+    bullets = snap._bullets[:count]
+    bullets[:, 0] = rng.integers(0, settings.screen_width, count)
+    bullets[:, 1] = rng.integers(0, settings.screen_height, count)
+    bullets[:, 2] = rng.integers(0, 2, count)
+    bullets[:, 3] = 1
+    bullets[:, 4] = bullets[:, 0]
+    bullets[:, 5] = bullets[:, 1] + np.where(bullets[:, 2] != 0, 10, -5)
+    return snap
+
+
+def draw_entities_per_blit(ai):
+    """The draw path before batching: one blit() and one rect per entity."""
+    screen = ai.screen
+    alien_image = ai.sprites.get('alien')
+    bullet_image = ai.sprites.get('bullet')
+    alien_bullet_image = ai.sprites.get('alien_bullet')
+    rects = []
+    for x, y, active, _, _ in ai.snapshot.aliens.tolist():
+        if active:
+            rects.append(screen.blit(alien_image, (x, y)))
+    for x, y, is_player, active, _, _ in ai.snapshot.bullets.tolist():
+        if active:
+            rects.append(screen.blit(bullet_image if is_player else alien_bullet_image, (x, y)))
+    return rects
+
+
+def bench_render(ai, count, rng):
+    """update_screen as a whole and each of its draw helpers."""
+    ai.snapshot = synthetic_snapshot(count, ai.settings, rng)
+    ai.stats.game_active = True
+    ai.stats.game_over = False
+    ai.stats.score = ai.snapshot.score
+    ai.stats.level = ai.snapshot.level
+    ai.ship.rect.x = ai.snapshot.player_x
+    ai.ship.rect.y = ai.snapshot.player_y
+    ai.alpha = 0.5  # Frames usually land between two ticks
+    repeat = repeat_for(count, 200, 60)
+
+    results = {}
+    results['render.update_screen'] = percentiles(time_calls(ai.update_screen, repeat))
+
+    # The dirty path as shipped, which falls back to full frames past the
+    # renderer's thresholds, and with the thresholds lifted so every frame
+    # is tracked rect by rect
+    renderer = ai.renderer
+    limits = renderer.max_rects, renderer.max_area
+    ai.settings.dirty_rect_rendering = True
+    for name, forced in (('render.update_screen_dirty', False),
+                         ('render.update_screen_dirty_forced', True)):
+        if forced:
+            renderer.max_rects = renderer.max_area = float('inf')
+        renderer.invalidate()
+        fallbacks = renderer.fallbacks
+        results[name] = percentiles(time_calls(ai.update_screen, repeat))
+        results[name]['fallback_frames'] = renderer.fallbacks - fallbacks
+    renderer.max_rects, renderer.max_area = limits
+    ai.settings.dirty_rect_rendering = False
+
+    # Per-frame cost of drawing the aliens and bullets alone
+    results['render.draw_entities'] = percentiles(time_calls(ai._draw_entities, repeat))
+    results['render.draw_entities_dirty'] = percentiles(
+        time_calls(lambda: ai._draw_entities(True), repeat))
+    results['render.draw_entities_per_blit'] = percentiles(
+        time_calls(lambda: draw_entities_per_blit(ai), repeat))
+    ai.alpha = 1.0
+    results['render.draw_entities_snapped'] = percentiles(time_calls(ai._draw_entities, repeat))
+    ai.alpha = 0.5
+
+    results['render.ship_blitme'] = percentiles(time_calls(ai.ship.blitme, repeat))
+    results['render.draw_score'] = percentiles(time_calls(ai._draw_score, repeat))
+    results['render.draw_health_bar'] = percentiles(time_calls(ai._draw_health_bar, repeat))
+
+    for key in results:
+        results[key]['entities'] = {'aliens': count, 'bullets': count}
+    return results
+
+
+def bench_star_field(screen, settings, count):
+    """StarField.update and both draw paths with count stars."""
+    from star_field import StarField
+    star_settings = _copy_settings(settings, star_count=count)
+    repeat = repeat_for(count, 1000, 300)
+
+    field = StarField(screen, star_settings, seed=SEED)
+    results = {
+        'stars.update': percentiles(time_calls(field.update, repeat)),
+        'stars.draw': percentiles(time_calls(field.draw, repeat)),
+    }
+    results['stars.draw_stamps'] = percentiles(time_calls(lambda: field.draw(stamps=True), repeat))
+
+    for key in results:
+        results[key]['entities'] = {'stars': count}
+    return results
+
+
+def _copy_settings(settings, **overrides):
+    copy = type(settings).__new__(type(settings))
+    copy.__dict__.update(settings.__dict__)
+    copy.__dict__.update(overrides)
+    return copy
+
+
+def run(scales):
+    """Run every benchmark at every scale; returns the results document."""
+    benchmarks = {}
+    for count in scales:
+        for name, result in bench_engine(count).items():
+            benchmarks[f'{name}@{count}'] = result
+
+    # The game owns its own engine instance, so it is created after the
+    # engine benchmarks are done with theirs. It records nothing, stays
+    # private and keeps its leaderboard and bundle in a scratch directory
+    from alien_invasion import AlienInvasion
+    from settings import Settings
+    with tempfile.TemporaryDirectory() as scratch:
+        settings = Settings()
+        settings.record_sessions = False
+        settings.spectator_name = None
+        settings.high_score_file = os.path.join(scratch, 'high_scores.jsonl')
+        settings.asset_bundle = os.path.join(scratch, 'assets.bundle')
+        ai = AlienInvasion(settings=settings)
+        rng = np.random.default_rng(SEED)
+        try:
+            for count in scales:
+                for name, result in bench_render(ai, count, rng).items():
+                    benchmarks[f'{name}@{count}'] = result
+                for name, result in bench_star_field(ai.screen, ai.settings, count).items():
+                    benchmarks[f'{name}@{count}'] = result
+        finally:
+            ai.cleanup()
+
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+            'scales': list(scales),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'benchmarks': benchmarks,
+    }
+
+
+def merge_runs(documents):
+    """Combine repeated runs, keeping each benchmark's run with the median p50."""
+    merged = dict(documents[0], benchmarks={})
+    for name in documents[0]['benchmarks']:
+        runs = sorted((document['benchmarks'][name] for document in documents),
+                      key=lambda result: result['p50_us'])
+        merged['benchmarks'][name] = dict(runs[len(runs) // 2], runs=len(runs))
+    merged['meta'] = dict(documents[0]['meta'], runs=len(documents))
+    return merged
+
+
+def compare(results, baseline, min_delta_us):
+    """Print each median against the baseline; returns the overall change.
+
+    A single case can move 25% between runs on a busy machine, so the
+    per-case deltas are for information only. The overall change is the
+    geometric mean of the median ratios over every case whose baseline
+    median is at least min_delta_us, which noise in single cases mostly
+    cancels out of. None if no case qualifies.
+    """
+    ratios = []
+    print(f"{'benchmark':44} {'p50 us':>10} {'baseline':>10} {'change':>8}")
+    for name, current in results['benchmarks'].items():
+        base = baseline.get('benchmarks', {}).get(name)
+        if base is None:
+            print(f"{name:44} {current['p50_us']:10.1f} {'-':>10} {'new':>8}")
+            continue
+        base_p50 = max(base['p50_us'], 1.0)
+        change = (current['p50_us'] - base_p50) / base_p50
+        if base_p50 >= min_delta_us:
+            ratios.append(current['p50_us'] / base_p50)
+        print(f"{name:44} {current['p50_us']:10.1f} {base['p50_us']:10.1f} {change:+8.0%}")
+    if not ratios:
+        return None
+    overall = float(np.exp(np.mean(np.log(ratios)))) - 1.0
+    print(f"{'overall (geometric mean of ' + str(len(ratios)) + ' cases)':44} {'':>10} {'':>10} {overall:+8.1%}")
+    return overall
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=list(DEFAULT_SCALES),
+                        help='entity counts to run each benchmark at')
+    parser.add_argument('--output', default=RESULTS_FILE, help='where to write the results JSON')
+    parser.add_argument('--baseline', default=BASELINE_FILE, help='baseline JSON to compare against')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='write the results as the new baseline instead of comparing')
+    parser.add_argument('--runs', type=int, default=1,
+                        help='run the suite this many times and keep each median across runs')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='allowed overall slowdown before the run counts as a regression')
+    parser.add_argument('--min-delta-us', type=float, default=10.0,
+                        help='leave cases faster than this many microseconds out of the overall change')
+    args = parser.parse_args(argv)
+
+    results = merge_runs([run(args.scales) for _ in range(max(1, args.runs))])
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote {len(results['benchmarks'])} results to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    overall = compare(results, baseline, args.min_delta_us)
+    if overall is not None and overall > args.threshold:
+        print(f"Overall {overall:.1%} slower than the baseline (allowed {args.threshold:.0%})")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
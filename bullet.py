@@ -12,10 +12,8 @@ class Bullet(Sprite):
         self.color = self.settings.bullet_color
         self.bullet_id = None  # Will be set when bullet is fired
 
-        # Create a bullet surface
-        self.image = pygame.Surface((self.settings.bullet_width, self.settings.bullet_height))
-        self.image.fill(self.color)
-        
+        # Use the shared bullet surface
+        self.image = ai_game.sprites.get('bullet')
         self.rect = self.image.get_rect()
         self.rect.midtop = ai_game.ship.rect.midtop
 
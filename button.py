@@ -1,55 +1,69 @@
 import pygame.font
 
+from ui_layer import UILayer
+
 class Button:
     """A class to create buttons in the game."""
-    
+
+    BORDER_WIDTH = 3
+
     def __init__(self, ai_game, msg):
         """Initialize button attributes."""
         self.screen = ai_game.screen
         self.screen_rect = self.screen.get_rect()
         self.settings = ai_game.settings
-        
+
         # Set the dimensions and properties of the button
         self.width, self.height = 300, 60  # Increased size for better visibility
         self.button_color = (0, 0, 0, 180)  # More opaque black
+        self.hover_color = (*ai_game.settings.ui_highlight_color[:3], 70)
         self.text_color = ai_game.settings.ui_color
         self.highlight_color = ai_game.settings.ui_highlight_color
-        self.font = pygame.font.SysFont(ai_game.settings.ui_font, 48)
-        
+        self.text_cache = ai_game.text_cache
+        self.font = self.text_cache.fonts.get(ai_game.settings.ui_font, 48)
+
         # Build the button's rect object and center it
         self.rect = pygame.Rect(0, 0, self.width, self.height)
         self.rect.center = self.screen_rect.center
-        
+
         # Store the message
         self.msg = msg
-        
+
+        # The whole button, border included, is composed once per hover state
+        border = self.BORDER_WIDTH - 1
+        self.layer = UILayer((self.width + 2 * border, self.height + 2 * border), self._compose)
+
         # The button message needs to be prepped only once
         self._prep_msg()
-        
+
     def _prep_msg(self):
         """Turn msg into a rendered image and center text on the button."""
-        self.msg_image = self.font.render(self.msg, True, self.text_color)
+        self.msg_image = self.text_cache.render(self.font, self.msg, self.text_color)
         self.msg_image_rect = self.msg_image.get_rect()
         self.msg_image_rect.center = self.rect.center
-        
-    def draw_button(self):
-        """Draw blank button and then draw message."""
-        # Create a semi-transparent surface for the button
-        button_surface = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
-        button_surface.fill(self.button_color)
-        
-        # Draw the button surface
-        self.screen.blit(button_surface, self.rect)
-        
+
+    def _compose(self, surface, key):
+        """Draw the button into its layer surface."""
+        _, hovered = key
+        border = self.BORDER_WIDTH - 1
+        body = pygame.Rect(border, border, self.width, self.height)
+        surface.fill(self.hover_color if hovered else self.button_color, body)
+
         # Draw a gradient-like effect around the border
-        border_width = 3
-        for i in range(border_width):
-            alpha = int(255 * (1 - i/border_width))
-            color = (*self.highlight_color[:3], alpha)
-            pygame.draw.rect(self.screen, color, 
-                           (self.rect.x - i, self.rect.y - i, 
-                            self.rect.width + 2*i, self.rect.height + 2*i), 
-                           1)
-        
+        for i in range(self.BORDER_WIDTH):
+            pygame.draw.rect(surface, self.highlight_color[:3], body.inflate(2 * i, 2 * i), 1)
+
         # Draw the text
-        self.screen.blit(self.msg_image, self.msg_image_rect)
+        surface.blit(self.msg_image, self.msg_image.get_rect(center=body.center))
+
+    def hovered(self):
+        return self.rect.collidepoint(pygame.mouse.get_pos())
+
+    def draw_button(self, surface=None, hovered=None):
+        """Blit the cached button onto surface (the screen by default) and return its rect."""
+        if hovered is None:
+            hovered = self.hovered()
+        border = self.BORDER_WIDTH - 1
+        target = self.screen if surface is None else surface
+        return self.layer.draw(target, (self.rect.x - border, self.rect.y - border),
+                               (self.msg, hovered))
@@ -0,0 +1,83 @@
+import pygame
+
+class DirtyRectRenderer:
+    """Redraw and present only the screen regions that changed.
+
+    Every rect drawn in a frame is remembered. At the start of the next
+    frame only those regions are restored from the background, and
+    presenting updates the union of last frame's and this frame's rects
+    instead of flipping the whole display. Any scene change (or an
+    explicit invalidate()) falls back to one full redraw and flip.
+
+    Tracking only pays off while little of the screen changes. A frame
+    expected to draw more than max_rects rects is drawn in full without
+    tracking, and a frame whose rects cover more than max_area of the
+    screen is flipped rather than updated rect by rect.
+    """
+
+    def __init__(self, screen, background, max_rects=256, max_area=0.5):
+        self.screen = screen
+        self.background = background
+        self.max_rects = max_rects
+        self.max_area = max_area * screen.get_width() * screen.get_height()
+        self.scene = None
+        self.full_redraw = True
+        self.tracking = True
+        self.fallbacks = 0  # Frames that gave up on tracking
+        self.previous_rects = []
+        self.rects = []
+
+    def invalidate(self):
+        """Force a full redraw and flip on the next frame."""
+        self.full_redraw = True
+
+    def begin_frame(self, scene, expected_rects=0):
+        """Restore the background under last frame's sprites.
+
+        Returns True when this frame's rects should be tracked, False
+        when it is drawn in full because expected_rects is too many.
+        """
+        if scene != self.scene:
+            self.scene = scene
+            self.full_redraw = True
+        if not self.tracking:
+            # Nothing was tracked last frame, so nothing can be restored
+            self.full_redraw = True
+        self.tracking = expected_rects <= self.max_rects
+        if not self.tracking:
+            self.fallbacks += 1
+
+        if self.full_redraw or not self.tracking:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            background = self.background
+            blit = self.screen.blit
+            for rect in self.previous_rects:
+                blit(background, rect, rect)
+        self.rects = []
+        return self.tracking
+
+    def add(self, rect):
+        """Track a region drawn this frame."""
+        if rect:
+            self.rects.append(rect)
+
+    def extend(self, rects):
+        """Track several regions drawn this frame."""
+        self.rects.extend(rects)
+
+    def present(self):
+        """Push this frame to the display."""
+        if self.full_redraw or not self.tracking:
+            pygame.display.flip()
+            self.full_redraw = False
+        else:
+            rects = self.previous_rects + self.rects
+            if sum(rect.w * rect.h for rect in rects) > self.max_area:
+                # Cheaper to flip, and to restore the whole background next frame
+                self.fallbacks += 1
+                pygame.display.flip()
+                self.full_redraw = True
+            else:
+                pygame.display.update(rects)
+        self.previous_rects = self.rects
@@ -0,0 +1,39 @@
+"""Reusable draw-list storage.
+
+The engine owns every alien and bullet, so the Python side never builds
+an object per entity. What it does allocate each frame is the list of
+positions handed to Surface.blits(), and that is kept from frame to
+frame here instead of being rebuilt (and left for the garbage
+collector).
+"""
+
+
+class PositionPool:
+    """Reusable [x, y] destinations for Surface.blits().
+
+    fill() copies a (count, 2) position array into lists kept from
+    earlier frames instead of building a fresh list per row with
+    tolist(), so drawing thousands of entities allocates next to
+    nothing the garbage collector tracks.
+    """
+
+    def __init__(self):
+        self.positions = []
+        self.live = 0
+
+    def fill(self, positions):
+        """Load positions and return how many were loaded."""
+        xs = positions[:, 0].tolist()
+        ys = positions[:, 1].tolist()
+        count = len(xs)
+        pool = self.positions
+        while len(pool) < count:
+            pool.append([0, 0])
+        for position, x, y in zip(pool, xs, ys):
+            position[0] = x
+            position[1] = y
+        self.live = count
+        return count
+
+    def stats(self):
+        return {'live': self.live, 'capacity': len(self.positions)}
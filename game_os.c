@@ -11,19 +11,40 @@
 #include <time.h>
 #include <math.h>
 #include <signal.h>
+#include <stdint.h>
+#include <stddef.h>
+#include "game_os.h"
 
 // Game constants
-#define MAX_ALIENS 50
+#define DEFAULT_MAX_ALIENS 1024   // Pool sizes engine_create() uses for a capacity of 0
+#define DEFAULT_MAX_BULLETS 2048
+#define MAX_POOL_CAPACITY (1 << 24)  // Handles keep the slot index in 24 bits
 #define BULLET_SPEED 10
 #define ALIEN_BULLET_SPEED 5  // Increased from 5
 #define SCREEN_WIDTH 1200
 #define SCREEN_HEIGHT 800
 #define SHIP_SPEED 5
 
+// Fixed timestep for the logic thread, changeable with set_tick_rate()
+#define DEFAULT_TICK_RATE 60
+#define MAX_TICK_RATE 1000
+#define MAX_CATCH_UP_TICKS 5  // Ticks run back to back before resyncing the clock
+
 // Shooting frequency constants
 #define ALIEN_SHOOT_CHANCE 5    // Base chance per frame (out of 100). Controls the base chance of shooting per frame (currently 5%)
 #define ALIEN_SHOOT_DIVISOR 5   // Per-alien chance (1 out of this number)
 
+// Collision constants
+#define COLLISION_RADIUS_PX 30  // Legacy point-distance hit radius
+#define GRID_CELL_SIZE 64       // Broad-phase cell size in pixels
+#define GRID_COLS ((SCREEN_WIDTH + GRID_CELL_SIZE - 1) / GRID_CELL_SIZE)
+#define GRID_ROWS ((SCREEN_HEIGHT + GRID_CELL_SIZE - 1) / GRID_CELL_SIZE)
+#define GRID_CELLS (GRID_COLS * GRID_ROWS)
+#define ALIEN_WIDTH 75
+#define ALIEN_HEIGHT 50
+#define BULLET_WIDTH 3
+#define BULLET_HEIGHT 15
+
 // File management functions
 #define HIGH_SCORE_FILE "high_scores.json"
 #define MAX_HIGH_SCORES 10
@@ -41,7 +62,10 @@ typedef struct {
     int player_moving_up;
     int player_moving_down;
     int level;  // Add level tracking
-    pthread_mutex_t mutex;
+    uint32_t tick;  // Ticks simulated since start_game()
+    int prev_player_x;  // Player position before the last tick
+    int prev_player_y;
+    pthread_mutex_t mutex;  // Serializes input producers; the tick never takes it
 } GameState;
 
 // Structure for alien
@@ -51,6 +75,10 @@ typedef struct {
     int health;
     int active;
     int direction;  // 1 for right, -1 for left
+    int prev_x;     // Position before the last tick
+    int prev_y;
+    int next_free;        // Next free slot while this one is on the free list
+    uint32_t generation;  // Bumped on every free so stale handles never match
 } Alien;
 
 // Structure for bullet
@@ -59,25 +87,114 @@ typedef struct {
     int y;
     int active;
     int is_player_bullet;
+    int prev_x;
+    int prev_y;
+    int next_free;
+    uint32_t generation;
 } Bullet;
 
-// Global game state
+// Free-list bookkeeping for one entity pool. Slots never move, so a
+// handle (slot index plus generation) stays valid while the entity lives,
+// and removing an entity is O(1) with no compaction.
 typedef struct {
+    int capacity;
+    int high_water;  // Slots [0, high_water) have been handed out at least once
+    int live;        // Active entities
+    int free_head;   // Most recently freed slot, or -1
+} EntityPool;
+
+// Global game state. The alien and bullet slot arrays follow this header
+// in the same shared memory segment, at aliens_offset and bullets_offset.
+// The segment header comes first so spectators can find the frames.
+typedef struct {
+    SegmentHeader segment;
     GameState game_state;
-    Alien aliens[MAX_ALIENS];
-    Bullet bullets[100];  // Max 100 bullets
-    int num_aliens;
-    int num_bullets;
+    EntityPool alien_pool;
+    EntityPool bullet_pool;
+    size_t aliens_offset;
+    size_t bullets_offset;
     int alien_direction;  // Fleet direction
     int fleet_drop_speed;
     float alien_speed;  // Add alien speed as a variable
+    uint64_t seed;       // Seed the PRNG is reset to by start_game()
+    uint64_t rng_state;  // Per-game PRNG, replaces libc rand()
+    pthread_mutex_t sim_mutex;  // Held by the tick and by control calls, never by readers
+
+    // Double-buffered publication. After every tick the logic thread
+    // writes a snapshot-layout frame into the back buffer and flips
+    // front_frame. frame_seq[i] is odd while frame i is being written,
+    // so readers copy the front frame without any lock and retry if the
+    // sequence changed underneath them.
+    uint32_t frame_seq[2];
+    uint32_t front_frame;
+    uint32_t publish_count;
+    int64_t tick_time_ns;  // CLOCK_MONOTONIC time the last tick was due at
+
+    // Single-producer/single-consumer input ring. Python pushes commands
+    // and advances input_tail; the tick drains them and advances
+    // input_head. Each index is written by one side only, so neither
+    // side ever waits for the other.
+    uint32_t input_head __attribute__((aligned(64)));
+    uint32_t input_tail __attribute__((aligned(64)));
+    InputCommand input_ring[INPUT_RING_SIZE];
+    int64_t input_latency_ns;  // Worst push-to-apply delay of the last drained batch
+
+    // Timings of the last active tick, only measured while profiling is on
+    int64_t tick_ns;
+    int64_t collision_ns;
+
+    // Journal of applied input and control calls, tick-stamped, so a
+    // session can be recorded and replayed exactly. The engine writes
+    // journal_tail, the recorder reads entries and advances journal_head.
+    uint32_t journal_head __attribute__((aligned(64)));
+    uint32_t journal_tail __attribute__((aligned(64)));
+    uint32_t journal_dropped;
+    JournalEntry journal[JOURNAL_SIZE];
 } GlobalGameState;
 
-// Global variables
-static GlobalGameState* game_state = NULL;
-static int shm_id;
-static pthread_t game_logic_thread;
-static int thread_running = 0;
+// Uniform grid over the play field, rebuilt from the aliens every tick
+// with a counting sort: cell_start[c]..cell_start[c + 1] indexes into
+// cell_aliens. Entities off screen are clamped into the border cells.
+typedef struct {
+    int cell_start[GRID_CELLS + 1];
+    int* cell_aliens;  // One entry per alien slot
+    int* alien_cell;
+} CollisionGrid;
+
+// One independent game. Everything a game needs lives here or in its
+// shared memory segment, so any number of engines can run side by side
+// in one process, each with its own logic thread.
+struct GameEngine {
+    GlobalGameState* state;
+    Alien* aliens;    // Slot arrays inside the shared segment
+    Bullet* bullets;
+    int* frames;      // Two published frames inside the shared segment
+    int shm_id;
+    size_t frame_ints;  // Ints per published frame
+    pthread_t logic_thread;
+    int thread_running;
+    int thread_started;
+    int64_t tick_period_ns;  // Logic thread timestep
+    int headless;    // Ticks only advance through step_game()
+    int profiling;   // Time each tick and its collision pass
+    int journaling;  // Record applied commands for session recording
+
+    CollisionGrid grid;
+
+    // Narrow phase settings. Masks hold one byte per pixel, row-major.
+    int collision_mode;
+    unsigned char* alien_mask;
+    int alien_mask_w, alien_mask_h;
+    unsigned char* bullet_mask;
+    int bullet_mask_w, bullet_mask_h;
+
+    GameEngine* next_live;  // Registry of live engines, for the signal handler
+};
+
+// Engines that still own a segment, so a fatal signal can remove them all
+static GameEngine* live_engines = NULL;
+static pthread_mutex_t live_engines_mutex = PTHREAD_MUTEX_INITIALIZER;
+static pthread_once_t signals_once = PTHREAD_ONCE_INIT;
 
 // Structure for high scores
 typedef struct {
@@ -85,71 +202,334 @@ typedef struct {
     int count;
 } HighScores;
 
-// Cleanup function declaration
-void cleanup();
+static void publish_frame(GameEngine* engine);
+static int64_t monotonic_ns(void);
 
-// Signal handler for cleanup
+// Remove every live segment when the process is terminated; SysV
+// segments would otherwise outlive it. SIGINT is left alone: Python turns
+// Ctrl+C into KeyboardInterrupt, and its cleanup destroys the engines
+// (GameOSWrapper also registers an atexit hook). The handler only
+// makes async-signal-safe calls: it cannot take live_engines_mutex, so
+// it walks the list as it stands, then re-raises the signal with the
+// default action so the process still dies with the right status.
 static void signal_handler(int signum) {
-    cleanup();
-    exit(0);
+    for (GameEngine* engine = live_engines; engine != NULL; engine = engine->next_live) {
+        shmctl(engine->shm_id, IPC_RMID, NULL);
+    }
+    signal(signum, SIG_DFL);
+    raise(signum);
 }
 
-// Initialize shared memory and game state
-int init_game_state() {
-    // Set up signal handlers
-    signal(SIGINT, signal_handler);   // Ctrl+C
-    signal(SIGTERM, signal_handler);  // Termination signal
-    signal(SIGSEGV, signal_handler);  // Segmentation fault
-    
-    // First try to clean up any existing shared memory
-    if (game_state != NULL) {
-        pthread_mutex_destroy(&game_state->game_state.mutex);
-        shmdt(game_state);
-        shmctl(shm_id, IPC_RMID, NULL);
-        game_state = NULL;
+static void install_signal_handlers() {
+    signal(SIGTERM, signal_handler);
+}
+
+static void register_engine(GameEngine* engine) {
+    pthread_mutex_lock(&live_engines_mutex);
+    engine->next_live = live_engines;
+    live_engines = engine;
+    pthread_mutex_unlock(&live_engines_mutex);
+}
+
+static void unregister_engine(GameEngine* engine) {
+    pthread_mutex_lock(&live_engines_mutex);
+    for (GameEngine** link = &live_engines; *link != NULL; link = &(*link)->next_live) {
+        if (*link == engine) {
+            *link = engine->next_live;
+            break;
+        }
+    }
+    pthread_mutex_unlock(&live_engines_mutex);
+}
+
+// Release the shared memory segment and pool-sized buffers
+static void release_game_state(GameEngine* engine) {
+    if (engine->state != NULL) {
+        unregister_engine(engine);
+        // Attached spectators keep the memory until they detach
+        __atomic_store_n(&engine->state->segment.closed, 1, __ATOMIC_RELEASE);
+        pthread_mutex_destroy(&engine->state->game_state.mutex);
+        pthread_mutex_destroy(&engine->state->sim_mutex);
+        shmdt(engine->state);
+        shmctl(engine->shm_id, IPC_RMID, NULL);
+        engine->state = NULL;
+        engine->aliens = NULL;
+        engine->bullets = NULL;
+        engine->frames = NULL;
+    }
+    free(engine->grid.cell_aliens);
+    free(engine->grid.alien_cell);
+    engine->grid.cell_aliens = NULL;
+    engine->grid.alien_cell = NULL;
+}
+
+static void reset_pool(EntityPool* pool) {
+    pool->high_water = 0;
+    pool->live = 0;
+    pool->free_head = -1;
+}
+
+// SysV key for a named segment: SEGMENT_KEY_PREFIX in the top byte and
+// the low 24 bits of the name's 32-bit FNV-1a hash below it
+static key_t segment_key(const char* name) {
+    uint32_t hash = 0x811C9DC5u;
+    for (const unsigned char* c = (const unsigned char*)name; *c; c++) {
+        hash ^= *c;
+        hash *= 0x01000193u;
+    }
+    return (key_t)(SEGMENT_KEY_PREFIX | (hash & 0x00FFFFFFu));
+}
+
+// Create the segment for a name, replacing one left behind by a process
+// that died without cleaning up. Returns the id, or -1.
+static int create_named_segment(const char* name, size_t size) {
+    key_t key = segment_key(name);
+    for (int attempt = 0; attempt < 2; attempt++) {
+        // Owner-only: spectators run as the same user as the game
+        int id = shmget(key, size, IPC_CREAT | IPC_EXCL | 0600);
+        if (id != -1 || errno != EEXIST) return id;
+
+        int existing = shmget(key, 0, 0);
+        if (existing == -1) continue;
+        SegmentHeader* header = shmat(existing, NULL, SHM_RDONLY);
+        if (header == (void*)-1) return -1;
+        int stale = header->magic == SEGMENT_MAGIC &&
+                    (header->closed || (kill(header->owner_pid, 0) == -1 && errno == ESRCH));
+        shmdt(header);
+        if (!stale) {
+            fprintf(stderr, "engine_create_named: segment '%s' is in use\n", name);
+            errno = EEXIST;
+            return -1;
+        }
+        shmctl(existing, IPC_RMID, NULL);
     }
+    return -1;
+}
+
+// Create an engine with its own shared memory segment, with pools sized
+// for max_aliens aliens and max_bullets bullets (0 for the default).
+// Returns NULL on failure.
+GameEngine* engine_create(int max_aliens, int max_bullets) {
+    return engine_create_named(max_aliens, max_bullets, NULL);
+}
+
+// Like engine_create(), but when name is not NULL the segment gets a key
+// derived from it, so spectator processes can find it and attach
+// read-only. Fails if a live engine already uses the name.
+GameEngine* engine_create_named(int max_aliens, int max_bullets, const char* name) {
+    pthread_once(&signals_once, install_signal_handlers);
+
+    if (max_aliens == 0) max_aliens = DEFAULT_MAX_ALIENS;
+    if (max_bullets == 0) max_bullets = DEFAULT_MAX_BULLETS;
+    if (max_aliens < 0 || max_bullets < 0 ||
+        max_aliens > MAX_POOL_CAPACITY || max_bullets > MAX_POOL_CAPACITY) {
+        fprintf(stderr, "engine_create: invalid pool capacity\n");
+        return NULL;
+    }
+    if (name != NULL && strlen(name) >= SEGMENT_NAME_MAX) {
+        fprintf(stderr, "engine_create_named: name too long\n");
+        return NULL;
+    }
+
+    GameEngine* engine = calloc(1, sizeof(GameEngine));
+    if (engine == NULL) {
+        perror("calloc");
+        return NULL;
+    }
+    engine->collision_mode = COLLISION_MODE_RADIUS;
+    engine->alien_mask_w = ALIEN_WIDTH;
+    engine->alien_mask_h = ALIEN_HEIGHT;
+    engine->bullet_mask_w = BULLET_WIDTH;
+    engine->bullet_mask_h = BULLET_HEIGHT;
+
+    // Lay out the header followed by both slot arrays
+    size_t aliens_offset = (sizeof(GlobalGameState) + 15) & ~(size_t)15;
+    size_t bullets_offset = (aliens_offset + sizeof(Alien) * max_aliens + 15) & ~(size_t)15;
+    size_t frames_offset = (bullets_offset + sizeof(Bullet) * max_bullets + 15) & ~(size_t)15;
+    size_t frame_ints = SNAPSHOT_HEADER_SIZE + (size_t)max_aliens * ALIEN_STRIDE +
+                        (size_t)max_bullets * BULLET_STRIDE;
+    size_t total_size = frames_offset + 2 * frame_ints * sizeof(int);
 
     // Create shared memory segment
-    shm_id = shmget(IPC_PRIVATE, sizeof(GlobalGameState), IPC_CREAT | 0666);
-    if (shm_id == -1) {
-        perror("shmget");
-        return -1;
+    if (name != NULL) {
+        engine->shm_id = create_named_segment(name, total_size);
+    } else {
+        engine->shm_id = shmget(IPC_PRIVATE, total_size, IPC_CREAT | 0600);
+    }
+    if (engine->shm_id == -1) {
+        if (errno != EEXIST) perror("shmget");  // In use was reported above
+        free(engine);
+        return NULL;
     }
 
     // Attach shared memory
-    game_state = (GlobalGameState*)shmat(shm_id, NULL, 0);
-    if (game_state == (void*)-1) {
+    GlobalGameState* state = (GlobalGameState*)shmat(engine->shm_id, NULL, 0);
+    if (state == (void*)-1) {
         perror("shmat");
-        shmctl(shm_id, IPC_RMID, NULL);
-        return -1;
+        shmctl(engine->shm_id, IPC_RMID, NULL);
+        free(engine);
+        return NULL;
     }
 
+    // Clear the segment before the mutex is set up in it
+    memset(state, 0, total_size);
+
     // Initialize mutex
     pthread_mutexattr_t attr;
     pthread_mutexattr_init(&attr);
     pthread_mutexattr_setpshared(&attr, PTHREAD_PROCESS_SHARED);
-    if (pthread_mutex_init(&game_state->game_state.mutex, &attr) != 0) {
+    if (pthread_mutex_init(&state->game_state.mutex, &attr) != 0 ||
+        pthread_mutex_init(&state->sim_mutex, &attr) != 0) {
         perror("pthread_mutex_init");
-        shmdt(game_state);
-        shmctl(shm_id, IPC_RMID, NULL);
-        game_state = NULL;
-        return -1;
+        shmdt(state);
+        shmctl(engine->shm_id, IPC_RMID, NULL);
+        free(engine);
+        return NULL;
+    }
+    engine->state = state;
+    register_engine(engine);
+
+    // Initialize entity pools
+    state->aliens_offset = aliens_offset;
+    state->bullets_offset = bullets_offset;
+    engine->aliens = (Alien*)((char*)state + aliens_offset);
+    engine->bullets = (Bullet*)((char*)state + bullets_offset);
+    engine->frame_ints = frame_ints;
+    engine->frames = (int*)((char*)state + frames_offset);
+    state->alien_pool.capacity = max_aliens;
+    state->bullet_pool.capacity = max_bullets;
+    reset_pool(&state->alien_pool);
+    reset_pool(&state->bullet_pool);
+
+    engine->grid.cell_aliens = malloc(sizeof(int) * max_aliens);
+    engine->grid.alien_cell = malloc(sizeof(int) * max_aliens);
+    if (engine->grid.cell_aliens == NULL || engine->grid.alien_cell == NULL) {
+        perror("malloc");
+        release_game_state(engine);
+        free(engine);
+        return NULL;
     }
 
     // Initialize game state
-    memset(game_state, 0, sizeof(GlobalGameState));
-    game_state->game_state.player_x = SCREEN_WIDTH / 2;
-    game_state->game_state.player_y = SCREEN_HEIGHT - 50;
-    game_state->game_state.player_health = 100;
-    game_state->game_state.score = 0;
-    game_state->game_state.game_active = 0;
-    game_state->game_state.game_over = 0;
-    game_state->game_state.level = 1;  // Initialize level
-    game_state->alien_direction = 1;
-    game_state->fleet_drop_speed = 10;
-    game_state->alien_speed = 2.0;  // Initialize alien speed
+    state->game_state.player_x = SCREEN_WIDTH / 2;
+    state->game_state.player_y = SCREEN_HEIGHT - 50;
+    state->game_state.player_health = 100;
+    state->game_state.score = 0;
+    state->game_state.game_active = 0;
+    state->game_state.game_over = 0;
+    state->game_state.level = 1;  // Initialize level
+    state->game_state.prev_player_x = state->game_state.player_x;
+    state->game_state.prev_player_y = state->game_state.player_y;
+    state->tick_time_ns = monotonic_ns();
+    engine->tick_period_ns = 1000000000LL / DEFAULT_TICK_RATE;
+    state->alien_direction = 1;
+    state->fleet_drop_speed = 10;
+    state->alien_speed = 2.0;  // Initialize alien speed
+    // Engines created in the same second still get different seeds
+    state->seed = (uint64_t)time(NULL) ^ ((uint64_t)getpid() << 32) ^ (uint64_t)(uintptr_t)engine;
+    state->rng_state = state->seed;
+    publish_frame(engine);
 
-    return 0;
+    // Fill in the segment header last; spectators check the magic first
+    SegmentHeader* segment = &state->segment;
+    segment->version = SEGMENT_VERSION;
+    segment->header_size = sizeof(SegmentHeader);
+    segment->owner_pid = (int32_t)getpid();
+    segment->tick_rate = DEFAULT_TICK_RATE;
+    segment->segment_size = total_size;
+    segment->frames_offset = frames_offset;
+    segment->frame_ints = frame_ints;
+    segment->frame_seq_offset = offsetof(GlobalGameState, frame_seq);
+    segment->front_frame_offset = offsetof(GlobalGameState, front_frame);
+    segment->max_aliens = max_aliens;
+    segment->max_bullets = max_bullets;
+    if (name != NULL) {
+        strncpy(segment->name, name, SEGMENT_NAME_MAX - 1);
+    }
+    __atomic_store_n(&segment->magic, SEGMENT_MAGIC, __ATOMIC_RELEASE);
+
+    return engine;
+}
+
+// Take a slot from the alien pool, or return -1 if it is full
+static int alloc_alien(GameEngine* engine) {
+    EntityPool* pool = &engine->state->alien_pool;
+    int i;
+    if (pool->free_head >= 0) {
+        i = pool->free_head;
+        pool->free_head = engine->aliens[i].next_free;
+    } else if (pool->high_water < pool->capacity) {
+        i = pool->high_water++;
+    } else {
+        return -1;
+    }
+    engine->aliens[i].active = 1;
+    engine->aliens[i].next_free = -1;
+    pool->live++;
+    return i;
+}
+
+static void free_alien(GameEngine* engine, int i) {
+    EntityPool* pool = &engine->state->alien_pool;
+    engine->aliens[i].active = 0;
+    engine->aliens[i].generation++;
+    engine->aliens[i].next_free = pool->free_head;
+    pool->free_head = i;
+    pool->live--;
+}
+
+// Take a slot from the bullet pool, or return -1 if it is full
+static int alloc_bullet(GameEngine* engine) {
+    EntityPool* pool = &engine->state->bullet_pool;
+    int i;
+    if (pool->free_head >= 0) {
+        i = pool->free_head;
+        pool->free_head = engine->bullets[i].next_free;
+    } else if (pool->high_water < pool->capacity) {
+        i = pool->high_water++;
+    } else {
+        return -1;
+    }
+    engine->bullets[i].active = 1;
+    engine->bullets[i].next_free = -1;
+    pool->live++;
+    return i;
+}
+
+static void free_bullet(GameEngine* engine, int i) {
+    EntityPool* pool = &engine->state->bullet_pool;
+    engine->bullets[i].active = 0;
+    engine->bullets[i].generation++;
+    engine->bullets[i].next_free = pool->free_head;
+    pool->free_head = i;
+    pool->live--;
+}
+
+// Stable handle for a slot: generation in the top bits, index below
+static int entity_handle(int index, uint32_t generation) {
+    return (int)(((generation & 0x7F) << 24) | (uint32_t)index);
+}
+
+// Spawn a fleet of rows x cols aliens, as many as the pool can hold
+static void spawn_fleet(GameEngine* engine, int rows, int cols) {
+    reset_pool(&engine->state->alien_pool);
+    for (int y = 0; y < rows; y++) {
+        for (int x = 0; x < cols; x++) {
+            int i = alloc_alien(engine);
+            if (i < 0) return;
+            engine->aliens[i].x = engine->aliens[i].prev_x = 100 + x * 80;
+            engine->aliens[i].y = engine->aliens[i].prev_y = 50 + y * 60;
+            engine->aliens[i].health = 100;
+        }
+    }
+}
+
+// splitmix64: small, fast and identical on every platform
+static uint32_t next_random(GameEngine* engine) {
+    uint64_t z = (engine->state->rng_state += 0x9E3779B97F4A7C15ULL);
+    z = (z ^ (z >> 30)) * 0xBF58476D1CE4E5B9ULL;
+    z = (z ^ (z >> 27)) * 0x94D049BB133111EBULL;
+    return (uint32_t)((z ^ (z >> 31)) >> 32);
 }
 
 // Collision detection functions
@@ -159,257 +539,925 @@ static int check_collision(int x1, int y1, int x2, int y2, int radius) {
     return (dx * dx + dy * dy) <= (radius * radius);
 }
 
-static void handle_collisions() {
-    // Check player bullet-alien collisions
-    for (int i = 0; i < game_state->num_bullets; i++) {
-        if (!game_state->bullets[i].active) continue;
+// Pixel-precise test of a bullet against an alien, both anchored at
+// their top-left corner. Missing masks count as solid rectangles.
+static int check_mask_collision(GameEngine* engine, int bx, int by, int ax, int ay) {
+    int left = bx > ax ? bx : ax;
+    int top = by > ay ? by : ay;
+    int right = (bx + engine->bullet_mask_w < ax + engine->alien_mask_w) ? bx + engine->bullet_mask_w : ax + engine->alien_mask_w;
+    int bottom = (by + engine->bullet_mask_h < ay + engine->alien_mask_h) ? by + engine->bullet_mask_h : ay + engine->alien_mask_h;
+    if (left >= right || top >= bottom) return 0;
+    if (engine->alien_mask == NULL && engine->bullet_mask == NULL) return 1;
+
+    for (int y = top; y < bottom; y++) {
+        for (int x = left; x < right; x++) {
+            int bullet_hit = engine->bullet_mask == NULL || engine->bullet_mask[(y - by) * engine->bullet_mask_w + (x - bx)];
+            int alien_hit = engine->alien_mask == NULL || engine->alien_mask[(y - ay) * engine->alien_mask_w + (x - ax)];
+            if (bullet_hit && alien_hit) return 1;
+        }
+    }
+    return 0;
+}
+
+static int grid_col(int x) {
+    int col = x / GRID_CELL_SIZE;
+    if (x < 0 || col < 0) return 0;
+    return col >= GRID_COLS ? GRID_COLS - 1 : col;
+}
+
+static int grid_row(int y) {
+    int row = y / GRID_CELL_SIZE;
+    if (y < 0 || row < 0) return 0;
+    return row >= GRID_ROWS ? GRID_ROWS - 1 : row;
+}
+
+// Bucket every active alien into its grid cell
+static void build_collision_grid(GameEngine* engine) {
+    CollisionGrid* grid = &engine->grid;
+    memset(grid->cell_start, 0, sizeof(grid->cell_start));
 
-        if (game_state->bullets[i].is_player_bullet) {
+    for (int j = 0; j < engine->state->alien_pool.high_water; j++) {
+        if (!engine->aliens[j].active) {
+            grid->alien_cell[j] = -1;
+            continue;
+        }
+        int cell = grid_row(engine->aliens[j].y) * GRID_COLS + grid_col(engine->aliens[j].x);
+        grid->alien_cell[j] = cell;
+        grid->cell_start[cell + 1]++;
+    }
+    for (int c = 0; c < GRID_CELLS; c++) {
+        grid->cell_start[c + 1] += grid->cell_start[c];
+    }
+
+    int fill[GRID_CELLS];
+    memcpy(fill, grid->cell_start, sizeof(fill));
+    for (int j = 0; j < engine->state->alien_pool.high_water; j++) {
+        if (grid->alien_cell[j] >= 0) {
+            grid->cell_aliens[fill[grid->alien_cell[j]]++] = j;
+        }
+    }
+}
+
+// Narrow phase: does a bullet at (bx, by) hit alien j?
+static int bullet_hits_alien(GameEngine* engine, int bx, int by, int j) {
+    if (engine->collision_mode == COLLISION_MODE_MASK) {
+        return check_mask_collision(engine, bx, by, engine->aliens[j].x, engine->aliens[j].y);
+    }
+    return check_collision(bx, by, engine->aliens[j].x, engine->aliens[j].y, COLLISION_RADIUS_PX);
+}
+
+// Find the lowest-index active alien hit by a bullet, or -1. Only the
+// cells an alien anchor could occupy while overlapping the bullet are
+// visited; taking the lowest index keeps results identical to a full scan.
+static int find_alien_hit(GameEngine* engine, int bx, int by) {
+    int min_x, max_x, min_y, max_y;
+    if (engine->collision_mode == COLLISION_MODE_MASK) {
+        min_x = bx - engine->alien_mask_w + 1;
+        max_x = bx + engine->bullet_mask_w - 1;
+        min_y = by - engine->alien_mask_h + 1;
+        max_y = by + engine->bullet_mask_h - 1;
+    } else {
+        min_x = bx - COLLISION_RADIUS_PX;
+        max_x = bx + COLLISION_RADIUS_PX;
+        min_y = by - COLLISION_RADIUS_PX;
+        max_y = by + COLLISION_RADIUS_PX;
+    }
+
+    CollisionGrid* grid = &engine->grid;
+    int hit = -1;
+    for (int row = grid_row(min_y); row <= grid_row(max_y); row++) {
+        for (int col = grid_col(min_x); col <= grid_col(max_x); col++) {
+            int cell = row * GRID_COLS + col;
+            for (int k = grid->cell_start[cell]; k < grid->cell_start[cell + 1]; k++) {
+                int j = grid->cell_aliens[k];
+                if ((hit >= 0 && j > hit) || !engine->aliens[j].active) continue;
+                if (bullet_hits_alien(engine, bx, by, j)) hit = j;
+            }
+        }
+    }
+    return hit;
+}
+
+// The same query without the grid: test every alien in index order
+static int scan_alien_hit(GameEngine* engine, int bx, int by) {
+    for (int j = 0; j < engine->state->alien_pool.high_water; j++) {
+        if (engine->aliens[j].active && bullet_hits_alien(engine, bx, by, j)) return j;
+    }
+    return -1;
+}
+
+static void handle_collisions(GameEngine* engine) {
+    build_collision_grid(engine);
+
+    for (int i = 0; i < engine->state->bullet_pool.high_water; i++) {
+        if (!engine->bullets[i].active) continue;
+
+        if (engine->bullets[i].is_player_bullet) {
             // Check player bullet-alien collisions
-            for (int j = 0; j < game_state->num_aliens; j++) {
-                if (!game_state->aliens[j].active) continue;
-
-                if (check_collision(game_state->bullets[i].x, game_state->bullets[i].y,
-                                  game_state->aliens[j].x, game_state->aliens[j].y, 30)) {
-                    game_state->bullets[i].active = 0;
-                    game_state->aliens[j].active = 0;
-                    game_state->game_state.score += 10;
-                    break;
-                }
+            int j = find_alien_hit(engine, engine->bullets[i].x, engine->bullets[i].y);
+            if (j >= 0) {
+                free_bullet(engine, i);
+                free_alien(engine, j);
+                engine->state->game_state.score += 10;
             }
         } else {
             // Check alien bullet-player collisions
-            if (check_collision(game_state->bullets[i].x, game_state->bullets[i].y,
-                              game_state->game_state.player_x, game_state->game_state.player_y, 30)) {
-                game_state->bullets[i].active = 0;
-                game_state->game_state.player_health -= 10;
+            if (check_collision(engine->bullets[i].x, engine->bullets[i].y,
+                              engine->state->game_state.player_x, engine->state->game_state.player_y,
+                              COLLISION_RADIUS_PX)) {
+                free_bullet(engine, i);
+                engine->state->game_state.player_health -= 10;
                 
-                if (game_state->game_state.player_health <= 0) {
-                    game_state->game_state.game_active = 0;
-                    game_state->game_state.game_over = 1;
+                if (engine->state->game_state.player_health <= 0) {
+                    engine->state->game_state.game_active = 0;
+                    engine->state->game_state.game_over = 1;
                 }
             }
         }
     }
 }
 
-// Game logic thread function
-void* game_logic_loop(void* arg) {
-    while (thread_running) {
-        pthread_mutex_lock(&game_state->game_state.mutex);
-        
-        if (game_state->game_state.game_active) {
-            // Update player position based on movement flags
-            if (game_state->game_state.player_moving_left && 
-                game_state->game_state.player_x > 0) {
-                game_state->game_state.player_x -= SHIP_SPEED;
-            }
-            if (game_state->game_state.player_moving_right && 
-                game_state->game_state.player_x < SCREEN_WIDTH - 50) {
-                game_state->game_state.player_x += SHIP_SPEED;
-            }
-            if (game_state->game_state.player_moving_up && 
-                game_state->game_state.player_y > 0) {
-                game_state->game_state.player_y -= SHIP_SPEED;
-            }
-            if (game_state->game_state.player_moving_down && 
-                game_state->game_state.player_y < SCREEN_HEIGHT - 50) {
-                game_state->game_state.player_y += SHIP_SPEED;
-            }
+// Add a bullet to the pool. Caller holds the mutex. Returns the
+// bullet's handle, or -1 if the pool is full.
+static int spawn_bullet(GameEngine* engine, int x, int y, int is_player_bullet) {
+    int i = alloc_bullet(engine);
+    if (i < 0) return -1;
+    engine->bullets[i].x = engine->bullets[i].prev_x = x;
+    engine->bullets[i].y = engine->bullets[i].prev_y = y;
+    engine->bullets[i].is_player_bullet = is_player_bullet;
+    return entity_handle(i, engine->bullets[i].generation);
+}
 
-            // Update alien positions
-            for (int i = 0; i < game_state->num_aliens; i++) {
-                if (game_state->aliens[i].active) {
-                    game_state->aliens[i].x += game_state->alien_speed * game_state->alien_direction;
-                    
-                    // Check fleet edges
-                    if (game_state->aliens[i].x <= 0 || 
-                        game_state->aliens[i].x >= SCREEN_WIDTH - 30) {
-                        game_state->alien_direction *= -1;
-                        for (int j = 0; j < game_state->num_aliens; j++) {
-                            if (game_state->aliens[j].active) {
-                                game_state->aliens[j].y += game_state->fleet_drop_speed;
-                            }
-                        }
-                        break;
-                    }
+// Add a player bullet at the ship's position. Caller holds the mutex.
+static int spawn_player_bullet(GameEngine* engine) {
+    return spawn_bullet(engine, engine->state->game_state.player_x, engine->state->game_state.player_y, 1);
+}
+
+static int64_t monotonic_ns(void) {
+    struct timespec now;
+    clock_gettime(CLOCK_MONOTONIC, &now);
+    return (int64_t)now.tv_sec * 1000000000LL + now.tv_nsec;
+}
+
+// Append an entry stamped with the current tick. Caller holds sim_mutex.
+static void journal_command(GameEngine* engine, int type, int arg) {
+    if (!engine->journaling) return;
+    uint32_t tail = engine->state->journal_tail;
+    uint32_t head = __atomic_load_n(&engine->state->journal_head, __ATOMIC_ACQUIRE);
+    if (tail - head >= JOURNAL_SIZE) {
+        engine->state->journal_dropped++;
+        return;
+    }
+    JournalEntry* entry = &engine->state->journal[tail & (JOURNAL_SIZE - 1)];
+    entry->tick = engine->state->game_state.tick;
+    entry->type = type;
+    entry->arg = arg;
+    entry->seq = tail;
+    __atomic_store_n(&engine->state->journal_tail, tail + 1, __ATOMIC_RELEASE);
+}
+
+static void set_movement_flag(GameEngine* engine, int direction, int value) {
+    switch (direction) {
+        case INPUT_LEFT: engine->state->game_state.player_moving_left = value; break;
+        case INPUT_RIGHT: engine->state->game_state.player_moving_right = value; break;
+        case INPUT_UP: engine->state->game_state.player_moving_up = value; break;
+        case INPUT_DOWN: engine->state->game_state.player_moving_down = value; break;
+    }
+}
+
+// Apply every command pushed before this tick started. Consumer side of
+// the input ring; caller holds sim_mutex.
+static void drain_input_commands(GameEngine* engine) {
+    uint32_t head = engine->state->input_head;
+    uint32_t tail = __atomic_load_n(&engine->state->input_tail, __ATOMIC_ACQUIRE);
+    if (head == tail) {
+        return;
+    }
+
+    int64_t now = monotonic_ns();
+    int64_t latency = 0;
+    for (; head != tail; head++) {
+        const InputCommand* command = &engine->state->input_ring[head & (INPUT_RING_SIZE - 1)];
+        journal_command(engine, command->type, command->arg);
+        switch (command->type) {
+            case CMD_MOVE_PRESS:
+                set_movement_flag(engine, command->arg, 1);
+                break;
+            case CMD_MOVE_RELEASE:
+                set_movement_flag(engine, command->arg, 0);
+                break;
+            case CMD_FIRE:
+                if (engine->state->game_state.game_active) {
+                    spawn_player_bullet(engine);
                 }
-            }
+                break;
+        }
+        if (now - command->timestamp_ns > latency) {
+            latency = now - command->timestamp_ns;
+        }
+    }
+    engine->state->input_latency_ns = latency;
+    __atomic_store_n(&engine->state->input_head, head, __ATOMIC_RELEASE);
+}
 
-            // Update bullet positions and cleanup inactive bullets
-            int active_bullets = 0;
-            for (int i = 0; i < game_state->num_bullets; i++) {
-                if (game_state->bullets[i].active) {
-                    if (game_state->bullets[i].is_player_bullet) {
-                        game_state->bullets[i].y -= BULLET_SPEED;
-                    } else {
-                        game_state->bullets[i].y += ALIEN_BULLET_SPEED;
-                    }
+// Mark every entity as not having moved this tick. Active ticks record
+// previous positions in their movement loops instead; this is for ticks
+// that move nothing. Caller holds sim_mutex.
+static void save_previous_positions(GameEngine* engine) {
+    for (int i = 0; i < engine->state->alien_pool.high_water; i++) {
+        engine->aliens[i].prev_x = engine->aliens[i].x;
+        engine->aliens[i].prev_y = engine->aliens[i].y;
+    }
+    for (int i = 0; i < engine->state->bullet_pool.high_water; i++) {
+        engine->bullets[i].prev_x = engine->bullets[i].x;
+        engine->bullets[i].prev_y = engine->bullets[i].y;
+    }
+}
+
+// Advance the simulation by one tick. Caller holds sim_mutex.
+static void game_tick(GameEngine* engine) {
+    int64_t tick_start = engine->profiling ? monotonic_ns() : 0;
+    // Where the player was before this tick, for interpolating renderers
+    engine->state->game_state.prev_player_x = engine->state->game_state.player_x;
+    engine->state->game_state.prev_player_y = engine->state->game_state.player_y;
+    drain_input_commands(engine);
+
+    engine->state->game_state.tick++;
+    if (!engine->state->game_state.game_active) {
+        save_previous_positions(engine);
+        return;
+    }
+
+    // Update player position based on movement flags
+    if (engine->state->game_state.player_moving_left && 
+        engine->state->game_state.player_x > 0) {
+        engine->state->game_state.player_x -= SHIP_SPEED;
+    }
+    if (engine->state->game_state.player_moving_right && 
+        engine->state->game_state.player_x < SCREEN_WIDTH - 50) {
+        engine->state->game_state.player_x += SHIP_SPEED;
+    }
+    if (engine->state->game_state.player_moving_up && 
+        engine->state->game_state.player_y > 0) {
+        engine->state->game_state.player_y -= SHIP_SPEED;
+    }
+    if (engine->state->game_state.player_moving_down && 
+        engine->state->game_state.player_y < SCREEN_HEIGHT - 50) {
+        engine->state->game_state.player_y += SHIP_SPEED;
+    }
 
-                    // Remove bullets that are off screen
-                    if (game_state->bullets[i].y < 0 || 
-                        game_state->bullets[i].y > SCREEN_HEIGHT) {
-                        game_state->bullets[i].active = 0;
-                    } else {
-                        active_bullets++;
+    // Update alien positions, remembering where each one was
+    for (int i = 0; i < engine->state->alien_pool.high_water; i++) {
+        if (engine->aliens[i].active) {
+            engine->aliens[i].prev_x = engine->aliens[i].x;
+            engine->aliens[i].prev_y = engine->aliens[i].y;
+            engine->aliens[i].x += engine->state->alien_speed * engine->state->alien_direction;
+            
+            // Check fleet edges
+            if (engine->aliens[i].x <= 0 || 
+                engine->aliens[i].x >= SCREEN_WIDTH - 30) {
+                engine->state->alien_direction *= -1;
+                for (int j = 0; j < engine->state->alien_pool.high_water; j++) {
+                    if (engine->aliens[j].active) {
+                        if (j > i) {
+                            // Not reached by the loop above this tick
+                            engine->aliens[j].prev_x = engine->aliens[j].x;
+                            engine->aliens[j].prev_y = engine->aliens[j].y;
+                        }
+                        engine->aliens[j].y += engine->state->fleet_drop_speed;
                     }
                 }
+                break;
             }
+        }
+    }
 
-            // Compact bullet array by moving active bullets to the front
-            int write_index = 0;
-            for (int i = 0; i < game_state->num_bullets; i++) {
-                if (game_state->bullets[i].active) {
-                    if (write_index != i) {
-                        game_state->bullets[write_index] = game_state->bullets[i];
-                    }
-                    write_index++;
-                }
+    // Update bullet positions and return off-screen bullets to the pool
+    for (int i = 0; i < engine->state->bullet_pool.high_water; i++) {
+        if (engine->bullets[i].active) {
+            engine->bullets[i].prev_x = engine->bullets[i].x;
+            engine->bullets[i].prev_y = engine->bullets[i].y;
+            if (engine->bullets[i].is_player_bullet) {
+                engine->bullets[i].y -= BULLET_SPEED;
+            } else {
+                engine->bullets[i].y += ALIEN_BULLET_SPEED;
             }
-            game_state->num_bullets = active_bullets;
-
-            // Handle all collisions
-            handle_collisions();
-
-            // Random alien shooting
-            if (rand() % 100 < ALIEN_SHOOT_CHANCE) {
-                for (int i = 0; i < game_state->num_aliens; i++) {
-                    if (game_state->aliens[i].active && rand() % ALIEN_SHOOT_DIVISOR == 0) {
-                        if (game_state->num_bullets < 100) {
-                            game_state->bullets[game_state->num_bullets].x = game_state->aliens[i].x;
-                            game_state->bullets[game_state->num_bullets].y = game_state->aliens[i].y;
-                            game_state->bullets[game_state->num_bullets].active = 1;
-                            game_state->bullets[game_state->num_bullets].is_player_bullet = 0;
-                            game_state->num_bullets++;
-                        }
-                    }
-                }
+
+            // Remove bullets that are off screen
+            if (engine->bullets[i].y < 0 || 
+                engine->bullets[i].y > SCREEN_HEIGHT) {
+                free_bullet(engine, i);
             }
         }
-        
-        pthread_mutex_unlock(&game_state->game_state.mutex);
-        usleep(16667);  // ~60 FPS
+    }
+
+    // Handle all collisions
+    if (engine->profiling) {
+        int64_t collision_start = monotonic_ns();
+        handle_collisions(engine);
+        engine->state->collision_ns = monotonic_ns() - collision_start;
+    } else {
+        handle_collisions(engine);
+    }
+
+    // Random alien shooting
+    if (next_random(engine) % 100 < ALIEN_SHOOT_CHANCE) {
+        for (int i = 0; i < engine->state->alien_pool.high_water; i++) {
+            if (engine->aliens[i].active && next_random(engine) % ALIEN_SHOOT_DIVISOR == 0) {
+                spawn_bullet(engine, engine->aliens[i].x, engine->aliens[i].y, 0);
+            }
+        }
+    }
+
+    if (engine->profiling) {
+        engine->state->tick_ns = monotonic_ns() - tick_start;
+    }
+}
+
+static void timespec_add_ns(struct timespec* ts, long long ns) {
+    ts->tv_nsec += ns;
+    while (ts->tv_nsec >= 1000000000L) {
+        ts->tv_nsec -= 1000000000L;
+        ts->tv_sec++;
+    }
+}
+
+static long long timespec_diff_ns(const struct timespec* a, const struct timespec* b) {
+    return (a->tv_sec - b->tv_sec) * 1000000000LL + (a->tv_nsec - b->tv_nsec);
+}
+
+// Game logic thread function. Ticks run on a fixed timestep against
+// absolute deadlines, so sleep jitter never changes how many ticks are
+// simulated; if the thread falls behind it catches up a few ticks at a
+// time and then resyncs. Each frame is stamped with its tick's deadline
+// rather than the time it actually ran, so the stamps are evenly spaced.
+static void* game_logic_loop(void* arg) {
+    GameEngine* engine = arg;
+    struct timespec next_tick;
+    clock_gettime(CLOCK_MONOTONIC, &next_tick);
+
+    while (engine->thread_running) {
+        pthread_mutex_lock(&engine->state->sim_mutex);
+        game_tick(engine);
+        engine->state->tick_time_ns = next_tick.tv_sec * 1000000000LL + next_tick.tv_nsec;
+        publish_frame(engine);
+        pthread_mutex_unlock(&engine->state->sim_mutex);
+
+        int64_t period = __atomic_load_n(&engine->tick_period_ns, __ATOMIC_RELAXED);
+        timespec_add_ns(&next_tick, period);
+        struct timespec now;
+        clock_gettime(CLOCK_MONOTONIC, &now);
+        if (timespec_diff_ns(&now, &next_tick) > MAX_CATCH_UP_TICKS * period) {
+            next_tick = now;
+        }
+        clock_nanosleep(CLOCK_MONOTONIC, TIMER_ABSTIME, &next_tick, NULL);
     }
     return NULL;
 }
 
 // Start the game
-void start_game() {
-    pthread_mutex_lock(&game_state->game_state.mutex);
-    game_state->game_state.game_active = 1;
-    game_state->game_state.game_over = 0;
-    game_state->game_state.player_health = 100;
-    game_state->game_state.score = 0;
-    game_state->game_state.level = 1;  // Reset level
+void start_game(GameEngine* engine) {
+    pthread_mutex_lock(&engine->state->sim_mutex);
+    // Stamped with the tick the previous game reached
+    journal_command(engine, CMD_START_GAME, 0);
+    engine->state->game_state.game_active = 1;
+    engine->state->game_state.game_over = 0;
+    engine->state->game_state.player_health = 100;
+    engine->state->game_state.score = 0;
+    engine->state->game_state.level = 1;  // Reset level
+
+    // Reset everything else the simulation depends on, so a game is
+    // fully determined by its seed and inputs
+    engine->state->game_state.player_x = SCREEN_WIDTH / 2;
+    engine->state->game_state.player_y = SCREEN_HEIGHT - 50;
+    engine->state->game_state.player_moving_left = 0;
+    engine->state->game_state.player_moving_right = 0;
+    engine->state->game_state.player_moving_up = 0;
+    engine->state->game_state.player_moving_down = 0;
+    engine->state->game_state.prev_player_x = engine->state->game_state.player_x;
+    engine->state->game_state.prev_player_y = engine->state->game_state.player_y;
+    // Drop input queued for the previous game
+    __atomic_store_n(&engine->state->input_head,
+                     __atomic_load_n(&engine->state->input_tail, __ATOMIC_ACQUIRE),
+                     __ATOMIC_RELEASE);
+    engine->state->input_latency_ns = 0;
+    engine->state->game_state.tick = 0;
+    reset_pool(&engine->state->bullet_pool);
+    engine->state->alien_direction = 1;
+    engine->state->fleet_drop_speed = 10;
+    engine->state->alien_speed = 2.0;
+    engine->state->rng_state = engine->state->seed;
     
     // Create initial fleet
-    game_state->num_aliens = 0;
-    for (int y = 0; y < 3; y++) {
-        for (int x = 0; x < 6; x++) {
-            if (game_state->num_aliens < MAX_ALIENS) {
-                game_state->aliens[game_state->num_aliens].x = 100 + x * 80;
-                game_state->aliens[game_state->num_aliens].y = 50 + y * 60;
-                game_state->aliens[game_state->num_aliens].health = 100;
-                game_state->aliens[game_state->num_aliens].active = 1;
-                game_state->num_aliens++;
-            }
+    spawn_fleet(engine, 3, 6);
+    publish_frame(engine);
+    pthread_mutex_unlock(&engine->state->sim_mutex);
+
+    // Start game logic thread if not already running
+    if (!engine->thread_running && !engine->headless) {
+        engine->thread_running = 1;
+        engine->thread_started = 1;
+        pthread_create(&engine->logic_thread, NULL, game_logic_loop, engine);
+    }
+}
+
+// Set the logic thread's tick rate; takes effect from the next tick
+void set_tick_rate(GameEngine* engine, int ticks_per_second) {
+    if (ticks_per_second < 1) ticks_per_second = 1;
+    if (ticks_per_second > MAX_TICK_RATE) ticks_per_second = MAX_TICK_RATE;
+    __atomic_store_n(&engine->tick_period_ns, 1000000000LL / ticks_per_second, __ATOMIC_RELAXED);
+    engine->state->segment.tick_rate = (uint32_t)ticks_per_second;
+}
+
+int get_tick_rate(GameEngine* engine) {
+    return (int)engine->state->segment.tick_rate;
+}
+
+// Switch headless mode on or off. Must be called before start_game().
+void set_headless(GameEngine* engine, int enabled) {
+    engine->headless = enabled;
+}
+
+// Turn per-tick timing on or off
+void set_profiling(GameEngine* engine, int enabled) {
+    engine->profiling = enabled;
+}
+
+// Report how long the last active tick and its collision pass took
+void get_tick_profile(GameEngine* engine, int64_t* tick_ns, int64_t* collision_ns) {
+    pthread_mutex_lock(&engine->state->sim_mutex);
+    *tick_ns = engine->state->tick_ns;
+    *collision_ns = engine->state->collision_ns;
+    pthread_mutex_unlock(&engine->state->sim_mutex);
+}
+
+// Replace the fleet with aliens at the given (x, y) pairs, for checks
+// that need an exact layout. Returns how many fit in the pool.
+int load_aliens(GameEngine* engine, const int* positions, int count) {
+    pthread_mutex_lock(&engine->state->sim_mutex);
+    reset_pool(&engine->state->alien_pool);
+    int placed = 0;
+    for (; placed < count; placed++) {
+        int i = alloc_alien(engine);
+        if (i < 0) break;
+        engine->aliens[i].x = engine->aliens[i].prev_x = positions[placed * 2];
+        engine->aliens[i].y = engine->aliens[i].prev_y = positions[placed * 2 + 1];
+        engine->aliens[i].health = 100;
+    }
+    publish_frame(engine);
+    pthread_mutex_unlock(&engine->state->sim_mutex);
+    return placed;
+}
+
+// Index of the alien a bullet at (x, y) would hit, found through the
+// grid broad phase or, with full_scan, by testing every alien; -1 if none
+int probe_alien_hit(GameEngine* engine, int x, int y, int full_scan) {
+    pthread_mutex_lock(&engine->state->sim_mutex);
+    int hit;
+    if (full_scan) {
+        hit = scan_alien_hit(engine, x, y);
+    } else {
+        build_collision_grid(engine);
+        hit = find_alien_hit(engine, x, y);
+    }
+    pthread_mutex_unlock(&engine->state->sim_mutex);
+    return hit;
+}
+
+// Choose the narrow-phase collision test
+void set_collision_mode(GameEngine* engine, int mode) {
+    pthread_mutex_lock(&engine->state->sim_mutex);
+    engine->collision_mode = mode;
+    pthread_mutex_unlock(&engine->state->sim_mutex);
+}
+
+static unsigned char* copy_mask(const unsigned char* mask, int w, int h) {
+    if (mask == NULL || w <= 0 || h <= 0) return NULL;
+    unsigned char* copy = malloc((size_t)w * h);
+    if (copy != NULL) memcpy(copy, mask, (size_t)w * h);
+    return copy;
+}
+
+// Install per-pixel masks (one byte per pixel, row-major) for the mask
+// narrow phase. Either mask may be NULL to use a solid rectangle.
+void set_collision_masks(GameEngine* engine, const unsigned char* alien, int alien_w, int alien_h,
+                         const unsigned char* bullet, int bullet_w, int bullet_h) {
+    pthread_mutex_lock(&engine->state->sim_mutex);
+    free(engine->alien_mask);
+    free(engine->bullet_mask);
+    engine->alien_mask = copy_mask(alien, alien_w, alien_h);
+    engine->bullet_mask = copy_mask(bullet, bullet_w, bullet_h);
+    engine->alien_mask_w = engine->alien_mask ? alien_w : ALIEN_WIDTH;
+    engine->alien_mask_h = engine->alien_mask ? alien_h : ALIEN_HEIGHT;
+    engine->bullet_mask_w = engine->bullet_mask ? bullet_w : BULLET_WIDTH;
+    engine->bullet_mask_h = engine->bullet_mask ? bullet_h : BULLET_HEIGHT;
+    pthread_mutex_unlock(&engine->state->sim_mutex);
+}
+
+// Set the seed used by the next start_game()
+void set_seed(GameEngine* engine, uint64_t seed) {
+    pthread_mutex_lock(&engine->state->sim_mutex);
+    engine->state->seed = seed;
+    engine->state->rng_state = seed;
+    pthread_mutex_unlock(&engine->state->sim_mutex);
+}
+
+uint64_t get_seed(GameEngine* engine) {
+    pthread_mutex_lock(&engine->state->sim_mutex);
+    uint64_t seed = engine->state->seed;
+    pthread_mutex_unlock(&engine->state->sim_mutex);
+    return seed;
+}
+
+// FNV-1a over the fields that define the simulation. Fields are hashed
+// one by one so struct padding and the mutex never leak into the hash.
+static uint64_t hash_int(uint64_t hash, int64_t value) {
+    for (int i = 0; i < 8; i++) {
+        hash ^= (uint64_t)(value >> (i * 8)) & 0xFF;
+        hash *= 0x100000001B3ULL;
+    }
+    return hash;
+}
+
+// Caller holds sim_mutex
+static uint64_t compute_state_hash(GameEngine* engine) {
+    GameState* gs = &engine->state->game_state;
+    uint64_t hash = 0xCBF29CE484222325ULL;
+    hash = hash_int(hash, gs->player_x);
+    hash = hash_int(hash, gs->player_y);
+    hash = hash_int(hash, gs->player_health);
+    hash = hash_int(hash, gs->score);
+    hash = hash_int(hash, gs->game_active);
+    hash = hash_int(hash, gs->game_over);
+    hash = hash_int(hash, gs->player_moving_left);
+    hash = hash_int(hash, gs->player_moving_right);
+    hash = hash_int(hash, gs->player_moving_up);
+    hash = hash_int(hash, gs->player_moving_down);
+    hash = hash_int(hash, gs->level);
+    hash = hash_int(hash, gs->tick);
+    hash = hash_int(hash, engine->state->alien_pool.live);
+    for (int i = 0; i < engine->state->alien_pool.high_water; i++) {
+        if (!engine->aliens[i].active) continue;
+        hash = hash_int(hash, i);
+        hash = hash_int(hash, engine->aliens[i].x);
+        hash = hash_int(hash, engine->aliens[i].y);
+        hash = hash_int(hash, engine->aliens[i].health);
+        hash = hash_int(hash, engine->aliens[i].active);
+    }
+    hash = hash_int(hash, engine->state->bullet_pool.live);
+    for (int i = 0; i < engine->state->bullet_pool.high_water; i++) {
+        if (!engine->bullets[i].active) continue;
+        hash = hash_int(hash, i);
+        hash = hash_int(hash, engine->bullets[i].x);
+        hash = hash_int(hash, engine->bullets[i].y);
+        hash = hash_int(hash, engine->bullets[i].active);
+        hash = hash_int(hash, engine->bullets[i].is_player_bullet);
+    }
+    hash = hash_int(hash, engine->state->alien_direction);
+    hash = hash_int(hash, engine->state->fleet_drop_speed);
+    float alien_speed = engine->state->alien_speed;
+    uint32_t speed_bits;
+    memcpy(&speed_bits, &alien_speed, sizeof(speed_bits));
+    hash = hash_int(hash, speed_bits);
+    hash = hash_int(hash, (int64_t)engine->state->rng_state);
+    return hash;
+}
+
+uint64_t get_state_hash(GameEngine* engine) {
+    pthread_mutex_lock(&engine->state->sim_mutex);
+    uint64_t hash = compute_state_hash(engine);
+    pthread_mutex_unlock(&engine->state->sim_mutex);
+    return hash;
+}
+
+// Hash the state together with the tick, score and journal position it
+// belongs to, all under one lock, so a recording can check a replay
+// against it at exactly that point.
+uint64_t get_checkpoint(GameEngine* engine, uint32_t* tick, int* score, uint32_t* journal_seq) {
+    pthread_mutex_lock(&engine->state->sim_mutex);
+    uint64_t hash = compute_state_hash(engine);
+    *tick = engine->state->game_state.tick;
+    *score = engine->state->game_state.score;
+    *journal_seq = engine->state->journal_tail;
+    pthread_mutex_unlock(&engine->state->sim_mutex);
+    return hash;
+}
+
+// Turn the command journal on or off
+void set_journaling(GameEngine* engine, int enabled) {
+    engine->journaling = enabled;
+}
+
+// Copy up to max journal entries, oldest first, and return how many were
+// copied. dropped receives the number of entries lost to a full journal.
+// Only one thread may read the journal.
+int read_journal(GameEngine* engine, JournalEntry* out, int max, uint32_t* dropped) {
+    uint32_t head = engine->state->journal_head;
+    uint32_t tail = __atomic_load_n(&engine->state->journal_tail, __ATOMIC_ACQUIRE);
+    int n = 0;
+    for (; head != tail && n < max; head++, n++) {
+        out[n] = engine->state->journal[head & (JOURNAL_SIZE - 1)];
+    }
+    __atomic_store_n(&engine->state->journal_head, head, __ATOMIC_RELEASE);
+    *dropped = __atomic_load_n(&engine->state->journal_dropped, __ATOMIC_RELAXED);
+    return n;
+}
+
+// Apply one (left, right, up, down, fire) input row. Called with
+// sim_mutex held, right before the tick it belongs to.
+static void apply_input_row(GameEngine* engine, const int* input) {
+    engine->state->game_state.player_moving_left = input[INPUT_LEFT];
+    engine->state->game_state.player_moving_right = input[INPUT_RIGHT];
+    engine->state->game_state.player_moving_up = input[INPUT_UP];
+    engine->state->game_state.player_moving_down = input[INPUT_DOWN];
+    if (input[INPUT_FIRE] && engine->state->game_state.game_active) {
+        spawn_player_bullet(engine);
+    }
+}
+
+// Run n_ticks ticks synchronously on the calling thread. inputs holds
+// INPUT_STRIDE ints (left, right, up, down, fire) per tick, or is NULL
+// to keep the current movement flags.
+void step_game(GameEngine* engine, int n_ticks, const int* inputs) {
+    pthread_mutex_lock(&engine->state->sim_mutex);
+    for (int t = 0; t < n_ticks; t++) {
+        if (inputs != NULL) {
+            apply_input_row(engine, inputs + t * INPUT_STRIDE);
         }
+        game_tick(engine);
     }
-    pthread_mutex_unlock(&game_state->game_state.mutex);
+    engine->state->tick_time_ns = monotonic_ns();
+    publish_frame(engine);
+    pthread_mutex_unlock(&engine->state->sim_mutex);
+}
 
-    // Start game logic thread if not already running
-    if (!thread_running) {
-        thread_running = 1;
-        pthread_create(&game_logic_thread, NULL, game_logic_loop, NULL);
+// Push a batch of input commands for the logic thread to apply at the
+// start of its next tick. Commands with a zero timestamp are stamped
+// with the current CLOCK_MONOTONIC time. Returns how many commands fit
+// in the ring; the rest are dropped. Never waits on the simulation.
+int push_input_commands(GameEngine* engine, const InputCommand* commands, int count) {
+    // The mutex only keeps several Python threads from producing at once
+    pthread_mutex_lock(&engine->state->game_state.mutex);
+    uint32_t tail = engine->state->input_tail;
+    uint32_t head = __atomic_load_n(&engine->state->input_head, __ATOMIC_ACQUIRE);
+    int space = INPUT_RING_SIZE - (int)(tail - head);
+    int pushed = count < space ? count : space;
+    int64_t now = monotonic_ns();
+
+    for (int i = 0; i < pushed; i++, tail++) {
+        InputCommand* slot = &engine->state->input_ring[tail & (INPUT_RING_SIZE - 1)];
+        *slot = commands[i];
+        if (slot->timestamp_ns == 0) {
+            slot->timestamp_ns = now;
+        }
     }
+    __atomic_store_n(&engine->state->input_tail, tail, __ATOMIC_RELEASE);
+    pthread_mutex_unlock(&engine->state->game_state.mutex);
+    return pushed;
 }
 
-// Update player movement flags
-void update_player_movement(int left, int right, int up, int down) {
-    pthread_mutex_lock(&game_state->game_state.mutex);
-    game_state->game_state.player_moving_left = left;
-    game_state->game_state.player_moving_right = right;
-    game_state->game_state.player_moving_up = up;
-    game_state->game_state.player_moving_down = down;
-    pthread_mutex_unlock(&game_state->game_state.mutex);
+// Set all four movement flags at the next tick
+void update_player_movement(GameEngine* engine, int left, int right, int up, int down) {
+    int flags[4] = {left, right, up, down};
+    InputCommand commands[4];
+    for (int i = 0; i < 4; i++) {
+        commands[i].type = flags[i] ? CMD_MOVE_PRESS : CMD_MOVE_RELEASE;
+        commands[i].arg = INPUT_LEFT + i;
+        commands[i].timestamp_ns = 0;
+    }
+    push_input_commands(engine, commands, 4);
 }
 
-// Fire player bullet
-void fire_player_bullet() {
-    pthread_mutex_lock(&game_state->game_state.mutex);
-    if (game_state->num_bullets < 100) {
-        game_state->bullets[game_state->num_bullets].x = game_state->game_state.player_x;
-        game_state->bullets[game_state->num_bullets].y = game_state->game_state.player_y;
-        game_state->bullets[game_state->num_bullets].active = 1;
-        game_state->bullets[game_state->num_bullets].is_player_bullet = 1;
-        game_state->num_bullets++;
+// Queue a player shot for the next tick. Returns 0, or -1 if the input
+// ring is full.
+int fire_player_bullet(GameEngine* engine) {
+    InputCommand command = {CMD_FIRE, 0, 0};
+    return push_input_commands(engine, &command, 1) == 1 ? 0 : -1;
+}
+
+// Copy up to max live aliens as (x, y, active, prev_x, prev_y) rows;
+// returns the count
+static int copy_aliens(GameEngine* engine, int* out, int stride, int max) {
+    int n = 0;
+    for (int i = 0; i < engine->state->alien_pool.high_water && n < max; i++) {
+        if (!engine->aliens[i].active) continue;
+        out[n * stride] = engine->aliens[i].x;
+        out[n * stride + 1] = engine->aliens[i].y;
+        out[n * stride + 2] = engine->aliens[i].active;
+        out[n * stride + 3] = engine->aliens[i].prev_x;
+        out[n * stride + 4] = engine->aliens[i].prev_y;
+        n++;
+    }
+    return n;
+}
+
+// Copy up to max live bullets as (x, y, is_player, active, prev_x, prev_y)
+// rows; returns the count
+static int copy_bullets(GameEngine* engine, int* out, int stride, int max) {
+    int n = 0;
+    for (int i = 0; i < engine->state->bullet_pool.high_water && n < max; i++) {
+        if (!engine->bullets[i].active) continue;
+        out[n * stride] = engine->bullets[i].x;
+        out[n * stride + 1] = engine->bullets[i].y;
+        out[n * stride + 2] = engine->bullets[i].is_player_bullet;
+        out[n * stride + 3] = engine->bullets[i].active;
+        out[n * stride + 4] = engine->bullets[i].prev_x;
+        out[n * stride + 5] = engine->bullets[i].prev_y;
+        n++;
+    }
+    return n;
+}
+
+// Write the current state into the back frame and make it the front
+// frame. Called with sim_mutex held, after every tick and control call.
+static void publish_frame(GameEngine* engine) {
+    uint32_t back = engine->state->front_frame ^ 1;
+    int* frame = engine->frames + back * engine->frame_ints;
+    uint32_t seq = engine->state->frame_seq[back];
+
+    // Odd sequence: frame is being written
+    __atomic_store_n(&engine->state->frame_seq[back], seq + 1, __ATOMIC_RELAXED);
+    __atomic_thread_fence(__ATOMIC_RELEASE);
+
+    int* alien_rows = frame + SNAPSHOT_HEADER_SIZE;
+    int* bullet_rows = alien_rows + engine->state->alien_pool.capacity * ALIEN_STRIDE;
+    engine->state->publish_count++;
+    frame[SNAP_PLAYER_X] = engine->state->game_state.player_x;
+    frame[SNAP_PLAYER_Y] = engine->state->game_state.player_y;
+    frame[SNAP_PLAYER_HEALTH] = engine->state->game_state.player_health;
+    frame[SNAP_SCORE] = engine->state->game_state.score;
+    frame[SNAP_GAME_ACTIVE] = engine->state->game_state.game_active;
+    frame[SNAP_GAME_OVER] = engine->state->game_state.game_over;
+    frame[SNAP_LEVEL] = engine->state->game_state.level;
+    frame[SNAP_NUM_ALIENS] = copy_aliens(engine, alien_rows, ALIEN_STRIDE, engine->state->alien_pool.capacity);
+    frame[SNAP_NUM_BULLETS] = copy_bullets(engine, bullet_rows, BULLET_STRIDE, engine->state->bullet_pool.capacity);
+    frame[SNAP_TICK] = (int)engine->state->game_state.tick;
+    frame[SNAP_SEQUENCE] = (int)engine->state->publish_count;
+    frame[SNAP_INPUT_LATENCY_US] = (int)(engine->state->input_latency_ns / 1000);
+    frame[SNAP_PREV_PLAYER_X] = engine->state->game_state.prev_player_x;
+    frame[SNAP_PREV_PLAYER_Y] = engine->state->game_state.prev_player_y;
+    frame[SNAP_TICK_TIME_LO] = (int)(uint32_t)engine->state->tick_time_ns;
+    frame[SNAP_TICK_TIME_HI] = (int)(engine->state->tick_time_ns >> 32);
+
+    __atomic_store_n(&engine->state->frame_seq[back], seq + 2, __ATOMIC_RELEASE);
+    __atomic_store_n(&engine->state->front_frame, back, __ATOMIC_RELEASE);
+}
+
+// Copy the front frame without taking any lock. The header counts are
+// clamped to max_aliens / max_bullets. If the logic thread rewrote the
+// frame while we were copying, the sequence numbers differ and we retry.
+static void read_frame(GameEngine* engine, int* header, int* alien_rows, int max_aliens,
+                       int* bullet_rows, int max_bullets) {
+    for (;;) {
+        uint32_t front = __atomic_load_n(&engine->state->front_frame, __ATOMIC_ACQUIRE);
+        uint32_t seq = __atomic_load_n(&engine->state->frame_seq[front], __ATOMIC_ACQUIRE);
+        if (seq & 1) continue;
+
+        const int* frame = engine->frames + front * engine->frame_ints;
+        memcpy(header, frame, sizeof(int) * SNAPSHOT_HEADER_SIZE);
+        int n_aliens = header[SNAP_NUM_ALIENS];
+        int n_bullets = header[SNAP_NUM_BULLETS];
+        if (n_aliens < 0) n_aliens = 0;
+        if (n_bullets < 0) n_bullets = 0;
+        if (n_aliens > max_aliens) n_aliens = max_aliens;
+        if (n_bullets > max_bullets) n_bullets = max_bullets;
+        if (n_aliens > 0) {
+            memcpy(alien_rows, frame + SNAPSHOT_HEADER_SIZE,
+                   sizeof(int) * n_aliens * ALIEN_STRIDE);
+        }
+        if (n_bullets > 0) {
+            memcpy(bullet_rows,
+                   frame + SNAPSHOT_HEADER_SIZE + engine->state->alien_pool.capacity * ALIEN_STRIDE,
+                   sizeof(int) * n_bullets * BULLET_STRIDE);
+        }
+
+        __atomic_thread_fence(__ATOMIC_ACQUIRE);
+        if (__atomic_load_n(&engine->state->frame_seq[front], __ATOMIC_RELAXED) == seq) {
+            header[SNAP_NUM_ALIENS] = n_aliens;
+            header[SNAP_NUM_BULLETS] = n_bullets;
+            return;
+        }
     }
-    pthread_mutex_unlock(&game_state->game_state.mutex);
 }
 
 // Get game state
-void get_game_state(int* player_x, int* player_y, int* player_health, 
+void get_game_state(GameEngine* engine, int* player_x, int* player_y, int* player_health, 
                    int* score, int* game_active, int* game_over) {
-    pthread_mutex_lock(&game_state->game_state.mutex);
-    *player_x = game_state->game_state.player_x;
-    *player_y = game_state->game_state.player_y;
-    *player_health = game_state->game_state.player_health;
-    *score = game_state->game_state.score;
-    *game_active = game_state->game_state.game_active;
-    *game_over = game_state->game_state.game_over;
-    pthread_mutex_unlock(&game_state->game_state.mutex);
+    int header[SNAPSHOT_HEADER_SIZE];
+    read_frame(engine, header, NULL, 0, NULL, 0);
+    *player_x = header[SNAP_PLAYER_X];
+    *player_y = header[SNAP_PLAYER_Y];
+    *player_health = header[SNAP_PLAYER_HEALTH];
+    *score = header[SNAP_SCORE];
+    *game_active = header[SNAP_GAME_ACTIVE];
+    *game_over = header[SNAP_GAME_OVER];
 }
 
-// Get alien positions
-void get_alien_positions(int* positions, int* count) {
-    pthread_mutex_lock(&game_state->game_state.mutex);
-    *count = game_state->num_aliens;
-    for (int i = 0; i < game_state->num_aliens; i++) {
-        positions[i * 3] = game_state->aliens[i].x;
-        positions[i * 3 + 1] = game_state->aliens[i].y;
-        positions[i * 3 + 2] = game_state->aliens[i].active;
-    }
-    pthread_mutex_unlock(&game_state->game_state.mutex);
+// Get alien positions. positions must hold ALIEN_STRIDE ints per pool slot.
+void get_alien_positions(GameEngine* engine, int* positions, int* count) {
+    int header[SNAPSHOT_HEADER_SIZE];
+    read_frame(engine, header, positions, engine->state->alien_pool.capacity, NULL, 0);
+    *count = header[SNAP_NUM_ALIENS];
+}
+
+// Get bullet positions. positions must hold BULLET_STRIDE ints per pool slot.
+void get_bullet_positions(GameEngine* engine, int* positions, int* count) {
+    int header[SNAPSHOT_HEADER_SIZE];
+    read_frame(engine, header, NULL, 0, positions, engine->state->bullet_pool.capacity);
+    *count = header[SNAP_NUM_BULLETS];
+}
+
+// Report the entity capacities so callers can size snapshot buffers
+void get_snapshot_capacity(GameEngine* engine, int* max_aliens, int* max_bullets) {
+    *max_aliens = engine->state->alien_pool.capacity;
+    *max_bullets = engine->state->bullet_pool.capacity;
+}
+
+// Copy scalar state, aliens and bullets into one caller-owned buffer.
+// Layout: SNAPSHOT_HEADER_SIZE header ints, then max_aliens * ALIEN_STRIDE
+// ints, then max_bullets * BULLET_STRIDE ints. Only live entities are
+// copied. Reads the last published frame and never blocks the logic thread;
+// SNAP_SEQUENCE tells the caller whether it has seen this frame before.
+void get_snapshot(GameEngine* engine, int* buffer, int max_aliens, int max_bullets) {
+    int* alien_rows = buffer + SNAPSHOT_HEADER_SIZE;
+    int* bullet_rows = alien_rows + max_aliens * ALIEN_STRIDE;
+    read_frame(engine, buffer, alien_rows, max_aliens, bullet_rows, max_bullets);
 }
 
-// Get bullet positions
-void get_bullet_positions(int* positions, int* count) {
-    pthread_mutex_lock(&game_state->game_state.mutex);
-    *count = game_state->num_bullets;
-    for (int i = 0; i < game_state->num_bullets; i++) {
-        positions[i * 4] = game_state->bullets[i].x;
-        positions[i * 4 + 1] = game_state->bullets[i].y;
-        positions[i * 4 + 2] = game_state->bullets[i].is_player_bullet;
-        positions[i * 4 + 3] = game_state->bullets[i].active;
+// Step count headless engines in lockstep on the calling thread. actions
+// holds one input row per engine, applied on each of the n_ticks ticks.
+// As in the game loop, an engine whose fleet is cleared moves on to the
+// next level. Each engine's frame is then copied to frames + i * frame
+// size in the get_snapshot() layout, with the rows past the live counts
+// zeroed so the whole block reads as fixed-size arrays.
+void step_engines(GameEngine** engines, int count, int n_ticks, const int* actions,
+                  int* frames, int max_aliens, int max_bullets) {
+    int frame_ints = SNAPSHOT_HEADER_SIZE + max_aliens * ALIEN_STRIDE + max_bullets * BULLET_STRIDE;
+    for (int i = 0; i < count; i++) {
+        GameEngine* engine = engines[i];
+        const int* action = actions + i * INPUT_STRIDE;
+        pthread_mutex_lock(&engine->state->sim_mutex);
+        for (int t = 0; t < n_ticks; t++) {
+            apply_input_row(engine, action);
+            game_tick(engine);
+        }
+        engine->state->tick_time_ns = monotonic_ns();
+        publish_frame(engine);
+        int cleared = engine->state->game_state.game_active && engine->state->alien_pool.live == 0;
+        pthread_mutex_unlock(&engine->state->sim_mutex);
+        if (cleared) {
+            advance_level(engine);
+        }
+
+        int* frame = frames + (size_t)i * frame_ints;
+        int* alien_rows = frame + SNAPSHOT_HEADER_SIZE;
+        int* bullet_rows = alien_rows + max_aliens * ALIEN_STRIDE;
+        read_frame(engine, frame, alien_rows, max_aliens, bullet_rows, max_bullets);
+        int n_aliens = frame[SNAP_NUM_ALIENS];
+        int n_bullets = frame[SNAP_NUM_BULLETS];
+        memset(alien_rows + n_aliens * ALIEN_STRIDE, 0,
+               sizeof(int) * (max_aliens - n_aliens) * ALIEN_STRIDE);
+        memset(bullet_rows + n_bullets * BULLET_STRIDE, 0,
+               sizeof(int) * (max_bullets - n_bullets) * BULLET_STRIDE);
     }
-    pthread_mutex_unlock(&game_state->game_state.mutex);
+}
+
+// Report pool occupancy: live entities and slots in use per pool
+void get_pool_stats(GameEngine* engine, int* live_aliens, int* alien_slots, int* live_bullets, int* bullet_slots) {
+    pthread_mutex_lock(&engine->state->sim_mutex);
+    *live_aliens = engine->state->alien_pool.live;
+    *alien_slots = engine->state->alien_pool.high_water;
+    *live_bullets = engine->state->bullet_pool.live;
+    *bullet_slots = engine->state->bullet_pool.high_water;
+    pthread_mutex_unlock(&engine->state->sim_mutex);
 }
 
 // Handle alien hit by bullet
-void handle_alien_hit(int alien_x, int alien_y) {
-    pthread_mutex_lock(&game_state->game_state.mutex);
+void handle_alien_hit(GameEngine* engine, int alien_x, int alien_y) {
+    pthread_mutex_lock(&engine->state->sim_mutex);
     
     // Find and deactivate the alien
-    for (int i = 0; i < game_state->num_aliens; i++) {
-        if (game_state->aliens[i].active && 
-            abs(game_state->aliens[i].x - alien_x) < 30 &&
-            abs(game_state->aliens[i].y - alien_y) < 30) {
-            game_state->aliens[i].active = 0;
-            game_state->game_state.score += 10;
+    for (int i = 0; i < engine->state->alien_pool.high_water; i++) {
+        if (engine->aliens[i].active && 
+            abs(engine->aliens[i].x - alien_x) < 30 &&
+            abs(engine->aliens[i].y - alien_y) < 30) {
+            free_alien(engine, i);
+            engine->state->game_state.score += 10;
             break;
         }
     }
     
     // Find and deactivate any bullets that hit this alien
-    for (int i = 0; i < game_state->num_bullets; i++) {
-        if (game_state->bullets[i].active && 
-            abs(game_state->bullets[i].x - alien_x) < 30 &&
-            abs(game_state->bullets[i].y - alien_y) < 30) {
-            game_state->bullets[i].active = 0;
+    for (int i = 0; i < engine->state->bullet_pool.high_water; i++) {
+        if (engine->bullets[i].active && 
+            abs(engine->bullets[i].x - alien_x) < 30 &&
+            abs(engine->bullets[i].y - alien_y) < 30) {
+            free_bullet(engine, i);
         }
     }
+    publish_frame(engine);
     
-    pthread_mutex_unlock(&game_state->game_state.mutex);
+    pthread_mutex_unlock(&engine->state->sim_mutex);
 }
 
 // Save high score to file
@@ -420,7 +1468,7 @@ void save_high_score(int score) {
     // Read existing scores if file exists
     if (file) {
         char buffer[1024];
-        size_t len = fread(buffer, 1, sizeof(buffer), file);
+        size_t len = fread(buffer, 1, sizeof(buffer) - 1, file);  // Room for the terminator
         fclose(file);
         
         if (len > 0) {
@@ -473,7 +1521,7 @@ void load_high_scores(int* scores, int* count) {
     
     if (file) {
         char buffer[1024];
-        size_t len = fread(buffer, 1, sizeof(buffer), file);
+        size_t len = fread(buffer, 1, sizeof(buffer) - 1, file);  // Room for the terminator
         fclose(file);
         
         if (len > 0) {
@@ -489,57 +1537,45 @@ void load_high_scores(int* scores, int* count) {
 }
 
 // Add new function to get level
-void get_level(int* level) {
-    pthread_mutex_lock(&game_state->game_state.mutex);
-    *level = game_state->game_state.level;
-    pthread_mutex_unlock(&game_state->game_state.mutex);
+void get_level(GameEngine* engine, int* level) {
+    int header[SNAPSHOT_HEADER_SIZE];
+    read_frame(engine, header, NULL, 0, NULL, 0);
+    *level = header[SNAP_LEVEL];
 }
 
 // Add new function to advance level
-__attribute__((visibility("default"))) void advance_level() {
-    pthread_mutex_lock(&game_state->game_state.mutex);
-    game_state->game_state.level++;
+__attribute__((visibility("default"))) void advance_level(GameEngine* engine) {
+    pthread_mutex_lock(&engine->state->sim_mutex);
+    journal_command(engine, CMD_ADVANCE_LEVEL, 0);
+    engine->state->game_state.level++;
     
     // Increase difficulty more gradually
-    game_state->fleet_drop_speed += 1;  // Reduced from 2 - aliens move slightly faster
-    game_state->alien_speed += 0.2;     // Reduced from 0.5 - aliens move slightly faster horizontally
+    engine->state->fleet_drop_speed += 1;  // Reduced from 2 - aliens move slightly faster
+    engine->state->alien_speed += 0.2;     // Reduced from 0.5 - aliens move slightly faster horizontally
     
     // Create new fleet
-    game_state->num_aliens = 0;
-    int rows = 3 + (game_state->game_state.level - 1);  // Add one more row per level
-    int cols = 6 + (game_state->game_state.level - 1);  // Add one more column per level
-    
-    for (int y = 0; y < rows; y++) {
-        for (int x = 0; x < cols; x++) {
-            if (game_state->num_aliens < MAX_ALIENS) {
-                game_state->aliens[game_state->num_aliens].x = 100 + x * 80;
-                game_state->aliens[game_state->num_aliens].y = 50 + y * 60;
-                game_state->aliens[game_state->num_aliens].health = 100;
-                game_state->aliens[game_state->num_aliens].active = 1;
-                game_state->num_aliens++;
-            }
-        }
-    }
-    pthread_mutex_unlock(&game_state->game_state.mutex);
+    int rows = 3 + (engine->state->game_state.level - 1);  // Add one more row per level
+    int cols = 6 + (engine->state->game_state.level - 1);  // Add one more column per level
+    spawn_fleet(engine, rows, cols);
+    publish_frame(engine);
+    pthread_mutex_unlock(&engine->state->sim_mutex);
 }
 
-// Cleanup function
-void cleanup() {
-    // Stop the game logic thread
-    thread_running = 0;
-    
-    // Wait for the game logic thread to finish
-    if (game_state != NULL) {
-        pthread_join(game_logic_thread, NULL);
-        
-        // Clean up shared memory
-        pthread_mutex_destroy(&game_state->game_state.mutex);
-        shmdt(game_state);
-        shmctl(shm_id, IPC_RMID, NULL);
-        game_state = NULL;
+// Stop the engine's logic thread and free everything it owns. The
+// handle is invalid afterwards.
+void engine_destroy(GameEngine* engine) {
+    if (engine == NULL) return;
+
+    // Stop the game logic thread and wait for it to finish
+    engine->thread_running = 0;
+    if (engine->thread_started) {
+        pthread_join(engine->logic_thread, NULL);
+        engine->thread_started = 0;
     }
-    
-    // Reset global variables
-    thread_running = 0;
-    shm_id = 0;
-} 
\ No newline at end of file
+
+    // Clean up shared memory and pool-sized buffers
+    release_game_state(engine);
+    free(engine->alien_mask);
+    free(engine->bullet_mask);
+    free(engine);
+}
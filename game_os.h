@@ -3,31 +3,183 @@
 
 #include <sys/types.h>
 #include <pthread.h>
+#include <stdint.h>
 
-// Initialize game state and shared memory
-int init_game_state();
+// Every call takes the handle of one engine. Each engine owns its own
+// shared memory segment and logic thread, so any number of games can run
+// side by side in one process. Entity pools are sized at creation; a
+// capacity of 0 picks the default.
+typedef struct GameEngine GameEngine;
+
+GameEngine* engine_create(int max_aliens, int max_bullets);
+GameEngine* engine_create_named(int max_aliens, int max_bullets, const char* name);
+void engine_destroy(GameEngine* engine);
+
+// Spectators. A named engine's segment uses a SysV key derived from the
+// name (SEGMENT_KEY_PREFIX in the top byte, the low 24 bits of the name's
+// FNV-1a hash below it) and starts with this header, so other processes
+// can attach it read-only and copy published frames with the same
+// seqlock protocol get_snapshot() uses. Bump SEGMENT_VERSION whenever
+// this header or the frame layout changes.
+#define SEGMENT_MAGIC 0x53474941u  // "AIGS"
+#define SEGMENT_VERSION 2
+#define SEGMENT_KEY_PREFIX 0x41000000u
+#define SEGMENT_NAME_MAX 64
+
+typedef struct {
+    uint32_t magic;        // Written last, once the segment is ready
+    uint32_t version;
+    uint32_t header_size;  // sizeof(SegmentHeader)
+    int32_t owner_pid;
+    uint32_t closed;       // Set when the owning engine is destroyed
+    uint32_t tick_rate;    // Ticks per second of the logic thread
+    uint64_t segment_size;
+    uint64_t frames_offset;       // Two frames of frame_ints ints each
+    uint64_t frame_ints;
+    uint64_t frame_seq_offset;    // uint32_t[2], odd while a frame is written
+    uint64_t front_frame_offset;  // uint32_t, index of the readable frame
+    int32_t max_aliens;
+    int32_t max_bullets;
+    char name[SEGMENT_NAME_MAX];
+} SegmentHeader;
 
 // Start the game
-void start_game();
+void start_game(GameEngine* engine);
+
+// Input commands. Python pushes a frame's worth of commands in one call
+// and the logic thread applies them at the start of the next tick.
+#define INPUT_RING_SIZE 256  // Must be a power of two
+
+enum {
+    CMD_MOVE_PRESS = 1,  // arg: INPUT_LEFT/RIGHT/UP/DOWN
+    CMD_MOVE_RELEASE,
+    CMD_FIRE
+};
+
+typedef struct {
+    int32_t type;
+    int32_t arg;
+    int64_t timestamp_ns;  // CLOCK_MONOTONIC; 0 stamps it on push
+} InputCommand;
+
+int push_input_commands(GameEngine* engine, const InputCommand* commands, int count);
 
 // Game logic functions
-void update_player_movement(int left, int right, int up, int down);
-void fire_player_bullet();
+void update_player_movement(GameEngine* engine, int left, int right, int up, int down);
+int fire_player_bullet(GameEngine* engine);  // Queues a shot for the next tick; -1 if the ring is full
 
 // Get game state
-void get_game_state(int* player_x, int* player_y, int* player_health, 
+void get_game_state(GameEngine* engine, int* player_x, int* player_y, int* player_health, 
                    int* score, int* game_active, int* game_over);
 
 // Get positions for rendering
-void get_alien_positions(int* positions, int* count);
-void get_bullet_positions(int* positions, int* count);
+void get_alien_positions(GameEngine* engine, int* positions, int* count);
+void get_bullet_positions(GameEngine* engine, int* positions, int* count);
 
-// Level management
-void get_level(int* level);
-void advance_level();
+// Frame snapshot layout: a header of scalar fields followed by the alien
+// block (x, y, active, prev_x, prev_y) and the bullet block (x, y,
+// is_player, active, prev_x, prev_y). prev_x/prev_y are where the entity
+// was before the last tick, so a renderer can interpolate between the
+// last two ticks using the tick's timestamp.
+#define SNAPSHOT_HEADER_SIZE 16
+#define ALIEN_STRIDE 5
+#define BULLET_STRIDE 6
+
+enum {
+    SNAP_PLAYER_X = 0,
+    SNAP_PLAYER_Y,
+    SNAP_PLAYER_HEALTH,
+    SNAP_SCORE,
+    SNAP_GAME_ACTIVE,
+    SNAP_GAME_OVER,
+    SNAP_LEVEL,
+    SNAP_NUM_ALIENS,
+    SNAP_NUM_BULLETS,
+    SNAP_TICK,
+    SNAP_SEQUENCE,  // Bumped every time the logic thread publishes a frame
+    SNAP_INPUT_LATENCY_US,  // Worst push-to-apply delay of the last input batch
+    SNAP_PREV_PLAYER_X,     // Player position before the last tick
+    SNAP_PREV_PLAYER_Y,
+    SNAP_TICK_TIME_LO,      // CLOCK_MONOTONIC ns the last tick was due at, low 32 bits
+    SNAP_TICK_TIME_HI       // and high 32 bits
+};
+
+// Copy the last published frame into one buffer without taking a lock
+void get_snapshot_capacity(GameEngine* engine, int* max_aliens, int* max_bullets);
+void get_snapshot(GameEngine* engine, int* buffer, int max_aliens, int max_bullets);
+
+// Entity pool occupancy
+void get_pool_stats(GameEngine* engine, int* live_aliens, int* alien_slots, int* live_bullets, int* bullet_slots);
+
+// Tick rate of the logic thread (60 by default). Entity speeds are per
+// tick, so this sets how fast the game runs; rendering is independent.
+void set_tick_rate(GameEngine* engine, int ticks_per_second);
+int get_tick_rate(GameEngine* engine);
+
+// Headless mode: no logic thread, ticks advance only through step_game()
+#define INPUT_STRIDE 5
 
-// Cleanup resources
-void cleanup();
+enum {
+    INPUT_LEFT = 0,
+    INPUT_RIGHT,
+    INPUT_UP,
+    INPUT_DOWN,
+    INPUT_FIRE
+};
+
+void set_headless(GameEngine* engine, int enabled);
+void step_game(GameEngine* engine, int n_ticks, const int* inputs);
+
+// Vectorized stepping: one call steps several headless engines with one
+// input row each and writes their frames into one caller-owned block
+void step_engines(GameEngine** engines, int count, int n_ticks, const int* actions,
+                  int* frames, int max_aliens, int max_bullets);
+
+// Determinism: a game is fully defined by its seed and its inputs
+void set_seed(GameEngine* engine, uint64_t seed);
+uint64_t get_seed(GameEngine* engine);
+uint64_t get_state_hash(GameEngine* engine);
+
+// Session recording: the engine journals every command it applies and
+// every start_game()/advance_level(), stamped with the tick it happened at
+#define JOURNAL_SIZE 4096  // Must be a power of two
+
+enum {
+    CMD_START_GAME = 16,  // Journal only; tick is the one the previous game reached
+    CMD_ADVANCE_LEVEL
+};
+
+typedef struct {
+    uint32_t tick;
+    int32_t type;  // CMD_*
+    int32_t arg;
+    uint32_t seq;  // Position in the journal
+} JournalEntry;
+
+void set_journaling(GameEngine* engine, int enabled);
+int read_journal(GameEngine* engine, JournalEntry* out, int max, uint32_t* dropped);
+uint64_t get_checkpoint(GameEngine* engine, uint32_t* tick, int* score, uint32_t* journal_seq);
+
+// Profiling: time each tick and its collision pass (off by default)
+void set_profiling(GameEngine* engine, int enabled);
+void get_tick_profile(GameEngine* engine, int64_t* tick_ns, int64_t* collision_ns);
+
+// Collisions: a spatial grid broad phase feeds either the legacy 30px
+// radius test or a pixel mask test built from the sprite images
+enum {
+    COLLISION_MODE_RADIUS = 0,
+    COLLISION_MODE_MASK
+};
+
+void set_collision_mode(GameEngine* engine, int mode);
+void set_collision_masks(GameEngine* engine, const unsigned char* alien, int alien_w, int alien_h,
+                         const unsigned char* bullet, int bullet_w, int bullet_h);
+int load_aliens(GameEngine* engine, const int* positions, int count);
+int probe_alien_hit(GameEngine* engine, int x, int y, int full_scan);
+
+// Level management
+void get_level(GameEngine* engine, int* level);
+void advance_level(GameEngine* engine);
 
 // File management functions
 void save_high_score(int score);
@@ -1,49 +1,331 @@
+import atexit
 import ctypes
 import os
-from ctypes import c_int, c_void_p, POINTER
+from ctypes import c_char_p, c_int, c_int32, c_int64, c_uint32, c_uint64, c_void_p, POINTER
+
+import numpy as np
+
+# Snapshot layout, kept in sync with game_os.h
+SNAPSHOT_HEADER_SIZE = 16
+ALIEN_STRIDE = 5
+BULLET_STRIDE = 6
+SNAP_PLAYER_X = 0
+SNAP_PLAYER_Y = 1
+SNAP_PLAYER_HEALTH = 2
+SNAP_SCORE = 3
+SNAP_GAME_ACTIVE = 4
+SNAP_GAME_OVER = 5
+SNAP_LEVEL = 6
+SNAP_NUM_ALIENS = 7
+SNAP_NUM_BULLETS = 8
+SNAP_TICK = 9
+SNAP_SEQUENCE = 10
+SNAP_INPUT_LATENCY_US = 11
+SNAP_PREV_PLAYER_X = 12
+SNAP_PREV_PLAYER_Y = 13
+SNAP_TICK_TIME_LO = 14
+SNAP_TICK_TIME_HI = 15
+
+# Default entity pool sizes, kept in sync with game_os.c
+DEFAULT_MAX_ALIENS = 1024
+DEFAULT_MAX_BULLETS = 2048
+
+# Per-tick headless input row: (left, right, up, down, fire)
+INPUT_STRIDE = 5
+INPUT_LEFT = 0
+INPUT_RIGHT = 1
+INPUT_UP = 2
+INPUT_DOWN = 3
+
+# Input ring commands, kept in sync with game_os.h
+INPUT_RING_SIZE = 256
+CMD_MOVE_PRESS = 1
+CMD_MOVE_RELEASE = 2
+CMD_FIRE = 3
+# Journal-only entries, written by start_game() and advance_level()
+CMD_START_GAME = 16
+CMD_ADVANCE_LEVEL = 17
+JOURNAL_SIZE = 4096
+
+# Narrow-phase collision tests
+COLLISION_MODE_RADIUS = 0
+COLLISION_MODE_MASK = 1
+
+
+class InputCommand(ctypes.Structure):
+    _fields_ = [('type', c_int32), ('arg', c_int32), ('timestamp_ns', c_int64)]
+
+
+class JournalEntry(ctypes.Structure):
+    _fields_ = [('tick', c_uint32), ('type', c_int32), ('arg', c_int32), ('seq', c_uint32)]
+
+
+def interpolate(rows, alpha):
+    """Positions of snapshot rows alpha of the way from their previous
+    tick to the current one, as an (n, 2) int array.
+
+    Works on aliens and bullets alike (or any subset of their rows),
+    since both layouts start with x, y and end with prev_x, prev_y.
+    """
+    current = rows[:, :2]
+    if alpha >= 1.0:
+        return current
+    previous = rows[:, -2:]
+    return np.rint(previous + (current - previous) * alpha).astype(np.intc)
+
+
+class GameSnapshot:
+    """A view of one frame of C game state.
+
+    All fields read from a single preallocated buffer that the wrapper
+    refills on every snapshot() call, so the arrays are only valid until
+    the next call. `aliens` is an (n, 5) array of (x, y, active, prev_x,
+    prev_y) and `bullets` an (n, 6) array of (x, y, is_player, active,
+    prev_x, prev_y), where prev_x/prev_y is the position before the last
+    tick.
+    """
+
+    def __init__(self, max_aliens, max_bullets):
+        self.max_aliens = max_aliens
+        self.max_bullets = max_bullets
+        size = SNAPSHOT_HEADER_SIZE + max_aliens * ALIEN_STRIDE + max_bullets * BULLET_STRIDE
+        self.buffer = (c_int * size)()
+        self.memory = memoryview(self.buffer).cast('B').cast('i')
+
+        # Views are created once and sliced per frame, never copied
+        data = np.frombuffer(self.buffer, dtype=np.intc)
+        self.header = data[:SNAPSHOT_HEADER_SIZE]
+        alien_end = SNAPSHOT_HEADER_SIZE + max_aliens * ALIEN_STRIDE
+        self._aliens = data[SNAPSHOT_HEADER_SIZE:alien_end].reshape(max_aliens, ALIEN_STRIDE)
+        self._bullets = data[alien_end:].reshape(max_bullets, BULLET_STRIDE)
+        self.is_new = False
+
+    @property
+    def player_x(self):
+        return int(self.header[SNAP_PLAYER_X])
+
+    @property
+    def player_y(self):
+        return int(self.header[SNAP_PLAYER_Y])
+
+    @property
+    def player_health(self):
+        return int(self.header[SNAP_PLAYER_HEALTH])
+
+    @property
+    def score(self):
+        return int(self.header[SNAP_SCORE])
+
+    @property
+    def game_active(self):
+        return bool(self.header[SNAP_GAME_ACTIVE])
+
+    @property
+    def game_over(self):
+        return bool(self.header[SNAP_GAME_OVER])
+
+    @property
+    def level(self):
+        return int(self.header[SNAP_LEVEL])
+
+    @property
+    def tick(self):
+        """Ticks simulated since the game started."""
+        return int(self.header[SNAP_TICK]) & 0xFFFFFFFF
+
+    @property
+    def sequence(self):
+        """Number of the published frame this snapshot was read from."""
+        return int(self.header[SNAP_SEQUENCE]) & 0xFFFFFFFF
+
+    @property
+    def input_latency_us(self):
+        """Worst push-to-apply delay of the last input batch, in microseconds."""
+        return int(self.header[SNAP_INPUT_LATENCY_US])
+
+    @property
+    def prev_player_x(self):
+        return int(self.header[SNAP_PREV_PLAYER_X])
+
+    @property
+    def prev_player_y(self):
+        return int(self.header[SNAP_PREV_PLAYER_Y])
+
+    @property
+    def tick_time_ns(self):
+        """CLOCK_MONOTONIC time (as time.monotonic_ns()) the last tick was due at."""
+        return (int(self.header[SNAP_TICK_TIME_HI]) << 32) | (int(self.header[SNAP_TICK_TIME_LO]) & 0xFFFFFFFF)
+
+    def tick_fraction(self, now_ns, tick_period_ns):
+        """How far now_ns is into the tick after this frame's, from 0 to 1.
+
+        This is the alpha to interpolate with: 0 draws the previous
+        tick's positions and 1 the current ones. Past a whole tick (the
+        engine is paused or late) it stays at 1.
+        """
+        alpha = (now_ns - self.tick_time_ns) / tick_period_ns
+        return 0.0 if alpha < 0.0 else 1.0 if alpha > 1.0 else alpha
+
+    @property
+    def aliens(self):
+        return self._aliens[:self.header[SNAP_NUM_ALIENS]]
+
+    @property
+    def bullets(self):
+        return self._bullets[:self.header[SNAP_NUM_BULLETS]]
+
+    @property
+    def alien_memory(self):
+        """Raw memoryview over the alien block, for callers without NumPy."""
+        start = SNAPSHOT_HEADER_SIZE
+        return self.memory[start:start + self.header[SNAP_NUM_ALIENS] * ALIEN_STRIDE]
+
+    @property
+    def bullet_memory(self):
+        """Raw memoryview over the bullet block, for callers without NumPy."""
+        start = SNAPSHOT_HEADER_SIZE + self.max_aliens * ALIEN_STRIDE
+        return self.memory[start:start + self.header[SNAP_NUM_BULLETS] * BULLET_STRIDE]
+
+    def active_aliens(self):
+        """Return only the aliens that are still alive."""
+        aliens = self.aliens
+        return aliens[aliens[:, 2] != 0]
+
+    def all_aliens_destroyed(self):
+        aliens = self.aliens
+        return not aliens[:, 2].any()
+
 
 class GameOSWrapper:
-    def __init__(self):
+    def __init__(self, headless=False, seed=None, max_aliens=None, max_bullets=None, name=None):
         # Load the shared library
         current_dir = os.path.dirname(os.path.abspath(__file__))
         lib_path = os.path.join(current_dir, 'libgame_os.so')
         self.lib = ctypes.CDLL(lib_path)
         
-        # Define function prototypes
-        self.lib.init_game_state.restype = c_int
-        self.lib.init_game_state.argtypes = []
+        # Define function prototypes. Every engine call takes the handle
+        # returned by engine_create_named as its first argument.
+        self.lib.engine_create_named.restype = c_void_p
+        self.lib.engine_create_named.argtypes = [c_int, c_int, c_char_p]
+        self.lib.engine_destroy.argtypes = [c_void_p]
         
-        self.lib.start_game.argtypes = []
+        self.lib.start_game.argtypes = [c_void_p]
         
-        self.lib.update_player_movement.argtypes = [c_int, c_int, c_int, c_int]
-        self.lib.fire_player_bullet.argtypes = []
+        self.lib.update_player_movement.argtypes = [c_void_p, c_int, c_int, c_int, c_int]
+        self.lib.fire_player_bullet.argtypes = [c_void_p]
+        self.lib.fire_player_bullet.restype = c_int
+        self.lib.push_input_commands.argtypes = [c_void_p, POINTER(InputCommand), c_int]
+        self.lib.push_input_commands.restype = c_int
         
         self.lib.get_game_state.argtypes = [
+            c_void_p,
             POINTER(c_int), POINTER(c_int), POINTER(c_int),
             POINTER(c_int), POINTER(c_int), POINTER(c_int)
         ]
         
-        self.lib.get_alien_positions.argtypes = [POINTER(c_int), POINTER(c_int)]
-        self.lib.get_bullet_positions.argtypes = [POINTER(c_int), POINTER(c_int)]
+        self.lib.get_alien_positions.argtypes = [c_void_p, POINTER(c_int), POINTER(c_int)]
+        self.lib.get_bullet_positions.argtypes = [c_void_p, POINTER(c_int), POINTER(c_int)]
+
+        self.lib.get_snapshot_capacity.argtypes = [c_void_p, POINTER(c_int), POINTER(c_int)]
+        self.lib.get_snapshot.argtypes = [c_void_p, POINTER(c_int), c_int, c_int]
+        self.lib.get_snapshot.restype = None
+        self.lib.get_pool_stats.argtypes = [c_void_p] + [POINTER(c_int)] * 4
+
+        self.lib.set_headless.argtypes = [c_void_p, c_int]
+        self.lib.step_game.argtypes = [c_void_p, c_int, POINTER(c_int)]
+        self.lib.step_game.restype = None
+        self.lib.step_engines.argtypes = [c_void_p, c_int, c_int, c_void_p, c_void_p, c_int, c_int]
+        self.lib.step_engines.restype = None
+
+        self.lib.set_collision_mode.argtypes = [c_void_p, c_int]
+        self.lib.set_collision_masks.argtypes = [
+            c_void_p,
+            c_void_p, c_int, c_int,
+            c_void_p, c_int, c_int
+        ]
+
+        self.lib.load_aliens.argtypes = [c_void_p, POINTER(c_int), c_int]
+        self.lib.load_aliens.restype = c_int
+        self.lib.probe_alien_hit.argtypes = [c_void_p, c_int, c_int, c_int]
+        self.lib.probe_alien_hit.restype = c_int
+
+        self.lib.set_seed.argtypes = [c_void_p, c_uint64]
+        self.lib.get_seed.argtypes = [c_void_p]
+        self.lib.get_seed.restype = c_uint64
+        self.lib.get_state_hash.argtypes = [c_void_p]
+        self.lib.get_state_hash.restype = c_uint64
+        self.lib.set_profiling.argtypes = [c_void_p, c_int]
+        self.lib.set_tick_rate.argtypes = [c_void_p, c_int]
+        self.lib.get_tick_rate.argtypes = [c_void_p]
+        self.lib.get_tick_rate.restype = c_int
+        self.lib.set_journaling.argtypes = [c_void_p, c_int]
+        self.lib.read_journal.argtypes = [c_void_p, POINTER(JournalEntry), c_int, POINTER(c_uint32)]
+        self.lib.read_journal.restype = c_int
+        self.lib.get_checkpoint.argtypes = [c_void_p, POINTER(c_uint32), POINTER(c_int), POINTER(c_uint32)]
+        self.lib.get_checkpoint.restype = c_uint64
+        self.lib.get_tick_profile.argtypes = [c_void_p, POINTER(c_int64), POINTER(c_int64)]
         
-        self.lib.cleanup.argtypes = []
+        self.lib.get_level.argtypes = [c_void_p, POINTER(c_int)]
+        self.lib.advance_level.argtypes = [c_void_p]
         
         # Add file management function prototypes
         self.lib.save_high_score.argtypes = [c_int]
         self.lib.load_high_scores.argtypes = [POINTER(c_int), POINTER(c_int)]
         
-        # Initialize game state
-        if self.lib.init_game_state() != 0:
+        # Create this wrapper's own engine, with entity pools sized at
+        # startup. A named engine can be watched with spectator.py.
+        self.name = name
+        self.engine = self.lib.engine_create_named(max_aliens or 0, max_bullets or 0,
+                                                   name.encode() if name else None)
+        if not self.engine:
             raise RuntimeError("Failed to initialize game state")
+        # Free the segment even if Ctrl+C ends the program before cleanup()
+        atexit.register(self.cleanup)
+
+        # In headless mode no logic thread is started and the game only
+        # advances through step()
+        self.headless = headless
+        self.lib.set_headless(self.engine, 1 if headless else 0)
+        if seed is not None:
+            self.set_seed(seed)
+
+        # Preallocate the frame snapshot buffer once
+        max_aliens = c_int()
+        max_bullets = c_int()
+        self.lib.get_snapshot_capacity(self.engine, ctypes.byref(max_aliens), ctypes.byref(max_bullets))
+        self._snapshot = GameSnapshot(max_aliens.value, max_bullets.value)
+        self._commands = (InputCommand * INPUT_RING_SIZE)()
+        self._journal = (JournalEntry * JOURNAL_SIZE)()
     
     def start_game(self):
-        self.lib.start_game()
+        self.lib.start_game(self.engine)
     
     def update_player_movement(self, left, right, up, down):
-        self.lib.update_player_movement(left, right, up, down)
+        self.lib.update_player_movement(self.engine, left, right, up, down)
     
     def fire_player_bullet(self):
-        self.lib.fire_player_bullet()
+        """Queue a shot for the next tick; returns -1 if the input ring is full."""
+        return self.lib.fire_player_bullet(self.engine)
+
+    def push_commands(self, commands):
+        """Send a batch of (type, arg, timestamp_ns) commands in one call.
+
+        The logic thread applies them at the start of its next tick. A
+        timestamp of 0 is stamped by C on arrival. Returns how many
+        commands were accepted, in order: fewer than len(commands) when
+        the input ring filled up, and the rest were not sent.
+        """
+        buffer = self._commands
+        accepted = 0
+        while accepted < len(commands):
+            batch = commands[accepted:accepted + INPUT_RING_SIZE]
+            for command, values in zip(buffer, batch):
+                command.type, command.arg, command.timestamp_ns = values
+            pushed = self.lib.push_input_commands(self.engine, buffer, len(batch))
+            accepted += pushed
+            if pushed < len(batch):
+                break  # Ring full
+        return accepted
     
     def get_game_state(self):
         player_x = c_int()
@@ -53,7 +335,7 @@ class GameOSWrapper:
         game_active = c_int()
         game_over = c_int()
         
-        self.lib.get_game_state(
+        self.lib.get_game_state(self.engine, 
             ctypes.byref(player_x),
             ctypes.byref(player_y),
             ctypes.byref(player_health),
@@ -71,48 +353,192 @@ class GameOSWrapper:
             'game_over': bool(game_over.value)
         }
     
+    def snapshot(self):
+        """Fetch the last frame published by the engine in a single call.
+
+        Never blocks the logic thread. Returns the wrapper's reusable
+        GameSnapshot, which is overwritten by the next call; its `is_new`
+        is False when the engine has not published since the last call.
+        """
+        snap = self._snapshot
+        previous = snap.sequence
+        self.lib.get_snapshot(self.engine, snap.buffer, snap.max_aliens, snap.max_bullets)
+        snap.is_new = snap.sequence != previous
+        return snap
+
+    def step(self, n_ticks=1, inputs=None):
+        """Advance a headless game by n_ticks as fast as the CPU allows.
+
+        inputs is either None (keep the current movement flags), a single
+        (left, right, up, down, fire) row applied to every tick, or an
+        (n_ticks, 5) array with one row per tick. Returns the snapshot
+        after the last tick.
+        """
+        if not self.headless:
+            raise RuntimeError("step() is only available in headless mode")
+        if inputs is None:
+            self.lib.step_game(self.engine, n_ticks, None)
+        else:
+            rows = np.asarray(inputs, dtype=np.intc)
+            if rows.ndim == 1:
+                rows = np.broadcast_to(rows, (n_ticks, INPUT_STRIDE))
+            rows = np.ascontiguousarray(rows)
+            if rows.shape != (n_ticks, INPUT_STRIDE):
+                raise ValueError(f"inputs must have shape ({n_ticks}, {INPUT_STRIDE})")
+            self.lib.step_game(self.engine, n_ticks, rows.ctypes.data_as(POINTER(c_int)))
+        return self.snapshot()
+
+    def pool_stats(self):
+        """Return live entity counts and used slots for the alien and bullet pools."""
+        values = [c_int() for _ in range(4)]
+        self.lib.get_pool_stats(self.engine, *[ctypes.byref(v) for v in values])
+        return {
+            'live_aliens': values[0].value,
+            'alien_slots': values[1].value,
+            'alien_capacity': self._snapshot.max_aliens,
+            'live_bullets': values[2].value,
+            'bullet_slots': values[3].value,
+            'bullet_capacity': self._snapshot.max_bullets,
+        }
+
+    def set_collision_mode(self, mode):
+        """Select COLLISION_MODE_RADIUS (legacy) or COLLISION_MODE_MASK."""
+        self.lib.set_collision_mode(self.engine, mode)
+
+    def set_collision_masks(self, alien_mask=None, bullet_mask=None):
+        """Upload (height, width) pixel masks for the mask narrow phase.
+
+        A mask left as None is treated as a solid rectangle of the
+        sprite's default size.
+        """
+        args = []
+        for mask in (alien_mask, bullet_mask):
+            if mask is None:
+                args.extend([None, 0, 0])
+            else:
+                mask = np.ascontiguousarray(mask, dtype=np.uint8)
+                args.extend([mask.ctypes.data, mask.shape[1], mask.shape[0]])
+        self.lib.set_collision_masks(self.engine, *args)
+
+    def load_aliens(self, positions):
+        """Replace the fleet with aliens at an (n, 2) array of (x, y).
+
+        Returns how many fit in the pool.
+        """
+        rows = np.ascontiguousarray(positions, dtype=np.intc).reshape(-1, 2)
+        return self.lib.load_aliens(self.engine, rows.ctypes.data_as(POINTER(c_int)), len(rows))
+
+    def probe_alien_hit(self, x, y, full_scan=False):
+        """Pool index of the alien a bullet at (x, y) would hit, or -1.
+
+        Goes through the grid broad phase like a tick does, or with
+        full_scan tests every alien instead.
+        """
+        return self.lib.probe_alien_hit(self.engine, x, y, 1 if full_scan else 0)
+
+    def set_seed(self, seed):
+        """Seed the engine's PRNG; takes effect from the next start_game()."""
+        self.lib.set_seed(self.engine, seed & 0xFFFFFFFFFFFFFFFF)
+
+    def get_seed(self):
+        return self.lib.get_seed(self.engine)
+
+    def state_hash(self):
+        """Hash of the full simulation state, equal across runs with the
+        same seed and inputs."""
+        return self.lib.get_state_hash(self.engine)
+
+    def set_journaling(self, enabled):
+        """Record every applied command, start_game() and advance_level()."""
+        self.lib.set_journaling(self.engine, 1 if enabled else 0)
+
+    def read_journal(self):
+        """Drain the journal.
+
+        Returns a list of (tick, type, arg, seq) tuples, oldest first, and
+        the number of entries ever dropped because the journal was full.
+        """
+        dropped = c_uint32()
+        count = self.lib.read_journal(self.engine, self._journal, JOURNAL_SIZE, ctypes.byref(dropped))
+        journal = self._journal
+        entries = [(journal[i].tick, journal[i].type, journal[i].arg, journal[i].seq)
+                   for i in range(count)]
+        return entries, dropped.value
+
+    def checkpoint(self):
+        """Return (tick, score, state_hash, journal_seq) taken under one lock."""
+        tick = c_uint32()
+        score = c_int()
+        journal_seq = c_uint32()
+        state_hash = self.lib.get_checkpoint(self.engine, ctypes.byref(tick), ctypes.byref(score),
+                                             ctypes.byref(journal_seq))
+        return tick.value, score.value, state_hash, journal_seq.value
+
+    def set_profiling(self, enabled):
+        """Time every engine tick and its collision pass."""
+        self.lib.set_profiling(self.engine, 1 if enabled else 0)
+
+    def set_tick_rate(self, ticks_per_second):
+        """Set how many ticks per second the logic thread runs (1 to 1000)."""
+        self.lib.set_tick_rate(self.engine, int(ticks_per_second))
+
+    @property
+    def tick_rate(self):
+        return self.lib.get_tick_rate(self.engine)
+
+    def tick_profile(self):
+        """Return (tick_ns, collision_ns) for the last active tick."""
+        tick_ns = c_int64()
+        collision_ns = c_int64()
+        self.lib.get_tick_profile(self.engine, ctypes.byref(tick_ns), ctypes.byref(collision_ns))
+        return tick_ns.value, collision_ns.value
+
     def get_level(self):
         """Get current level from C"""
         level = c_int()
-        self.lib.get_level(ctypes.byref(level))
+        self.lib.get_level(self.engine, ctypes.byref(level))
         return level.value
 
     def advance_level(self):
         """Advance to next level in C"""
-        self.lib.advance_level()
+        self.lib.advance_level(self.engine)
     
     def get_alien_positions(self):
         """Get positions of all aliens from C"""
-        positions = (ctypes.c_int * (50 * 3))()  # MAX_ALIENS * 3 (x, y, active)
+        positions = (ctypes.c_int * (self._snapshot.max_aliens * ALIEN_STRIDE))()  # One snapshot row per slot
         count = ctypes.c_int()
-        self.lib.get_alien_positions(positions, ctypes.byref(count))
+        self.lib.get_alien_positions(self.engine, positions, ctypes.byref(count))
         result = []
         for i in range(count.value):
-            x = positions[i * 3]
-            y = positions[i * 3 + 1]
-            active = positions[i * 3 + 2]
+            x = positions[i * ALIEN_STRIDE]
+            y = positions[i * ALIEN_STRIDE + 1]
+            active = positions[i * ALIEN_STRIDE + 2]
             result.append((x, y, active))
         return result
     
     def get_bullet_positions(self):
         """Get positions of all bullets from C"""
-        positions = (ctypes.c_int * (100 * 4))()  # Max 100 bullets * 4 (x, y, is_player, active)
+        positions = (ctypes.c_int * (self._snapshot.max_bullets * BULLET_STRIDE))()  # One snapshot row per slot
         count = ctypes.c_int()
-        self.lib.get_bullet_positions(positions, ctypes.byref(count))
+        self.lib.get_bullet_positions(self.engine, positions, ctypes.byref(count))
         result = []
         for i in range(count.value):
-            x = positions[i * 4]
-            y = positions[i * 4 + 1]
-            is_player = positions[i * 4 + 2]
-            active = positions[i * 4 + 3]
+            x = positions[i * BULLET_STRIDE]
+            y = positions[i * BULLET_STRIDE + 1]
+            is_player = positions[i * BULLET_STRIDE + 2]
+            active = positions[i * BULLET_STRIDE + 3]
             result.append((x, y, is_player, active))
         return result
     
     def cleanup(self):
-        self.lib.cleanup()
+        """Stop this wrapper's engine and free it; safe to call twice."""
+        if self.engine:
+            self.lib.engine_destroy(self.engine)
+            self.engine = None
+            atexit.unregister(self.cleanup)
 
     def save_high_score(self, score):
-        """Save high score using C implementation"""
+        """Save high score using C implementation (the game uses high_scores.HighScoreStore)"""
         self.lib.save_high_score(score)
 
     def load_high_scores(self):
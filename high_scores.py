@@ -0,0 +1,185 @@
+"""Leaderboard storage for Alien Invasion.
+
+Scores live in memory in a ranked list plus a per-player index, so
+submitting a score, reading the top ten or paging through every score
+ever recorded never touches the disk. Persistence is an append-only
+JSON Lines file written by a background thread: each score is one line
+appended in a single write, and the file is only ever rewritten through
+a temporary file and os.replace(), so a crash loses at most the score
+being written and never the ones before it.
+"""
+import bisect
+import json
+import os
+import queue
+import threading
+import time
+
+LEGACY_FILE = 'high_scores.json'
+
+
+class ScoreRecord:
+    """One finished game."""
+
+    __slots__ = ('player', 'score', 'level', 'timestamp')
+
+    def __init__(self, player, score, level=1, timestamp=None):
+        self.player = player
+        self.score = score
+        self.level = level
+        self.timestamp = time.time() if timestamp is None else timestamp
+
+    def to_json(self):
+        return json.dumps({'player': self.player, 'score': self.score,
+                           'level': self.level, 'time': round(self.timestamp, 3)})
+
+    @classmethod
+    def from_json(cls, line):
+        data = json.loads(line)
+        return cls(str(data['player']), int(data['score']),
+                   int(data.get('level', 1)), float(data.get('time', 0.0)))
+
+    def __repr__(self):
+        return f"ScoreRecord({self.player!r}, {self.score}, level={self.level})"
+
+
+class HighScoreStore:
+    """Ranked scores in memory, persisted to an append-only log.
+
+    The ranking is a sorted list of (-score, sequence) keys, so ties go
+    to whoever got there first. Queries are slices of that list, and a
+    new score is one bisect insert. Writes are queued to a daemon thread
+    so a game over on the render thread never waits on the disk; call
+    flush() to wait for them and close() when the game exits.
+    """
+
+    def __init__(self, path='high_scores.jsonl', legacy_path=LEGACY_FILE):
+        self.path = path
+        self.records = []  # Every score, in the order it was submitted
+        self.ranking = []  # (-score, index into records), best first
+        self.players = {}  # player -> indexes into records, oldest first
+        self._load(legacy_path)
+
+        self.queue = queue.Queue()
+        self.writer = threading.Thread(target=self._write_loop, name='high-score-writer',
+                                       daemon=True)
+        self.writer.start()
+
+    def _add(self, record):
+        index = len(self.records)
+        self.records.append(record)
+        bisect.insort(self.ranking, (-record.score, index))
+        self.players.setdefault(record.player, []).append(index)
+
+    def _load(self, legacy_path):
+        """Read the log, repairing it if the last write was torn."""
+        if not os.path.exists(self.path):
+            # Carry scores over from the old fixed-size JSON array
+            if legacy_path and os.path.exists(legacy_path):
+                try:
+                    with open(legacy_path) as f:
+                        scores = json.load(f)
+                    for score in scores:
+                        self._add(ScoreRecord('unknown', int(score), timestamp=0.0))
+                except (ValueError, TypeError) as e:
+                    print(f"Could not import {legacy_path}: {e}")
+                if self.records:
+                    self._rewrite()
+            return
+
+        damaged = False
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    self._add(ScoreRecord.from_json(line))
+                except (ValueError, KeyError, TypeError):
+                    damaged = True
+        if damaged:
+            print(f"Dropped unreadable lines from {self.path}")
+            self._rewrite()
+
+    def _rewrite(self):
+        """Atomically replace the log with the in-memory records."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temp = self.path + '.tmp'
+        with open(temp, 'w', encoding='utf-8') as f:
+            for record in self.records:
+                f.write(record.to_json() + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, self.path)
+
+    def _append(self, line):
+        data = (line + '\n').encode('utf-8')
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            # O_APPEND puts the whole line at the end in one write
+            os.write(fd, data)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _write_loop(self):
+        while True:
+            line = self.queue.get()
+            try:
+                if line is None:
+                    return
+                self._append(line)
+            except OSError as e:
+                print(f"Error saving high score: {e}")
+            finally:
+                self.queue.task_done()
+
+    def submit(self, player, score, level=1):
+        """Record a finished game and return its rank (1 is best)."""
+        record = ScoreRecord(player, score, level)
+        self._add(record)
+        self.queue.put(record.to_json())
+        return self.rank_of(len(self.records) - 1)
+
+    def rank_of(self, index):
+        """Return the 1-based rank of the record at index."""
+        return bisect.bisect_left(self.ranking, (-self.records[index].score, index)) + 1
+
+    def __len__(self):
+        return len(self.records)
+
+    def top(self, count=10):
+        """Return the best count records, best first."""
+        return self.page(0, count)
+
+    def page(self, page, per_page=10):
+        """Return one page of the leaderboard, best first."""
+        start = page * per_page
+        return [self.records[index] for _, index in self.ranking[start:start + per_page]]
+
+    def page_count(self, per_page=10):
+        return max(1, -(-len(self.records) // per_page))
+
+    def history(self, player, page=0, per_page=10):
+        """Return one page of a player's games, newest first."""
+        indexes = self.players.get(player, [])
+        end = len(indexes) - page * per_page
+        start = max(0, end - per_page)
+        return [self.records[index] for index in reversed(indexes[start:max(0, end)])]
+
+    def best(self, player=None):
+        """Return the best score overall, or for one player; 0 if none."""
+        if player is None:
+            return -self.ranking[0][0] if self.ranking else 0
+        indexes = self.players.get(player)
+        return max(self.records[index].score for index in indexes) if indexes else 0
+
+    def flush(self):
+        """Wait until every submitted score is on disk."""
+        self.queue.join()
+
+    def close(self):
+        """Write out pending scores and stop the writer thread."""
+        if self.writer.is_alive():
+            self.queue.put(None)
+            self.writer.join()
@@ -1,31 +1,17 @@
 import os
-import multiprocessing
 import threading
 import signal
 import time
 import json
 import pygame
 from pathlib import Path
-from game_os_wrapper import GameOSWrapper
-
-def alien_process(alien_data):
-    """Process for handling individual alien behavior"""
-    while True:
-        try:
-            # Update alien position and check collisions
-            time.sleep(0.016)  # ~60 FPS
-        except Exception as e:
-            print(f"Error in alien process: {e}")
-            break
 
 class GameOSUtils:
     def __init__(self):
-        self.game_os = GameOSWrapper()
         self.powerup_lock = threading.Lock()
         self.music_thread = None
         self.input_thread = None
         self.collision_thread = None
-        self.alien_processes = []
         self.bullet_count = 0
         self.bullet_count_lock = threading.Lock()
         
@@ -0,0 +1,219 @@
+import csv
+import gc
+import time
+
+import numpy as np
+import pygame
+
+# Frame phases in the order run_game goes through them
+PHASES = ('events', 'bridge', 'stars', 'entities', 'hud', 'flip', 'tick_wait')
+
+
+class FrameProfiler:
+    """Per-phase frame timings kept in a rolling ring buffer.
+
+    run_game calls begin_frame(), then mark(phase) as each phase ends,
+    then end_frame(). Every mark stores the time since the previous one.
+    Nothing is recorded while the profiler is disabled, so the only cost
+    left in the loop is a flag check per call. Garbage collections are
+    counted too, as a check that steady play allocates almost nothing,
+    through a gc callback that close() removes.
+    """
+
+    def __init__(self, history=600, enabled=False):
+        self.enabled = enabled
+        self.history = history
+        self.samples = np.zeros((history, len(PHASES)), dtype=np.float32)  # ms
+        self.engine_ticks = np.zeros(history, dtype=np.int64)
+        self.frame_ends = np.zeros(history, dtype=np.float64)
+        self.gc_counts = np.zeros(history, dtype=np.int64)
+        self.collections = 0  # Garbage collections since the profiler was made
+        gc.callbacks.append(self._count_collection)
+        self.phase_index = {name: i for i, name in enumerate(PHASES)}
+        self.index = 0
+        self.count = 0
+        self.frames = 0
+        self.current = [0.0] * len(PHASES)
+        self.last = 0.0
+
+    def _count_collection(self, phase, info):
+        if phase == 'start':
+            self.collections += 1
+
+    def close(self):
+        """Stop counting garbage collections; safe to call twice."""
+        if self._count_collection in gc.callbacks:
+            gc.callbacks.remove(self._count_collection)
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.current = [0.0] * len(PHASES)
+        self.last = time.perf_counter()
+
+    def mark(self, phase):
+        """Charge the time since the last mark to phase."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.current[self.phase_index[phase]] += (now - self.last) * 1000.0
+        self.last = now
+
+    def end_frame(self, engine_tick=0):
+        """Store the finished frame in the ring buffer."""
+        if not self.enabled:
+            return
+        self.samples[self.index] = self.current
+        self.engine_ticks[self.index] = engine_tick
+        self.frame_ends[self.index] = self.last
+        self.gc_counts[self.index] = self.collections
+        self.index = (self.index + 1) % self.history
+        self.count = min(self.count + 1, self.history)
+        self.frames += 1
+
+    def reset(self):
+        """Forget recorded frames and restart timing from now."""
+        self.index = 0
+        self.count = 0
+        self.current = [0.0] * len(PHASES)
+        self.last = time.perf_counter()
+
+    def recent(self):
+        """Return the recorded rows, oldest first."""
+        if self.count < self.history:
+            order = np.arange(self.count)
+        else:
+            order = np.roll(np.arange(self.history), -self.index)
+        return (self.samples[order], self.engine_ticks[order], self.frame_ends[order],
+                self.gc_counts[order])
+
+    def summary(self):
+        """Average phase times, FPS, 1% low FPS, the engine tick rate and
+        garbage collections per second."""
+        samples, ticks, ends, collections = self.recent()
+        if len(samples) < 2:
+            return None
+        totals = samples.sum(axis=1)
+        elapsed = ends[-1] - ends[0]
+        tick_rate = (ticks[-1] - ticks[0]) / elapsed if elapsed > 0 else 0.0
+        gc_rate = (collections[-1] - collections[0]) / elapsed if elapsed > 0 else 0.0
+        return {
+            'phases': dict(zip(PHASES, samples.mean(axis=0).tolist())),
+            'frame_ms': float(totals.mean()),
+            'fps': 1000.0 / float(totals.mean()),
+            'fps_1_low': 1000.0 / float(np.percentile(totals, 99)),
+            'tick_rate': max(0.0, float(tick_rate)),
+            'gc_rate': float(gc_rate),
+        }
+
+    def dump_csv(self, path):
+        """Write the ring buffer as one CSV row per frame."""
+        samples, ticks, _, _ = self.recent()
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['frame'] + [f'{name}_ms' for name in PHASES] + ['total_ms', 'engine_tick'])
+            first = self.frames - len(samples)
+            for i, (row, tick) in enumerate(zip(samples.tolist(), ticks.tolist())):
+                writer.writerow([first + i] + [f'{value:.3f}' for value in row] +
+                                [f'{sum(row):.3f}', tick])
+
+
+class StartupProfiler:
+    """Time each startup step from process start to the first frame.
+
+    The game calls mark(step) as each step ends; the time since the
+    previous mark is charged to that step.
+    """
+
+    def __init__(self, started, enabled=False):
+        self.enabled = enabled
+        self.started = started
+        self.last = started
+        self.steps = []  # (step, ms)
+        self.first_frame = False
+
+    def mark(self, step):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.steps.append((step, (now - self.last) * 1000.0))
+        self.last = now
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000.0
+
+    def report(self):
+        """Return the steps as text lines, ending with the total."""
+        lines = [f"{step:<24}{ms:8.1f} ms" for step, ms in self.steps]
+        lines.append(f"{'time to first frame':<24}{(self.last - self.started) * 1000.0:8.1f} ms")
+        return lines
+
+
+class PerfOverlay:
+    """Draw a FrameProfiler summary in the top left corner.
+
+    The text is re-rendered a few times per second into one surface, so
+    a frame with the overlay up only pays for a single blit.
+    """
+
+    def __init__(self, ai_game, profiler, refresh_frames=15):
+        self.screen = ai_game.screen
+        self.settings = ai_game.settings
+        self.text_cache = ai_game.text_cache
+        self.pool_stats = ai_game.pool_stats
+        self.profiler = profiler
+        self.refresh_frames = refresh_frames
+        self.visible = False
+        self.surface = None
+        self.rendered_at = -refresh_frames
+
+    def toggle(self):
+        """Show or hide the overlay, recording only while it is shown."""
+        self.visible = not self.visible
+        if self.visible:
+            self.profiler.reset()
+            self.profiler.enabled = True
+            self.surface = None
+        elif not self.settings.perf_csv:
+            self.profiler.enabled = False
+
+    def _lines(self, summary):
+        if summary is None:
+            return ['collecting...']
+        lines = [
+            f"FPS {summary['fps']:5.1f}   1% low {summary['fps_1_low']:5.1f}",
+            f"frame {summary['frame_ms']:5.2f} ms   engine {summary['tick_rate']:5.1f} ticks/s",
+        ]
+        for name, ms in summary['phases'].items():
+            lines.append(f"{name:<10}{ms:6.2f} ms")
+        pools = self.pool_stats()
+        lines.append("pools  aliens {}/{}  bullets {}/{}".format(
+            *pools['engine_aliens'], *pools['engine_bullets']))
+        draw = pools['draw_positions']
+        lines.append(f"draw list {draw['live']}/{draw['capacity']}   gc {summary['gc_rate']:4.1f}/s")
+        return lines
+
+    def _render(self):
+        font = self.text_cache.fonts.get(self.settings.perf_font, self.settings.perf_font_size)
+        # Values change every refresh, so these bypass the shared text cache
+        images = [font.render(line, True, self.settings.ui_color)
+                  for line in self._lines(self.profiler.summary())]
+        width = max(image.get_width() for image in images) + 16
+        height = sum(image.get_height() for image in images) + 12
+        surface = pygame.Surface((width, height), pygame.SRCALPHA)
+        surface.fill(self.settings.ui_background_color)
+        y = 6
+        for image in images:
+            surface.blit(image, (8, y))
+            y += image.get_height()
+        self.surface = surface
+
+    def draw(self):
+        """Draw the overlay and return its rect, or None when hidden."""
+        if not self.visible:
+            return None
+        frames = self.profiler.frames
+        if self.surface is None or frames - self.rendered_at >= self.refresh_frames:
+            self._render()
+            self.rendered_at = frames
+        return self.screen.blit(self.surface, (10, 10))
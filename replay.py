@@ -0,0 +1,309 @@
+"""Record game sessions and replay them against the C engine.
+
+A session log is a small binary file: a header with the engine setup
+(pool sizes, tick rate, collision mode and masks) followed by the tick-stamped
+commands the engine journaled while the session was played. Replaying
+feeds those commands back into a headless engine at the same ticks, so
+the game runs out exactly as it did, either at real speed with
+rendering or as fast as the CPU allows:
+
+    python replay.py play replays/session-20240101-120000.airp
+    python replay.py validate replays/*.airp
+
+Checkpoints (tick, score and state hash) are stored when a game is torn
+down and when the session ends; validate re-runs every log and reports
+any checkpoint whose hash no longer matches.
+"""
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+from game_os_wrapper import (GameOSWrapper, CMD_MOVE_PRESS, CMD_MOVE_RELEASE, CMD_FIRE,
+                             CMD_START_GAME, CMD_ADVANCE_LEVEL, COLLISION_MODE_RADIUS,
+                             COLLISION_MODE_MASK)
+
+MAGIC = b'AIRP'
+VERSION = 2
+CMD_CHECKPOINT = 32  # Log only: the recorded tick, score and state hash
+
+# magic, version, collision mode, max aliens, max bullets, ticks per second
+HEADER = struct.Struct('<4sHHIII')
+HEADER_V1 = struct.Struct('<4sHHII')  # Version 1 had no tick rate; it ran at 60
+MASK_HEADER = struct.Struct('<HH')  # width, height, then width * height bytes
+RECORD = struct.Struct('<IBBH')  # tick, type, arg, reserved
+SEED = struct.Struct('<Q')  # follows CMD_START_GAME
+CHECKPOINT = struct.Struct('<iQ')  # score, state hash; follows CMD_CHECKPOINT
+
+INPUT_COMMANDS = (CMD_MOVE_PRESS, CMD_MOVE_RELEASE, CMD_FIRE)
+
+
+class SessionLog:
+    """The parsed contents of a session log."""
+
+    def __init__(self, collision_mode=COLLISION_MODE_RADIUS, max_aliens=1024,
+                 max_bullets=2048, alien_mask=None, bullet_mask=None, records=None,
+                 tick_rate=60):
+        self.collision_mode = collision_mode
+        self.max_aliens = max_aliens
+        self.max_bullets = max_bullets
+        self.tick_rate = tick_rate  # Ticks per second the session was played at
+        self.alien_mask = alien_mask
+        self.bullet_mask = bullet_mask
+        # (tick, type, arg, extra); extra is the seed for CMD_START_GAME
+        # and (score, state_hash) for CMD_CHECKPOINT
+        self.records = records if records is not None else []
+
+
+def _write_mask(f, mask):
+    if mask is None:
+        f.write(MASK_HEADER.pack(0, 0))
+        return
+    mask = np.ascontiguousarray(mask, dtype=np.uint8)
+    height, width = mask.shape
+    f.write(MASK_HEADER.pack(width, height))
+    f.write(mask.tobytes())
+
+
+def _read_mask(data, offset):
+    width, height = MASK_HEADER.unpack_from(data, offset)
+    offset += MASK_HEADER.size
+    if width == 0 or height == 0:
+        return None, offset
+    size = width * height
+    mask = np.frombuffer(data, dtype=np.uint8, count=size, offset=offset).reshape(height, width)
+    return mask.copy(), offset + size
+
+
+def read_session(path):
+    """Parse a session log into a SessionLog."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, collision_mode, max_aliens, max_bullets = HEADER_V1.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a session log")
+    if version == 1:
+        tick_rate = 60
+        offset = HEADER_V1.size
+    elif version == VERSION:
+        tick_rate = HEADER.unpack_from(data, 0)[5]
+        offset = HEADER.size
+    else:
+        raise ValueError(f"{path} has unsupported version {version}")
+    alien_mask, offset = _read_mask(data, offset)
+    bullet_mask, offset = _read_mask(data, offset)
+
+    records = []
+    end = len(data)
+    while offset + RECORD.size <= end:
+        tick, kind, arg, _ = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        extra = None
+        if kind == CMD_START_GAME:
+            if offset + SEED.size > end:
+                break  # Truncated by a crash; keep what came before
+            extra = SEED.unpack_from(data, offset)[0]
+            offset += SEED.size
+        elif kind == CMD_CHECKPOINT:
+            if offset + CHECKPOINT.size > end:
+                break
+            extra = CHECKPOINT.unpack_from(data, offset)
+            offset += CHECKPOINT.size
+        records.append((tick, kind, arg, extra))
+    return SessionLog(collision_mode, max_aliens, max_bullets, alien_mask, bullet_mask, records,
+                      tick_rate)
+
+
+class SessionRecorder:
+    """Write the engine's command journal to a session log.
+
+    Call poll() once per frame to move journal entries into the file,
+    checkpoint() before the engine is torn down, and close() at the end.
+    Only commands that go through the input ring are journaled, so
+    headless step() input rows are not recorded. Checkpoints are only
+    stored once the engine has journaled a start_game(): before that it
+    runs on a random seed the log does not hold, so a replay could never
+    match it.
+    """
+
+    def __init__(self, game_os, path, collision_mode=COLLISION_MODE_RADIUS,
+                 alien_mask=None, bullet_mask=None):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.file = open(path, 'wb')
+        snapshot = game_os.snapshot()
+        self.file.write(HEADER.pack(MAGIC, VERSION, collision_mode,
+                                    snapshot.max_aliens, snapshot.max_bullets, game_os.tick_rate))
+        _write_mask(self.file, alien_mask)
+        _write_mask(self.file, bullet_mask)
+        self.dropped = 0
+        self.attach(game_os)
+
+    def attach(self, game_os):
+        """Start recording from a (new) engine instance."""
+        self.game_os = game_os
+        self.started = False  # Whether this engine's seed is in the log yet
+        game_os.set_journaling(True)
+
+    def _write_entries(self, entries):
+        write = self.file.write
+        for tick, kind, arg, _ in entries:
+            write(RECORD.pack(tick, kind, arg, 0))
+            if kind == CMD_START_GAME:
+                write(SEED.pack(self.game_os.get_seed()))
+                self.started = True
+
+    def _read(self):
+        entries, dropped = self.game_os.read_journal()
+        if dropped > self.dropped:
+            print(f"Warning: {dropped - self.dropped} journal entries lost; "
+                  f"{self.path} will not replay exactly")
+            self.dropped = dropped
+        return entries
+
+    def poll(self):
+        """Append everything the engine journaled since the last poll."""
+        if self.file is None:
+            return
+        self._write_entries(self._read())
+
+    def checkpoint(self):
+        """Store the current tick, score and state hash."""
+        if self.file is None:
+            return
+        tick, score, state_hash, journal_seq = self.game_os.checkpoint()
+        entries = self._read()
+        # Entries journaled after the checkpoint was taken go after it
+        before = [entry for entry in entries if entry[3] < journal_seq]
+        after = [entry for entry in entries if entry[3] >= journal_seq]
+        self._write_entries(before)
+        if self.started:
+            self.file.write(RECORD.pack(tick, CMD_CHECKPOINT, 0, 0))
+            self.file.write(CHECKPOINT.pack(score, state_hash))
+        self._write_entries(after)
+        self.file.flush()
+
+    def close(self):
+        """Checkpoint the final state and close the log."""
+        if self.file is None:
+            return
+        self.checkpoint()
+        self.game_os.set_journaling(False)
+        self.file.close()
+        self.file = None
+
+
+class ReplayPlayer:
+    """Drive a headless engine through a session log.
+
+    advance() steps the engine by up to a number of ticks, applying each
+    logged command at the tick it was recorded at and checking each
+    checkpoint's state hash as it is reached.
+    """
+
+    def __init__(self, engine, session):
+        self.engine = engine
+        self.session = session
+        self.records = session.records
+        self.position = 0
+        self.tick = engine.snapshot().tick
+        self.ticks_run = 0
+        self.checkpoints = []  # (tick, recorded score, score, matches)
+        if session.collision_mode == COLLISION_MODE_MASK:
+            engine.set_collision_masks(session.alien_mask, session.bullet_mask)
+        engine.set_collision_mode(session.collision_mode)
+
+    @property
+    def finished(self):
+        return self.position >= len(self.records)
+
+    @property
+    def mismatches(self):
+        return sum(1 for *_, matches in self.checkpoints if not matches)
+
+    def _apply(self, record):
+        tick, kind, arg, extra = record
+        engine = self.engine
+        if kind in INPUT_COMMANDS:
+            if not engine.push_commands([(kind, arg, 0)]):
+                # Dropping it would make the rest of the replay diverge
+                raise RuntimeError(f"input ring full at tick {tick}; the replay cannot continue")
+        elif kind == CMD_START_GAME:
+            engine.set_seed(extra)
+            engine.start_game()
+            self.tick = 0
+        elif kind == CMD_ADVANCE_LEVEL:
+            engine.advance_level()
+        elif kind == CMD_CHECKPOINT:
+            score, state_hash = extra
+            self.checkpoints.append((tick, score, engine.snapshot().score,
+                                     engine.state_hash() == state_hash))
+
+    def advance(self, max_ticks):
+        """Run up to max_ticks ticks; returns False once the log is done."""
+        records = self.records
+        while self.position < len(records):
+            record = records[self.position]
+            if record[0] <= self.tick:
+                self._apply(record)
+                self.position += 1
+                continue
+            if max_ticks <= 0:
+                return True
+            n = min(max_ticks, record[0] - self.tick)
+            self.engine.step(n)
+            self.tick += n
+            self.ticks_run += n
+            max_ticks -= n
+        return False
+
+    def run(self):
+        """Replay the whole log as fast as possible."""
+        self.advance(float('inf'))
+        return self.checkpoints
+
+
+def validate(path):
+    """Replay one log headless; returns (checkpoints, mismatches, seconds)."""
+    session = read_session(path)
+    start = time.perf_counter()
+    engine = GameOSWrapper(headless=True, max_aliens=session.max_aliens,
+                           max_bullets=session.max_bullets)
+    try:
+        player = ReplayPlayer(engine, session)
+        checkpoints = player.run()
+    finally:
+        engine.cleanup()
+    return checkpoints, player.mismatches, time.perf_counter() - start
+
+
+def main(argv=None):
+    args = sys.argv[1:] if argv is None else argv
+    if len(args) < 2 or args[0] not in ('play', 'validate'):
+        print("usage: python replay.py play LOG | validate LOG [LOG ...]")
+        return 2
+
+    if args[0] == 'play':
+        from alien_invasion import AlienInvasion
+        AlienInvasion(replay_path=args[1]).run_game()
+        return 0
+
+    failed = 0
+    total = time.perf_counter()
+    for path in args[1:]:
+        checkpoints, mismatches, seconds = validate(path)
+        status = 'OK' if mismatches == 0 else f'MISMATCH ({mismatches})'
+        scores = ', '.join(str(score) for _, _, score, _ in checkpoints)
+        print(f"{status:14} {path}  {len(checkpoints)} checkpoint(s), scores [{scores}], {seconds * 1000:.0f} ms")
+        failed += mismatches != 0
+    print(f"{len(args) - 1 - failed}/{len(args) - 1} sessions replayed exactly "
+          f"in {time.perf_counter() - total:.2f} s")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
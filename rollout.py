@@ -0,0 +1,296 @@
+"""Run many headless game sessions in parallel worker processes.
+
+Each worker owns one headless engine and plays whole sessions on it:
+set the seed, start the game, optionally skip ahead to a starting level,
+then step in chunks with inputs from a policy until the game is over or
+the tick budget runs out. Session specs and results travel through
+shared memory blocks that both sides view as NumPy record arrays; the
+queues only carry chunk ranges and completion notices, so nothing per
+session is pickled. Each worker's engine runs outside the GIL in its
+own process, so throughput scales with the number of cores:
+
+    python rollout.py --sessions 512 --ticks 18000 --policy tracker
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from game_os_wrapper import GameOSWrapper, INPUT_STRIDE
+
+SPEC_DTYPE = np.dtype([
+    ('seed', np.uint64),
+    ('max_ticks', np.int64),
+    ('start_level', np.int32),
+    ('policy', np.int32),  # Index into the policies passed to run()
+])
+
+RESULT_DTYPE = np.dtype([
+    ('seed', np.uint64),
+    ('score', np.int64),
+    ('level', np.int32),
+    ('game_over', np.int32),
+    ('ticks', np.int64),
+    ('seconds', np.float64),
+    ('ticks_per_second', np.float64),
+    ('state_hash', np.uint64),
+])
+
+CHUNK_TICKS = 30  # Ticks stepped per policy decision
+
+
+# Policies are called once per chunk as policy(snapshot, rng, n_ticks)
+# and return one (left, right, up, down, fire) row for the whole chunk,
+# an (n_ticks, 5) array, or None to keep the current movement flags.
+# Custom policies must be module-level functions so workers can import them.
+
+FIRE_ROW = np.array([0, 0, 0, 0, 1], dtype=np.intc)
+LEFT_FIRE_ROW = np.array([1, 0, 0, 0, 1], dtype=np.intc)
+RIGHT_FIRE_ROW = np.array([0, 1, 0, 0, 1], dtype=np.intc)
+
+
+def idle_policy(snapshot, rng, n_ticks):
+    """Never move or fire."""
+    return None
+
+
+def fire_policy(snapshot, rng, n_ticks):
+    """Stand still and fire every tick."""
+    return FIRE_ROW
+
+
+def random_policy(snapshot, rng, n_ticks):
+    """Mash random movement and fire keys every tick."""
+    return (rng.random((n_ticks, INPUT_STRIDE)) < 0.3).astype(np.intc)
+
+
+def tracker_policy(snapshot, rng, n_ticks):
+    """Steer under the lowest live alien and keep firing."""
+    aliens = snapshot.active_aliens()
+    if len(aliens) == 0:
+        return FIRE_ROW
+    target = aliens[np.argmax(aliens[:, 1])]
+    offset = int(target[0]) - snapshot.player_x
+    if offset < -10:
+        return LEFT_FIRE_ROW
+    if offset > 10:
+        return RIGHT_FIRE_ROW
+    return FIRE_ROW
+
+
+POLICIES = {
+    'idle': idle_policy,
+    'fire': fire_policy,
+    'random': random_policy,
+    'tracker': tracker_policy,
+}
+
+
+def play_session(engine, seed, max_ticks, start_level, policy, chunk_ticks=CHUNK_TICKS):
+    """Play one session on a headless engine and return its result fields."""
+    start = time.perf_counter()
+    engine.set_seed(seed)
+    engine.start_game()
+    for _ in range(start_level - 1):
+        engine.advance_level()
+
+    rng = np.random.default_rng(seed)
+    snapshot = engine.snapshot()
+    ticks = 0
+    while ticks < max_ticks and not snapshot.game_over:
+        n = min(chunk_ticks, max_ticks - ticks)
+        snapshot = engine.step(n, policy(snapshot, rng, n))
+        ticks += n
+        # The game loop advances levels, not the engine
+        if snapshot.game_active and snapshot.all_aliens_destroyed():
+            engine.advance_level()
+            snapshot = engine.snapshot()
+
+    seconds = time.perf_counter() - start
+    return (seed, snapshot.score, snapshot.level, snapshot.game_over, ticks,
+            seconds, ticks / seconds if seconds > 0 else 0.0, engine.state_hash())
+
+
+class _SharedJob:
+    """A worker's views of one run()'s spec and result blocks."""
+
+    def __init__(self, job_id, spec_name, result_name, count):
+        self.id = job_id
+        self.spec_block = shared_memory.SharedMemory(name=spec_name)
+        self.result_block = shared_memory.SharedMemory(name=result_name)
+        self.specs = np.ndarray((count,), dtype=SPEC_DTYPE, buffer=self.spec_block.buf)
+        self.results = np.ndarray((count,), dtype=RESULT_DTYPE, buffer=self.result_block.buf)
+
+    def close(self):
+        # Views must go before the blocks can be closed
+        self.specs = self.results = None
+        self.spec_block.close()
+        self.result_block.close()
+
+
+def _worker_main(tasks, done, max_aliens, max_bullets):
+    engine = GameOSWrapper(headless=True, max_aliens=max_aliens, max_bullets=max_bullets)
+    job = None
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            job_id, spec_name, result_name, count, policies, chunk_ticks, first, last = task
+            if job is None or job.id != job_id:
+                if job is not None:
+                    job.close()
+                job = _SharedJob(job_id, spec_name, result_name, count)
+            for i in range(first, last):
+                seed, max_ticks, start_level, policy = job.specs[i].item()
+                job.results[i] = play_session(engine, seed, max_ticks, start_level,
+                                              policies[policy], chunk_ticks)
+            done.put((job_id, first, last))
+    finally:
+        if job is not None:
+            job.close()
+        engine.cleanup()
+
+
+class RolloutPool:
+    """A fixed set of worker processes that play headless sessions.
+
+    Workers start once and are reused by every run(); use the pool as a
+    context manager or call close() to stop them. Workers are spawned,
+    not forked, so scripts using the pool need an
+    `if __name__ == '__main__':` guard.
+    """
+
+    def __init__(self, workers=None, max_aliens=None, max_bullets=None):
+        self.workers = workers or os.cpu_count() or 1
+        context = multiprocessing.get_context('spawn')
+        self.tasks = context.Queue()
+        self.done = context.Queue()
+        self.processes = [
+            context.Process(target=_worker_main, name=f'rollout-{i}', daemon=True,
+                            args=(self.tasks, self.done, max_aliens, max_bullets))
+            for i in range(self.workers)
+        ]
+        for process in self.processes:
+            process.start()
+        self.jobs = 0
+        self.last_seconds = 0.0
+
+    def run(self, seeds, max_ticks=18000, start_level=1, policy='random',
+            chunk_ticks=CHUNK_TICKS, sessions_per_task=None):
+        """Play one session per seed and return a RESULT_DTYPE record array.
+
+        max_ticks and start_level may be scalars or one value per seed.
+        policy is a name from POLICIES, a module-level function, or a
+        sequence of either with one entry per seed.
+        """
+        seeds = np.asarray(seeds, dtype=np.uint64).ravel()
+        count = len(seeds)
+        if count == 0:
+            return np.zeros(0, dtype=RESULT_DTYPE)
+
+        if isinstance(policy, (list, tuple)):
+            if len(policy) != count:
+                raise ValueError("need one policy per seed")
+            resolved = [POLICIES.get(p, p) if isinstance(p, str) else p for p in policy]
+            policies = tuple(dict.fromkeys(resolved))
+            policy_index = np.array([policies.index(p) for p in resolved], dtype=np.int32)
+        else:
+            policies = (POLICIES[policy] if isinstance(policy, str) else policy,)
+            policy_index = 0
+
+        spec_block = shared_memory.SharedMemory(create=True, size=count * SPEC_DTYPE.itemsize)
+        result_block = shared_memory.SharedMemory(create=True, size=count * RESULT_DTYPE.itemsize)
+        try:
+            specs = np.ndarray((count,), dtype=SPEC_DTYPE, buffer=spec_block.buf)
+            specs['seed'] = seeds
+            specs['max_ticks'] = max_ticks
+            specs['start_level'] = start_level
+            specs['policy'] = policy_index
+            shared_results = np.ndarray((count,), dtype=RESULT_DTYPE, buffer=result_block.buf)
+            shared_results[:] = 0
+
+            # Several small tasks per worker keep them all busy to the end
+            per_task = sessions_per_task or max(1, count // (self.workers * 4))
+            self.jobs += 1
+            start = time.perf_counter()
+            pending = 0
+            for first in range(0, count, per_task):
+                self.tasks.put((self.jobs, spec_block.name, result_block.name, count,
+                                policies, chunk_ticks, first, min(count, first + per_task)))
+                pending += 1
+            while pending:
+                try:
+                    job_id, _, _ = self.done.get(timeout=1.0)
+                except queue.Empty:
+                    dead = [p.name for p in self.processes if not p.is_alive()]
+                    if dead:
+                        raise RuntimeError(f"rollout workers died: {', '.join(dead)}")
+                    continue
+                if job_id == self.jobs:
+                    pending -= 1
+            self.last_seconds = time.perf_counter() - start
+
+            results = shared_results.copy()
+            del specs, shared_results
+        finally:
+            spec_block.close()
+            spec_block.unlink()
+            result_block.close()
+            result_block.unlink()
+        return results
+
+    def close(self):
+        """Stop every worker and wait for them to exit."""
+        for _ in self.processes:
+            self.tasks.put(None)
+        for process in self.processes:
+            process.join()
+        self.processes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def summarize(results, seconds):
+    """Return a few lines describing a batch of results."""
+    ticks = int(results['ticks'].sum())
+    levels, counts = np.unique(results['level'], return_counts=True)
+    return [
+        f"{len(results)} sessions, {ticks} ticks in {seconds:.2f} s "
+        f"({ticks / seconds:,.0f} ticks/s overall)",
+        f"score mean {results['score'].mean():.1f}, median {np.median(results['score']):.0f}, "
+        f"max {results['score'].max()}",
+        f"game over in {int(results['game_over'].sum())} sessions; levels reached: " +
+        ', '.join(f"{level}: {n}" for level, n in zip(levels.tolist(), counts.tolist())),
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=256)
+    parser.add_argument('--workers', type=int, default=None, help='defaults to the CPU count')
+    parser.add_argument('--ticks', type=int, default=18000, help='tick budget per session')
+    parser.add_argument('--start-level', type=int, default=1)
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='random')
+    parser.add_argument('--seed', type=int, default=0, help='first seed; sessions use seed..seed+n-1')
+    args = parser.parse_args(argv)
+
+    seeds = np.arange(args.seed, args.seed + args.sessions, dtype=np.uint64)
+    with RolloutPool(args.workers) as pool:
+        results = pool.run(seeds, args.ticks, args.start_level, args.policy)
+        print(f"{pool.workers} workers")
+        for line in summarize(results, pool.last_seconds):
+            print(line)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -14,7 +14,8 @@ class Scoreboard:
         
         # Font settings for scoring information
         self.text_color = (255, 255, 255)
-        self.font = pygame.font.SysFont(None, 48)
+        self.text_cache = ai_game.text_cache
+        self.font = self.text_cache.fonts.get(None, 48)
         
         # Prepare the initial score image
         self.prep_score()
@@ -24,7 +25,7 @@ class Scoreboard:
     def prep_score(self):
         """Turn the score into a rendered image."""
         score_str = f"Score: {self.stats.score}"
-        self.score_image = self.font.render(score_str, True, self.text_color)
+        self.score_image = self.text_cache.render(self.font, score_str, self.text_color)
         
         # Display the score at the top right of the screen
         self.score_rect = self.score_image.get_rect()
@@ -34,7 +35,7 @@ class Scoreboard:
     def prep_level(self):
         """Turn the level into a rendered image."""
         level_str = f"Level: {self.stats.level}"
-        self.level_image = self.font.render(level_str, True, self.text_color)
+        self.level_image = self.text_cache.render(self.font, level_str, self.text_color)
         
         # Position the level below the score
         self.level_rect = self.level_image.get_rect()
@@ -44,7 +45,7 @@ class Scoreboard:
     def prep_ships(self):
         """Show how many ships are left."""
         ships_str = f"Ships: {self.stats.ships_left}"
-        self.ships_image = self.font.render(ships_str, True, self.text_color)
+        self.ships_image = self.text_cache.render(self.font, ships_str, self.text_color)
         
         # Position the ships count below the level
         self.ships_rect = self.ships_image.get_rect()
@@ -1,3 +1,6 @@
+import os
+
+
 class Settings:
     #This class will store all of the settings for Alien Invasion
 
@@ -40,9 +43,65 @@ class Settings:
         self.ui_color = (255, 255, 255)
         self.ui_highlight_color = (255, 255, 0)  # Yellow for highlighted text
         self.ui_background_color = (0, 0, 0, 128)  # Semi-transparent black
+        self.text_cache_size = 256  # Max rendered text surfaces kept around
+
+        # Rendering settings
+        self.dirty_rect_rendering = False  # Only redraw regions that changed
+        # Past this many rects, or this fraction of the screen, a frame is
+        # drawn and flipped in full instead; tracking would cost more
+        self.dirty_rect_max_rects = 256
+        self.dirty_rect_max_area = 0.5
+        # Frames drawn per second, independent of the simulation. 0 follows
+        # the display's refresh rate (60 if it can't be read)
+        self.render_fps = 0
+        # Draw entities between the last two ticks instead of snapping to
+        # the newest one, so motion is smooth at any frame rate
+        self.interpolate = True
+
+        # Simulation ticks per second. Entity speeds are per tick, so this
+        # also sets how fast the game plays
+        self.tick_rate = 60
+
+        # Engine entity pool sizes, fixed when the engine starts
+        self.max_aliens = 1024
+        self.max_bullets = 2048
+
+        # Collision settings
+        self.precise_collisions = False  # Pixel masks instead of a 30px radius
+
+        # Leaderboard
+        self.player_name = 'Player'
+        self.high_score_file = 'high_scores.jsonl'  # Append-only, one game per line
+        self.high_scores_per_page = 10
+
+        # Session recording, replayed with `python replay.py`
+        self.record_sessions = True
+        self.replay_dir = 'replays'
+
+        # Name other processes use to watch the game (python spectator.py),
+        # e.g. 'alien-invasion-{pid}' where {pid} is the game's process id.
+        # None (the default) keeps the game private.
+        self.spectator_name = None
+
+        # Decode the background and open the music on a loader thread, so
+        # the start screen shows as soon as the window exists
+        self.background_loading = True
+        # Images prescaled in display byte order (python asset_bundle.py),
+        # next to the game like images/ and rebuilt automatically when
+        # missing or when a source image changes; None to skip
+        self.asset_bundle = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                         'assets.bundle')
+
+        # Performance overlay (toggle with F3)
+        self.perf_overlay = False
+        self.perf_history = 600  # Frames kept in the timing ring buffer
+        self.perf_csv = None  # Path to dump frame timings to on exit, or None
+        self.perf_font = 'monospace'
+        self.perf_font_size = 16
 
         # Star field settings
         self.star_count = 100
         self.star_speed = 1.0
         self.star_color = (255, 255, 255)
-        self.star_size = 2
\ No newline at end of file
+        self.star_size = 2
+        self.star_layers = 3  # Parallax layers, one scroll speed each
\ No newline at end of file
@@ -11,9 +11,8 @@ class Ship(Sprite):
         self.settings = ai_game.settings
         self.screen_rect = ai_game.screen.get_rect()
 
-        #Load the ship image and get its rect.
-        original_image = pygame.image.load('images/ship.png')
-        self.image = pygame.transform.scale(original_image, (45, 65))
+        #Get the shared ship image and its rect.
+        self.image = ai_game.sprites.get('ship')
         self.rect = self.image.get_rect()
 
         #Start each new ship at the bottom center of the screen.
@@ -48,8 +47,8 @@ class Ship(Sprite):
         self.rect.y = self.y
 
     def blitme(self):
-        """Draw the ship at its current location."""
-        self.screen.blit(self.image, self.rect)
+        """Draw the ship at its current location and return the drawn rect."""
+        return self.screen.blit(self.image, self.rect)
 
     def center_ship(self):
         """Center the ship on the screen."""
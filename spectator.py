@@ -0,0 +1,272 @@
+"""Follow a live game from another process.
+
+A game started with a name (python alien_invasion.py --spectate,
+settings.spectator_name or GameOSWrapper(name=...)) keeps its state in a SysV shared memory segment
+whose key is derived from that name. SpectatorClient attaches the
+segment read-only (SHM_RDONLY, so the kernel refuses writes) and copies
+the engine's published frames with the same seqlock protocol the game
+itself uses: no locks, no syscalls per frame and no work at all on the
+game's side.
+
+    python spectator.py              # list live games, follow the only one
+    python spectator.py NAME         # follow one game
+"""
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+from game_os_wrapper import (GameSnapshot, SNAPSHOT_HEADER_SIZE, ALIEN_STRIDE, BULLET_STRIDE,
+                             SNAP_NUM_ALIENS, SNAP_NUM_BULLETS)
+
+# Kept in sync with SegmentHeader in game_os.h
+SEGMENT_MAGIC = 0x53474941
+SEGMENT_VERSION = 2
+SEGMENT_KEY_PREFIX = 0x41000000
+SEGMENT_HEADER = struct.Struct('<IIIiIIQQQQQii64s')
+CLOSED_OFFSET = 16  # SegmentHeader.closed
+SHM_RDONLY = 0o10000
+
+# A frame stays mid-write (odd sequence) for microseconds. Every
+# STALL_CHECK reads of one, check the game is still alive; give up if it
+# is gone or the frame has been mid-write for STALL_TIMEOUT seconds
+STALL_CHECK = 1000
+STALL_TIMEOUT = 1.0
+
+_libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+_libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+_libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+_libc.shmat.restype = ctypes.c_void_p
+_libc.shmdt.argtypes = [ctypes.c_void_p]
+
+
+def segment_key(name):
+    """The SysV key game_os.c uses for a named engine."""
+    h = 0x811C9DC5
+    for byte in name.encode():
+        h = ((h ^ byte) * 0x01000193) & 0xFFFFFFFF
+    key = SEGMENT_KEY_PREFIX | (h & 0x00FFFFFF)
+    return key - (1 << 32) if key >= 1 << 31 else key  # key_t is signed
+
+
+def _attach(shm_id):
+    address = _libc.shmat(shm_id, None, SHM_RDONLY)
+    if address in (None, ctypes.c_void_p(-1).value):
+        raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+    return address
+
+
+class SegmentInfo:
+    """The fields of a segment's SegmentHeader."""
+
+    def __init__(self, data):
+        (self.magic, self.version, self.header_size, self.owner_pid, self.closed,
+         self.tick_rate, self.segment_size, self.frames_offset, self.frame_ints,
+         self.frame_seq_offset, self.front_frame_offset, self.max_aliens,
+         self.max_bullets, name) = SEGMENT_HEADER.unpack(data)
+        self.name = name.split(b'\0', 1)[0].decode(errors='replace')
+
+
+def _read_info(address):
+    return SegmentInfo(ctypes.string_at(address, SEGMENT_HEADER.size))
+
+
+def list_games():
+    """Return SegmentInfo for every named game on this machine (Linux only)."""
+    try:
+        with open('/proc/sysvipc/shm') as f:
+            rows = f.read().splitlines()[1:]
+    except OSError:
+        return []
+    games = []
+    for row in rows:
+        fields = row.split()
+        key, shm_id = int(fields[0]) & 0xFFFFFFFF, int(fields[1])
+        if key & 0xFF000000 != SEGMENT_KEY_PREFIX:
+            continue
+        try:
+            address = _attach(shm_id)
+        except OSError:
+            continue
+        try:
+            info = _read_info(address)
+        finally:
+            _libc.shmdt(address)
+        if info.magic == SEGMENT_MAGIC and not info.closed:
+            games.append(info)
+    return games
+
+
+class SpectatorClient:
+    """A read-only view of a named game running in another process.
+
+    snapshot() returns a GameSnapshot, the same type GameOSWrapper gives
+    the game itself, refilled in place on every call. If the game
+    replaces its engine (a new game from the Play button), the client
+    follows the new segment under the same name.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.address = None
+        self._snapshot = None
+        self.attach()
+
+    def attach(self):
+        """Attach the game's current segment; raises OSError if there is
+        none, keeping any segment already attached."""
+        shm_id = _libc.shmget(segment_key(self.name), 0, 0)
+        if shm_id == -1:
+            raise OSError(ctypes.get_errno(), f"no game named {self.name!r}")
+        address = _attach(shm_id)
+        info = _read_info(address)
+        if info.magic != SEGMENT_MAGIC or info.version != SEGMENT_VERSION:
+            _libc.shmdt(address)
+            raise OSError(f"{self.name!r} is not a version {SEGMENT_VERSION} game segment")
+        self.detach()
+        self.address = address
+        self.info = info
+
+        # Zero-copy views over the mapping; all of them are read-only
+        memory = (ctypes.c_char * info.segment_size).from_address(address)
+        data = np.frombuffer(memory, dtype=np.uint8)
+        data.flags.writeable = False
+        self._closed = data[CLOSED_OFFSET:CLOSED_OFFSET + 4].view(np.uint32)
+        self._front = data[info.front_frame_offset:info.front_frame_offset + 4].view(np.uint32)
+        self._seq = data[info.frame_seq_offset:info.frame_seq_offset + 8].view(np.uint32)
+        frames_end = info.frames_offset + 2 * info.frame_ints * 4
+        self._frames = data[info.frames_offset:frames_end].view(np.intc).reshape(2, info.frame_ints)
+        self._bullets_start = SNAPSHOT_HEADER_SIZE + info.max_aliens * ALIEN_STRIDE
+        if (self._snapshot is None or self._snapshot.max_aliens != info.max_aliens
+                or self._snapshot.max_bullets != info.max_bullets):
+            self._snapshot = GameSnapshot(info.max_aliens, info.max_bullets)
+
+    def detach(self):
+        if self.address is not None:
+            self._closed = self._front = self._seq = self._frames = None
+            _libc.shmdt(self.address)
+            self.address = None
+
+    @property
+    def closed(self):
+        """True once the engine that owns the attached segment is gone."""
+        return bool(self._closed[0])
+
+    def _writer_alive(self):
+        if self.closed:
+            return False
+        try:
+            os.kill(self.info.owner_pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass  # Alive, owned by someone else
+        return True
+
+    def snapshot(self):
+        """Copy the latest published frame, following the game to a new
+        segment if its engine was replaced.
+
+        Raises OSError if the game died (or stalled) in the middle of
+        publishing, rather than waiting forever for the frame to finish.
+        """
+        if self.closed:
+            try:
+                self.attach()
+            except OSError:
+                pass  # Between engines, or the game has exited
+        snap = self._snapshot
+        previous = snap.sequence
+        frames, seq = self._frames, self._seq
+        stalled = 0
+        while True:
+            front = int(self._front[0])
+            start = int(seq[front])
+            if start & 1:
+                stalled += 1
+                if stalled % STALL_CHECK == 0:
+                    now = time.perf_counter()
+                    if stalled == STALL_CHECK:
+                        stall_began = now
+                    if not self._writer_alive() or now - stall_began > STALL_TIMEOUT:
+                        raise OSError(f"{self.name!r} stopped in the middle of publishing a frame")
+                    time.sleep(0)
+                continue
+            frame = frames[front]
+            snap.header[:] = frame[:SNAPSHOT_HEADER_SIZE]
+            n_aliens = min(max(int(snap.header[SNAP_NUM_ALIENS]), 0), snap.max_aliens)
+            n_bullets = min(max(int(snap.header[SNAP_NUM_BULLETS]), 0), snap.max_bullets)
+            aliens_end = SNAPSHOT_HEADER_SIZE + n_aliens * ALIEN_STRIDE
+            snap._aliens[:n_aliens] = frame[SNAPSHOT_HEADER_SIZE:aliens_end].reshape(-1, ALIEN_STRIDE)
+            bullets = self._bullets_start
+            bullets_end = bullets + n_bullets * BULLET_STRIDE
+            snap._bullets[:n_bullets] = frame[bullets:bullets_end].reshape(-1, BULLET_STRIDE)
+            if int(seq[front]) == start:
+                snap.header[SNAP_NUM_ALIENS] = n_aliens
+                snap.header[SNAP_NUM_BULLETS] = n_bullets
+                break
+        snap.is_new = snap.sequence != previous
+        return snap
+
+    def wait_for_frame(self, timeout=1.0, poll=0.001):
+        """Block until the game publishes a new frame; returns None on timeout."""
+        deadline = time.perf_counter() + timeout
+        while True:
+            snap = self.snapshot()
+            if snap.is_new or time.perf_counter() >= deadline:
+                return snap if snap.is_new else None
+            time.sleep(poll)
+
+    def close(self):
+        self.detach()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None):
+    args = sys.argv[1:] if argv is None else argv
+    if args:
+        name = args[0]
+    else:
+        games = list_games()
+        for info in games:
+            print(f"{info.name}  pid {info.owner_pid}  {info.max_aliens} aliens / "
+                  f"{info.max_bullets} bullets")
+        if len(games) != 1:
+            print("no live games" if not games else "usage: python spectator.py NAME")
+            return 0 if games else 1
+        name = games[0].name
+
+    with SpectatorClient(name) as client:
+        print(f"following {name} (pid {client.info.owner_pid}); Ctrl+C to stop")
+        frames, last_report = 0, time.perf_counter()
+        try:
+            while True:
+                snap = client.wait_for_frame()
+                if snap is not None:
+                    frames += 1
+                now = time.perf_counter()
+                if now - last_report >= 1.0:
+                    snap = client.snapshot()
+                    print(f"tick {snap.tick:8d}  score {snap.score:6d}  level {snap.level:3d}  "
+                          f"health {snap.player_health:4d}  aliens {len(snap.aliens):5d}  "
+                          f"{frames / (now - last_report):5.1f} frames/s")
+                    frames, last_report = 0, now
+        except KeyboardInterrupt:
+            pass
+        except OSError as e:
+            print(e)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
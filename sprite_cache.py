@@ -0,0 +1,169 @@
+import os
+import numpy as np
+import pygame
+
+# name: (file in images/, in-game size, has per-pixel alpha, fallback color)
+SPRITE_SPECS = {
+    'ship': ('ship.png', (45, 65), True, (200, 200, 200)),
+    'alien': ('alien2.png', (75, 50), True, (0, 255, 0)),
+    'alien_bullet': ('alien_bullet.png', (3, 15), True, (255, 0, 0)),
+}
+
+def bundle_specs(settings):
+    """Every image loaded from a file: SPRITE_SPECS plus the background."""
+    specs = {'background': ('background.jpg', (settings.screen_width, settings.screen_height),
+                            False, settings.bg_color)}
+    specs.update(SPRITE_SPECS)
+    return specs
+
+
+def collision_mask(surface, threshold=127):
+    """Return a (height, width) uint8 array marking the opaque pixels of a surface.
+
+    Works for per-pixel alpha and colorkeyed surfaces alike.
+    """
+    mask = pygame.mask.from_surface(surface, threshold)
+    solid = mask.to_surface(setcolor=(255, 255, 255, 255), unsetcolor=(0, 0, 0, 255))
+    return (pygame.surfarray.array_red(solid).T > 0).astype(np.uint8)
+
+
+class SpriteCache:
+    """Load, convert and scale every game sprite once.
+
+    Surfaces are converted to the display's pixel format up front so
+    blits never pay a format conversion, and are shared by every
+    entity that draws them. Sprites with per-pixel alpha are also RLE
+    encoded, so blits skip their clear pixels and copy runs of opaque
+    ones instead of blending every pixel.
+
+    Given an AssetLoader, image files are decoded and scaled on the
+    loader thread instead. Until an image is ready, get() returns a
+    placeholder of the same size (bg_color for the background, clear
+    for sprites); poll() swaps the real surfaces in and wait() blocks
+    until they all are.
+
+    With a bundle_path, images come from the prebuilt bundle instead
+    (see asset_bundle.py) when it matches the source files. Otherwise
+    they are decoded as above and the bundle is rebuilt for the next
+    start: on the loader thread if there is one, or right away.
+    """
+
+    def __init__(self, settings, image_dir=None, loader=None, bundle_path=None):
+        self.image_dir = image_dir or self.default_image_dir()
+        self.settings = settings
+        self.surfaces = {}
+        self.loader = loader
+        self.deferred = {}  # name -> (alpha, fallback) still being decoded by the loader
+
+        specs = bundle_specs(settings)
+        bundled = {}
+        decoded = {}  # name -> (image, alpha) decoded here, for the bundle
+        if bundle_path:
+            # Only imported when the bundle is in use
+            from asset_bundle import bundle_key, read_bundle, write_bundle
+            key = bundle_key(specs, self.image_dir)
+            bundled = read_bundle(bundle_path, key) or {}
+        for name, (filename, size, alpha, fallback) in specs.items():
+            if name in bundled:
+                self._store(name, bundled[name][0])
+                continue
+            if loader is None:
+                self._store(name, self._load(filename, size, alpha, fallback, decoded, name))
+                continue
+            placeholder = pygame.Surface(size, pygame.SRCALPHA if alpha else 0)
+            if not alpha:
+                placeholder.fill(fallback)
+            self._store(name, placeholder.convert_alpha() if alpha else placeholder.convert())
+            loader.submit(name, lambda filename=filename, size=size: self._decode(filename, size))
+            self.deferred[name] = (alpha, fallback)
+        if bundle_path and not bundled:
+            if loader is not None:
+                loader.submit('asset bundle', lambda: self._write_bundle(bundle_path, key, specs))
+            else:
+                try:
+                    write_bundle(bundle_path, key, decoded)
+                except OSError:
+                    pass  # Read-only install; decode again next start
+
+        # The player bullet is a plain filled rectangle
+        bullet = pygame.Surface((settings.bullet_width, settings.bullet_height))
+        bullet.fill(settings.bullet_color)
+        self.surfaces['bullet'] = bullet.convert()
+
+    @staticmethod
+    def default_image_dir():
+        return os.path.join(os.path.dirname(os.path.abspath(__file__)), 'images')
+
+    def _write_bundle(self, path, key, specs):
+        """Bundle the images the loader just decoded; runs on the loader thread."""
+        from asset_bundle import write_bundle
+        images = {}
+        for name in specs:
+            try:
+                images[name] = (self.loader.result(name), specs[name][2])
+            except (pygame.error, FileNotFoundError):
+                continue  # Missing source; the key records it as missing
+        write_bundle(path, key, images)
+        return path
+
+    def _store(self, name, surface):
+        if surface.get_flags() & pygame.SRCALPHA:
+            surface.set_alpha(255, pygame.RLEACCEL)
+        self.surfaces[name] = surface
+
+    def _decode(self, filename, size):
+        """Load one image scaled to its in-game size; needs no display."""
+        image = pygame.image.load(os.path.join(self.image_dir, filename))
+        return pygame.transform.scale(image, size)
+
+    def _load(self, filename, size, alpha, fallback, decoded=None, name=None):
+        """Load one image scaled to its in-game size, or a filled rect if missing.
+
+        Successfully decoded images are also put in decoded[name].
+        """
+        try:
+            image = self._decode(filename, size)
+            if decoded is not None:
+                decoded[name] = (image, alpha)
+        except (pygame.error, FileNotFoundError):
+            image = pygame.Surface(size)
+            image.fill(fallback)
+            alpha = False
+        return image.convert_alpha() if alpha else image.convert()
+
+    def poll(self):
+        """Convert and swap in images the loader has finished; returns their names."""
+        updated = []
+        for name, (alpha, fallback) in list(self.deferred.items()):
+            if not self.loader.ready(name):
+                continue
+            del self.deferred[name]
+            try:
+                image = self.loader.result(name)
+            except (pygame.error, FileNotFoundError):
+                # Missing file: a filled rect, as _load() would make
+                image = pygame.Surface(self.surfaces[name].get_size())
+                image.fill(fallback)
+                alpha = False
+            self._store(name, image.convert_alpha() if alpha else image.convert())
+            updated.append(name)
+        return updated
+
+    def wait(self):
+        """Block until every deferred image is loaded; returns their names."""
+        for name in list(self.deferred):
+            self.loader.wait(name)
+        return self.poll()
+
+    def get(self, name):
+        """Return the shared surface for a sprite name."""
+        return self.surfaces[name]
+
+    def mask(self, name):
+        """Return the collision mask for a sprite, built once on first use."""
+        key = ('mask', name)
+        if key not in self.surfaces:
+            if name in self.deferred:
+                self.wait()  # Masks come from the real image, not the placeholder
+            self.surfaces[key] = collision_mask(self.surfaces[name])
+        return self.surfaces[key]
@@ -1,38 +1,96 @@
+import numpy as np
 import pygame
-import random
-
-class Star:
-    def __init__(self, screen, settings):
-        self.screen = screen
-        self.settings = settings
-        self.reset()
-        
-    def reset(self):
-        self.x = random.randint(0, self.settings.screen_width)
-        self.y = random.randint(0, self.settings.screen_height)
-        self.speed = random.uniform(0.5, self.settings.star_speed)
-        self.size = random.randint(1, self.settings.star_size)
-        
-    def update(self):
-        self.y += self.speed
-        if self.y > self.settings.screen_height:
-            self.reset()
-            self.y = 0
-            
-    def draw(self):
-        pygame.draw.circle(self.screen, self.settings.star_color, 
-                         (int(self.x), int(self.y)), self.size)
 
 class StarField:
-    def __init__(self, screen, settings):
+    """A scrolling star field backed by NumPy arrays.
+
+    Star positions, speeds and sizes live in arrays. Stars are grouped
+    into parallax layers that share a speed, so advancing the field is
+    one vectorized step over the layer offsets. Each layer is baked once
+    into an RLE colorkeyed texture and drawn with two blits, so the cost
+    barely depends on settings.star_count. When dirty-rect rendering
+    tracks a frame, stars are instead drawn as pre-baked stamps so each
+    one has a rect to track.
+    """
+
+    def __init__(self, screen, settings, seed=None):
         self.screen = screen
         self.settings = settings
-        self.stars = [Star(screen, settings) for _ in range(settings.star_count)]
-        
+        self.width = settings.screen_width
+        self.height = settings.screen_height
+        rng = np.random.default_rng(seed)
+
+        count = settings.star_count
+        layers = max(1, settings.star_layers)
+        self.layer_speeds = np.linspace(0.5, max(0.5, settings.star_speed), layers)
+        self.offsets = np.zeros(layers)
+
+        # Per-star data; y is the position within its layer texture
+        self.x = rng.integers(0, self.width, count)
+        self.y = rng.integers(0, self.height, count)
+        self.layer = rng.integers(0, layers, count)
+        self.speed = self.layer_speeds[self.layer]
+        self.size = rng.integers(1, settings.star_size + 1, count)
+
+        self.stamps = {size: self._make_stamp(size) for size in range(1, settings.star_size + 1)}
+        self.star_stamps = [self.stamps[size] for size in self.size.tolist()]
+        self.layers = [self._bake_layer(i) for i in range(layers)]
+
+    def _make_stamp(self, size):
+        """Pre-render one star of the given radius."""
+        stamp = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+        pygame.draw.circle(stamp, self.settings.star_color, (size, size), size)
+        return stamp
+
+    def _bake_layer(self, index):
+        """Draw all stars of one layer into a texture the size of the screen."""
+        key = (0, 0, 0) if tuple(self.settings.star_color) != (0, 0, 0) else (255, 0, 255)
+        layer = pygame.Surface((self.width, self.height))
+        layer.fill(key)
+        members = np.flatnonzero(self.layer == index)
+        for shift in (0, -self.height, self.height):
+            # Stars on the top or bottom edge wrap so the tiled layer has no seam
+            if shift:
+                edge = np.abs(self.y[members] + shift - self.height // 2) < self.height // 2 + self.size[members]
+                stars = members[edge]
+            else:
+                stars = members
+            layer.blits([(self.star_stamps[i], (x - size, y + shift - size))
+                         for i, x, y, size in zip(stars.tolist(),
+                                                  self.x[stars].tolist(),
+                                                  self.y[stars].tolist(),
+                                                  self.size[stars].tolist())],
+                        doreturn=False)
+        layer = layer.convert()
+        layer.set_colorkey(key, pygame.RLEACCEL)
+        return layer
+
     def update(self):
-        for star in self.stars:
-            star.update()
-            
-    def draw(self):
-        for star in self.stars:
-            star.draw() 
\ No newline at end of file
+        """Advance every layer by its speed."""
+        self.offsets += self.layer_speeds
+        np.mod(self.offsets, self.height, out=self.offsets)
+
+    def positions(self):
+        """Return the current on-screen (x, y) of every star."""
+        y = (self.y + self.offsets[self.layer].astype(int)) % self.height
+        return self.x, y
+
+    def draw(self, stamps=False):
+        """Draw the star field and return the rects it covers.
+
+        With stamps, every star is drawn on its own so each has a rect.
+        """
+        if stamps:
+            return self._draw_stamps()
+
+        blit = self.screen.blit
+        for layer, offset in zip(self.layers, self.offsets.astype(int).tolist()):
+            blit(layer, (0, offset - self.height))
+            blit(layer, (0, offset))
+        return [self.screen.get_rect()]
+
+    def _draw_stamps(self):
+        """Draw each star as a stamp, returning one rect per star."""
+        x, y = self.positions()
+        return self.screen.blits(zip(self.star_stamps,
+                                     zip((x - self.size).tolist(), (y - self.size).tolist())))
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from game_os_wrapper import COLLISION_MODE_MASK, COLLISION_MODE_RADIUS, GameOSWrapper
+
+
+@pytest.fixture
+def engine():
+    engine = GameOSWrapper(headless=True, seed=3, max_aliens=512, max_bullets=64)
+    engine.start_game()
+    yield engine
+    engine.cleanup()
+
+
+def random_layout(rng, count):
+    """Aliens spread over the screen and a little past its edges, some clustered."""
+    spread = rng.integers((-100, -100), (1300, 900), (count // 2, 2))
+    centers = rng.integers((0, 0), (1200, 800), (4, 2))
+    clusters = centers[rng.integers(0, 4, count - count // 2)] + rng.integers(-40, 40, (count - count // 2, 2))
+    return np.concatenate([spread, clusters])
+
+
+def probe_points(rng, layout, count):
+    """Bullet positions near aliens, so most probes have candidates to choose from."""
+    near = layout[rng.integers(0, len(layout), count)] + rng.integers(-80, 80, (count, 2))
+    anywhere = rng.integers((-50, -50), (1250, 850), (count, 2))
+    return np.concatenate([near, anywhere])
+
+
+@pytest.mark.parametrize('mode', [COLLISION_MODE_RADIUS, COLLISION_MODE_MASK])
+def test_grid_matches_full_scan(engine, mode):
+    rng = np.random.default_rng(8)
+    engine.set_collision_mode(mode)
+    if mode == COLLISION_MODE_MASK:
+        engine.set_collision_masks(rng.integers(0, 2, (50, 75)), np.ones((15, 3)))
+    hits = 0
+    for count in (1, 20, 200, 512):
+        layout = random_layout(rng, count)
+        assert engine.load_aliens(layout) == count
+        for x, y in probe_points(rng, layout, 300).tolist():
+            expected = engine.probe_alien_hit(x, y, full_scan=True)
+            assert engine.probe_alien_hit(x, y) == expected, (count, x, y)
+            hits += expected >= 0
+    assert hits > 100  # Enough probes actually hit something
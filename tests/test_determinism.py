@@ -0,0 +1,44 @@
+import numpy as np
+
+from game_os_wrapper import GameOSWrapper, INPUT_STRIDE
+
+
+def play(seed, inputs):
+    """Run one headless game and return its state hash after every chunk."""
+    engine = GameOSWrapper(headless=True, seed=seed)
+    try:
+        engine.start_game()
+        hashes = []
+        for chunk in np.split(inputs, 6):
+            engine.step(len(chunk), chunk)
+            hashes.append(engine.state_hash())
+        return hashes, engine.snapshot().score
+    finally:
+        engine.cleanup()
+
+
+def random_inputs(ticks=600, seed=0):
+    rng = np.random.default_rng(seed)
+    inputs = rng.integers(0, 2, (ticks, INPUT_STRIDE)).astype(np.intc)
+    inputs[:, 0] &= 1 - inputs[:, 1]  # Never left and right at once
+    return inputs
+
+
+def test_same_seed_and_inputs_give_the_same_hash():
+    inputs = random_inputs()
+    first, score = play(42, inputs)
+    second, second_score = play(42, inputs)
+    assert first == second
+    assert score == second_score
+    assert len(set(first)) == len(first)  # The state actually changes
+
+
+def test_seed_and_inputs_change_the_hash():
+    inputs = random_inputs()
+    hashes, _ = play(42, inputs)
+    assert play(43, inputs)[0][-1] != hashes[-1]
+    other = inputs.copy()
+    other[300:, 4] ^= 1  # Fire on different ticks from the middle on
+    changed, _ = play(42, other)
+    assert changed[:3] == hashes[:3]
+    assert changed[-1] != hashes[-1]
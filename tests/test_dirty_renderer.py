@@ -0,0 +1,35 @@
+import pygame
+import pytest
+
+from star_field import StarField
+
+
+@pytest.fixture
+def game(tmp_path, monkeypatch):
+    # The recorder and leaderboard write relative to the cwd
+    monkeypatch.chdir(tmp_path)
+    from alien_invasion import AlienInvasion
+    from settings import Settings
+    settings = Settings()
+    settings.asset_bundle = str(tmp_path / 'assets.bundle')
+    ai = AlienInvasion(settings=settings)
+    ai._poll_assets(wait=True)
+    yield ai
+    ai.cleanup()
+
+
+def render_frames(ai, dirty, frames=20):
+    ai.settings.dirty_rect_rendering = dirty
+    ai.star_field = StarField(ai.screen, ai.settings, seed=3)
+    ai.renderer.invalidate()
+    images = []
+    for _ in range(frames):
+        ai.update_screen()
+        images.append(pygame.image.tostring(ai.screen, 'RGB'))
+    return images
+
+
+@pytest.mark.parametrize('high_scores', [False, True])
+def test_dirty_menu_frames_match_full_frames(game, high_scores):
+    game.showing_high_scores = high_scores
+    assert render_frames(game, dirty=True) == render_frames(game, dirty=False)
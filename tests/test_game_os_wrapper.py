@@ -0,0 +1,44 @@
+import pytest
+
+from game_os_wrapper import CMD_FIRE, INPUT_RING_SIZE, GameOSWrapper
+
+
+@pytest.fixture
+def engine():
+    engine = GameOSWrapper(headless=True, seed=7, max_aliens=64, max_bullets=64)
+    engine.start_game()
+    yield engine
+    engine.cleanup()
+
+
+def test_position_getters_match_snapshot(engine):
+    for _ in range(5):
+        engine.push_commands([(CMD_FIRE, 0, 0)])
+        engine.step(3)
+    snapshot = engine.snapshot()
+    assert len(snapshot.bullets) > 0
+
+    aliens = [tuple(row) for row in snapshot.aliens[:, :3].tolist()]
+    bullets = [tuple(row) for row in snapshot.bullets[:, :4].tolist()]
+    assert engine.get_alien_positions() == aliens
+    assert engine.get_bullet_positions() == bullets
+
+
+def test_position_getters_at_full_capacity():
+    # A fleet filling the whole pool is where a short buffer would overflow
+    engine = GameOSWrapper(headless=True, seed=1, max_aliens=18, max_bullets=8)
+    try:
+        engine.start_game()
+        snapshot = engine.snapshot()
+        assert len(snapshot.aliens) == 18
+        assert engine.get_alien_positions() == [tuple(row) for row in snapshot.aliens[:, :3].tolist()]
+    finally:
+        engine.cleanup()
+
+
+def test_push_commands_reports_a_full_ring(engine):
+    commands = [(CMD_FIRE, 0, 0)] * (INPUT_RING_SIZE + 44)
+    assert engine.push_commands(commands) == INPUT_RING_SIZE
+    assert engine.push_commands(commands[:1]) == 0
+    engine.step(1)  # The tick drains the ring
+    assert engine.push_commands(commands[INPUT_RING_SIZE:]) == 44
@@ -0,0 +1,53 @@
+import json
+
+from high_scores import HighScoreStore
+
+
+def open_store(path):
+    return HighScoreStore(str(path), legacy_path=None)
+
+
+def test_scores_round_trip_through_the_log(tmp_path):
+    path = tmp_path / 'scores.jsonl'
+    store = open_store(path)
+    for player, score, level in [('ann', 120, 2), ('bob', 300, 4), ('ann', 300, 3), ('cy', 50, 1)]:
+        store.submit(player, score, level)
+    store.close()
+
+    reloaded = open_store(path)
+    try:
+        # Ties keep submission order
+        assert [(r.player, r.score, r.level) for r in reloaded.top()] == [
+            ('bob', 300, 4), ('ann', 300, 3), ('ann', 120, 2), ('cy', 50, 1)]
+        assert reloaded.best('ann') == 300
+        assert [r.score for r in reloaded.history('ann')] == [300, 120]
+        assert reloaded.submit('dee', 200) == 3
+    finally:
+        reloaded.close()
+    assert len(path.read_text().splitlines()) == 5
+
+
+def test_truncated_last_line_is_dropped_and_repaired(tmp_path):
+    path = tmp_path / 'scores.jsonl'
+    store = open_store(path)
+    store.submit('ann', 10)
+    store.submit('bob', 20)
+    store.close()
+    # A crash in the middle of appending the third score
+    with open(path, 'a') as f:
+        f.write('{"player": "cy", "sco')
+
+    store = open_store(path)
+    try:
+        assert [(r.player, r.score) for r in store.top()] == [('bob', 20), ('ann', 10)]
+        lines = path.read_text().splitlines()
+        assert [json.loads(line)['player'] for line in lines] == ['ann', 'bob']
+
+        # Appending after the repair starts on a fresh line
+        store.submit('dee', 30)
+        store.flush()
+    finally:
+        store.close()
+    store = open_store(path)
+    assert [r.player for r in store.top()] == ['dee', 'bob', 'ann']
+    store.close()
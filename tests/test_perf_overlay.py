@@ -0,0 +1,17 @@
+import gc
+
+from perf_overlay import FrameProfiler
+
+
+def test_close_removes_gc_callback():
+    profiler = FrameProfiler(history=4)
+    assert profiler._count_collection in gc.callbacks
+    gc.collect()
+    assert profiler.collections >= 1
+
+    profiler.close()
+    profiler.close()
+    assert profiler._count_collection not in gc.callbacks
+    collections = profiler.collections
+    gc.collect()
+    assert profiler.collections == collections
@@ -0,0 +1,64 @@
+import time
+
+import pytest
+
+from game_os_wrapper import CMD_FIRE, CMD_MOVE_PRESS, CMD_MOVE_RELEASE, INPUT_LEFT, GameOSWrapper
+from replay import CMD_CHECKPOINT, ReplayPlayer, SessionLog, SessionRecorder, read_session, validate
+
+
+def test_session_from_play_button_replays_exactly(tmp_path, monkeypatch):
+    # The recorder and leaderboard write relative to the cwd
+    monkeypatch.chdir(tmp_path)
+    from alien_invasion import AlienInvasion
+    from settings import Settings
+    settings = Settings()
+    settings.asset_bundle = str(tmp_path / 'assets.bundle')
+    ai = AlienInvasion(settings=settings)
+    try:
+        ai._poll_assets(wait=True)
+        ai._check_play_button(ai.play_button.rect.center)
+        commands = [(CMD_MOVE_PRESS, INPUT_LEFT, 0), (CMD_FIRE, 0, 0)]
+        for _ in range(10):
+            ai.game_os.push_commands(commands)
+            ai.recorder.poll()
+            time.sleep(0.02)
+        ai.game_os.push_commands([(CMD_MOVE_RELEASE, INPUT_LEFT, 0)])
+        time.sleep(0.05)
+        # Starting over tears the engine down, which checkpoints it
+        ai.stats.game_active = False
+        ai._check_play_button(ai.play_button.rect.center)
+        time.sleep(0.05)
+        path = ai.recorder.path
+    finally:
+        ai.cleanup()
+
+    records = read_session(path).records
+    assert sum(1 for record in records if record[1] == CMD_CHECKPOINT) == 2
+    checkpoints, mismatches, _ = validate(path)
+    assert len(checkpoints) == 2
+    assert mismatches == 0
+
+
+def test_session_keeps_the_tick_rate_it_was_recorded_at(tmp_path):
+    engine = GameOSWrapper(headless=True, seed=3, max_aliens=64, max_bullets=64)
+    try:
+        engine.set_tick_rate(144)
+        recorder = SessionRecorder(engine, str(tmp_path / 'session.airp'))
+        recorder.close()
+    finally:
+        engine.cleanup()
+
+    session = read_session(recorder.path)
+    assert session.tick_rate == 144
+    assert session.max_aliens == 64
+
+
+def test_replay_stops_when_a_command_cannot_be_sent():
+    # More commands in one tick than the input ring holds
+    session = SessionLog(max_aliens=64, max_bullets=64, records=[(0, CMD_FIRE, 0, 0)] * 300)
+    engine = GameOSWrapper(headless=True, seed=3, max_aliens=64, max_bullets=64)
+    try:
+        with pytest.raises(RuntimeError, match='input ring full'):
+            ReplayPlayer(engine, session).run()
+    finally:
+        engine.cleanup()
@@ -0,0 +1,47 @@
+import time
+
+from game_os_wrapper import (GameOSWrapper, SNAP_INPUT_LATENCY_US, SNAP_SEQUENCE, SNAP_TICK_TIME_HI,
+                             SNAP_TICK_TIME_LO)
+
+# Header slots that hold wall-clock times or publish counts rather than game state
+UNTIMED = [SNAP_SEQUENCE, SNAP_INPUT_LATENCY_US, SNAP_TICK_TIME_LO, SNAP_TICK_TIME_HI]
+
+
+def frame_state(snap):
+    header = snap.header.copy()
+    header[UNTIMED] = 0
+    return header.tobytes() + snap.aliens.tobytes() + snap.bullets.tobytes()
+
+
+def test_snapshots_are_never_torn_while_the_engine_runs():
+    # The logic thread publishes as fast as it can while this thread reads;
+    # without inputs the game is fixed by its seed, so every frame read
+    # must equal the one a headless engine reaches at the same tick
+    live = GameOSWrapper(seed=11)
+    live.set_tick_rate(1000)
+    frames = {}  # tick -> every distinct frame read at that tick
+    reads = 0
+    try:
+        live.start_game()
+        deadline = time.perf_counter() + 1.0
+        while time.perf_counter() < deadline:
+            snap = live.snapshot()
+            reads += 1
+            frames.setdefault(snap.tick, set()).add(frame_state(snap))
+    finally:
+        live.cleanup()
+    assert len(frames) > 50
+
+    reference = GameOSWrapper(headless=True, seed=11)
+    try:
+        reference.start_game()
+        checked = 0
+        for tick in sorted(frames):
+            while reference.snapshot().tick < tick:
+                reference.step(1)
+            assert frames[tick] == {frame_state(reference.snapshot())}, f"torn frame at tick {tick}"
+            checked += 1
+    finally:
+        reference.cleanup()
+    assert checked == len(frames)
+    assert reads > 10 * checked  # Every frame was read many times, mid-publish included
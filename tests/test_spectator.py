@@ -0,0 +1,108 @@
+import ctypes
+import os
+import signal
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import spectator
+from game_os_wrapper import CMD_FIRE, GameOSWrapper
+from spectator import SpectatorClient, _libc, list_games, segment_key
+
+OWNER_PID_OFFSET = 12  # SegmentHeader.owner_pid
+
+
+@pytest.fixture
+def name():
+    return f'test-spectator-{os.getpid()}'
+
+
+def test_spectator_reads_the_games_frames(name):
+    engine = GameOSWrapper(headless=True, seed=5, name=name)
+    try:
+        engine.start_game()
+        with SpectatorClient(name) as client:
+            assert client.info.owner_pid == os.getpid()
+            assert name in [info.name for info in list_games()]
+            for _ in range(3):
+                engine.push_commands([(CMD_FIRE, 0, 0)])
+                ours = engine.step(4)
+                theirs = client.snapshot()
+                assert theirs.is_new
+                np.testing.assert_array_equal(theirs.header, ours.header)
+                np.testing.assert_array_equal(theirs.aliens, ours.aliens)
+                np.testing.assert_array_equal(theirs.bullets, ours.bullets)
+            assert len(theirs.bullets) > 0
+            assert not client.snapshot().is_new  # Nothing published since
+            assert not client._frames.flags.writeable
+    finally:
+        engine.cleanup()
+
+
+def test_spectator_follows_a_replaced_engine(name):
+    engine = GameOSWrapper(headless=True, seed=5, name=name)
+    engine.start_game()
+    client = SpectatorClient(name)
+    try:
+        engine.step(10)
+        assert client.snapshot().tick == 10
+        engine.cleanup()
+        assert client.closed
+
+        engine = GameOSWrapper(headless=True, seed=6, name=name)
+        engine.start_game()
+        engine.step(3)
+        assert client.snapshot().tick == 3
+        assert not client.closed
+    finally:
+        client.close()
+        engine.cleanup()
+
+
+def test_spectator_gives_up_on_a_frame_left_mid_write(name, monkeypatch):
+    engine = GameOSWrapper(headless=True, seed=5, name=name)
+    client = SpectatorClient(name)
+    # The game's segment mapped writable, to fake a writer stopped mid-frame
+    address = _libc.shmat(_libc.shmget(segment_key(name), 0, 0), None, 0)
+    try:
+        engine.start_game()
+        seq = (ctypes.c_uint32 * 2).from_address(address + client.info.frame_seq_offset)
+        seq[0] |= 1
+        seq[1] |= 1
+
+        # The writer (this process) is alive but never finishes
+        monkeypatch.setattr(spectator, 'STALL_TIMEOUT', 0.05)
+        with pytest.raises(OSError, match='middle of publishing'):
+            client.snapshot()
+
+        # The writer is gone
+        monkeypatch.setattr(spectator, 'STALL_TIMEOUT', 60.0)
+        dead = subprocess.Popen([sys.executable, '-c', 'pass'])
+        dead.wait()
+        ctypes.c_int32.from_address(address + OWNER_PID_OFFSET).value = dead.pid
+        client.attach()
+        assert client.info.owner_pid == dead.pid
+        with pytest.raises(OSError, match='middle of publishing'):
+            client.snapshot()
+    finally:
+        _libc.shmdt(address)
+        client.close()
+        engine.cleanup()
+
+
+@pytest.mark.parametrize('signum', [signal.SIGINT, signal.SIGTERM])
+def test_interrupted_game_removes_its_segment(name, signum):
+    script = ('import os, signal, time\n'
+              'from game_os_wrapper import GameOSWrapper\n'
+              f'engine = GameOSWrapper(headless=True, name={name!r})\n'
+              f'os.kill(os.getpid(), {int(signum)})\n'
+              'time.sleep(5)\n')
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True)
+    if signum == signal.SIGINT:
+        # Python, not the engine, handles Ctrl+C
+        assert 'KeyboardInterrupt' in result.stderr
+    else:
+        assert result.returncode == -signum
+    assert _libc.shmget(segment_key(name), 0, 0) == -1
@@ -0,0 +1,36 @@
+import os
+
+import pygame
+import pytest
+
+from asset_bundle import bundle_key, read_bundle
+from settings import Settings
+from sprite_cache import SpriteCache, bundle_specs
+
+
+@pytest.fixture
+def settings():
+    pygame.init()
+    settings = Settings()
+    pygame.display.set_mode((settings.screen_width, settings.screen_height))
+    yield settings
+    pygame.quit()
+
+
+def test_bundle_is_next_to_the_game(settings, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    game_dir = os.path.dirname(os.path.abspath(SpriteCache.default_image_dir()))
+    assert settings.asset_bundle == os.path.join(game_dir, 'assets.bundle')
+
+
+def test_missing_bundle_is_built_without_a_loader(settings, tmp_path):
+    path = str(tmp_path / 'assets.bundle')
+    SpriteCache(settings, bundle_path=path)
+    image_dir = SpriteCache.default_image_dir()
+    specs = bundle_specs(settings)
+    images = read_bundle(path, bundle_key(specs, image_dir))
+    assert images is not None
+    # Sprites without a source file stay fallback rects, outside the bundle
+    present = {name for name, spec in specs.items()
+               if os.path.exists(os.path.join(image_dir, spec[0]))}
+    assert set(images) == present
@@ -0,0 +1,33 @@
+import subprocess
+import sys
+
+
+def imported_modules(*settings):
+    """Start the game with settings changed and list the modules it imported."""
+    script = ('import sys\n'
+              'from alien_invasion import AlienInvasion\n'
+              'from settings import Settings\n'
+              'settings = Settings()\n'
+              + ''.join(f'settings.{setting}\n' for setting in settings) +
+              'ai = AlienInvasion(settings=settings)\n'
+              'ai.cleanup()\n'
+              'print(" ".join(sys.modules))\n')
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                            check=True)
+    return result.stdout.split()
+
+
+def test_disabled_subsystems_are_not_imported(tmp_path):
+    modules = imported_modules('record_sessions = False', 'asset_bundle = None',
+                               f'high_score_file = {str(tmp_path / "scores.jsonl")!r}')
+    assert 'alien_invasion' in modules
+    assert 'replay' not in modules
+    assert 'asset_bundle' not in modules
+
+
+def test_enabled_subsystems_are_imported(tmp_path):
+    modules = imported_modules(f'replay_dir = {str(tmp_path)!r}',
+                               f'asset_bundle = {str(tmp_path / "assets.bundle")!r}',
+                               f'high_score_file = {str(tmp_path / "scores.jsonl")!r}')
+    assert 'replay' in modules
+    assert 'asset_bundle' in modules
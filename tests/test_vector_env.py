@@ -0,0 +1,69 @@
+import numpy as np
+
+from vector_env import ACTIONS, VectorEnv
+
+NUM_ENVS = 4
+
+
+def make_env(**kwargs):
+    return VectorEnv(NUM_ENVS, seed=10, max_aliens=64, max_bullets=128, **kwargs)
+
+
+def rollout(env, steps=150):
+    """Step with a fixed pseudo-random policy; returns everything observed."""
+    rng = np.random.default_rng(0)
+    obs = env.reset()
+    history = [obs['player'].copy()]
+    for _ in range(steps):
+        obs, rewards, dones = env.step(rng.integers(0, len(ACTIONS), NUM_ENVS))
+        history.extend([obs['player'].copy(), obs['aliens'].copy(), obs['bullets'].copy(),
+                        obs['score'].copy(), rewards.copy(), dones.copy()])
+    return history
+
+
+def test_reset_and_step_shapes():
+    with make_env() as env:
+        obs = env.reset()
+        assert obs['player'].shape == (NUM_ENVS, 3)
+        assert obs['aliens'].shape == (NUM_ENVS, 64, 5)
+        assert obs['bullets'].shape == (NUM_ENVS, 128, 6)
+        assert obs['score'].shape == obs['level'].shape == (NUM_ENVS,)
+        assert (obs['level'] == 1).all()
+        assert (obs['aliens'][:, :, 2] != 0).sum(axis=1).tolist() == [18] * NUM_ENVS
+
+        stepped, rewards, dones = env.step(np.full(NUM_ENVS, 1))  # Everyone fires
+        assert stepped['player'] is obs['player']  # Refilled in place
+        assert rewards.shape == dones.shape == (NUM_ENVS,)
+        assert rewards.dtype == np.float32 and dones.dtype == bool
+        assert (stepped['bullets'][:, :, 2] != 0).any(axis=1).all()
+
+        # Rows of (left, right, up, down, fire) work as well as indexes
+        before = stepped['player'][:, 0].copy()
+        env.step(np.tile(ACTIONS[3], (NUM_ENVS, 1)))
+        assert (stepped['player'][:, 0] > before).all()
+
+
+def test_same_seed_and_actions_are_deterministic():
+    with make_env() as env:
+        first = rollout(env)
+    with make_env() as env:
+        second = rollout(env)
+    assert len(first) == len(second)
+    for a, b in zip(first, second):
+        np.testing.assert_array_equal(a, b)
+    # The envs got different seeds, so they did not all play the same game
+    assert len({tuple(row) for row in first[-6].tolist()}) > 1
+
+
+def test_finished_episodes_restart():
+    with make_env(max_episode_ticks=40) as env:
+        env.reset()
+        for _ in range(10):
+            _, _, dones = env.step(np.zeros(NUM_ENVS, dtype=int))
+            if dones.any():
+                break
+        assert dones.all()
+        assert (env.final_ticks >= 40).all()
+        assert env.episodes == NUM_ENVS
+        assert (env.observations['score'] == 0).all()
+        assert (env.seeds >= 10 + NUM_ENVS).all()  # Fresh seeds
@@ -0,0 +1,57 @@
+from collections import OrderedDict
+import pygame.font
+
+class FontRegistry:
+    """Hand out one shared pygame Font per (name, size)."""
+
+    def __init__(self):
+        self.fonts = {}
+
+    def get(self, name, size):
+        """Return the font for (name, size), looking it up only the first time."""
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = pygame.font.SysFont(name, size)
+            self.fonts[key] = font
+        return font
+
+
+class TextCache:
+    """A bounded LRU cache of rendered text surfaces.
+
+    Surfaces are keyed by (font, text, color), so a HUD string like
+    "Score: 120" is only rendered again once its value changes.
+    """
+
+    def __init__(self, max_entries=256, fonts=None):
+        self.max_entries = max_entries
+        self.fonts = fonts if fonts is not None else FontRegistry()
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color):
+        """Return a rendered surface for text, reusing a cached one when possible."""
+        key = (font, text, tuple(color))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, True, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def stats(self):
+        """Return hit/miss counts and current occupancy."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self.surfaces),
+            'max_entries': self.max_entries,
+        }
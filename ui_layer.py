@@ -0,0 +1,47 @@
+import pygame
+
+class UILayer:
+    """A piece of UI composed once into a cached surface.
+
+    build(surface, key) draws the layer onto a cleared surface. draw()
+    only calls it again when the key (the inputs the layer shows, like
+    a score or a hover state) differs from the last one, so a screen
+    that is not changing costs a single blit. The surface is allocated
+    once and reused by every rebuild.
+    """
+
+    def __init__(self, size, build, alpha=True):
+        self.build = build
+        self.alpha = alpha
+        if alpha:
+            # RLE lets blits skip the transparent runs between widgets
+            self.surface = pygame.Surface(size, pygame.SRCALPHA)
+            self.surface.set_alpha(255, pygame.RLEACCEL)
+        else:
+            self.surface = pygame.Surface(size).convert()
+        self.key = None
+        self.built = False
+        self.area = self.surface.get_rect()  # Part of the surface with anything in it
+        self.rebuilds = 0
+
+    def invalidate(self):
+        """Rebuild on the next draw whatever the key is."""
+        self.built = False
+
+    def get(self, key=None):
+        """Return the layer surface for key, rebuilding it if key changed."""
+        if not self.built or key != self.key:
+            self.surface.fill((0, 0, 0, 0))
+            self.build(self.surface, key)
+            # Transparent margins are skipped when blitting
+            self.area = self.surface.get_bounding_rect() if self.alpha else self.surface.get_rect()
+            self.key = key
+            self.built = True
+            self.rebuilds += 1
+        return self.surface
+
+    def draw(self, target, position=(0, 0), key=None):
+        """Blit the layer for key onto target and return the rect drawn."""
+        surface = self.get(key)
+        area = self.area
+        return target.blit(surface, (position[0] + area.x, position[1] + area.y), area)
@@ -0,0 +1,170 @@
+"""Step many headless games in lockstep for bots and batch evaluation.
+
+VectorEnv owns N headless engines and advances all of them with a single
+call into C. Actions go in as one NumPy array and observations, rewards
+and done flags come back as stacked arrays that are allocated once and
+refilled in place on every step:
+
+    env = VectorEnv(64, seed=0)
+    obs = env.reset()
+    while True:
+        actions = policy(obs)                 # (64,) ints from ACTIONS
+        obs, rewards, dones = env.step(actions)
+
+Finished episodes are reset automatically with a fresh seed; the score,
+level and length they ended with stay readable in final_score,
+final_level and final_ticks until the next step.
+"""
+import ctypes
+from ctypes import c_void_p
+
+import numpy as np
+
+from game_os_wrapper import (GameOSWrapper, INPUT_STRIDE, SNAPSHOT_HEADER_SIZE, ALIEN_STRIDE,
+                             BULLET_STRIDE, SNAP_PLAYER_X, SNAP_PLAYER_HEALTH, SNAP_SCORE,
+                             SNAP_GAME_OVER, SNAP_LEVEL, SNAP_TICK)
+
+# Discrete actions as (left, right, up, down, fire) rows
+ACTIONS = np.array([
+    [0, 0, 0, 0, 0],  # 0 idle
+    [0, 0, 0, 0, 1],  # 1 fire
+    [1, 0, 0, 0, 0],  # 2 left
+    [0, 1, 0, 0, 0],  # 3 right
+    [0, 0, 1, 0, 0],  # 4 up
+    [0, 0, 0, 1, 0],  # 5 down
+    [1, 0, 0, 0, 1],  # 6 left + fire
+    [0, 1, 0, 0, 1],  # 7 right + fire
+    [0, 0, 1, 0, 1],  # 8 up + fire
+    [0, 0, 0, 1, 1],  # 9 down + fire
+], dtype=np.intc)
+
+
+class VectorEnv:
+    """N headless games stepped together.
+
+    Every step holds each env's action for frame_skip engine ticks. The
+    reward is the score gained during the step. An episode ends when
+    the game is over (terminated) or after max_episode_ticks ticks
+    (truncated). Arrays returned by reset() and step() are views into
+    buffers owned by the env and are overwritten by the next call.
+    """
+
+    def __init__(self, num_envs, seed=0, frame_skip=4, max_episode_ticks=18000,
+                 start_level=1, max_aliens=None, max_bullets=None):
+        self.num_envs = num_envs
+        self.frame_skip = frame_skip
+        self.max_episode_ticks = max_episode_ticks
+        self.start_level = start_level
+        self.engines = [GameOSWrapper(headless=True, max_aliens=max_aliens, max_bullets=max_bullets)
+                        for _ in range(num_envs)]
+        self.lib = self.engines[0].lib
+        self._handles = (c_void_p * num_envs)(*[engine.engine for engine in self.engines])
+        self.seeds = np.arange(seed, seed + num_envs, dtype=np.uint64)
+        self._next_seed = seed + num_envs
+
+        capacity = self.engines[0].snapshot()
+        self.max_aliens = capacity.max_aliens
+        self.max_bullets = capacity.max_bullets
+        alien_end = SNAPSHOT_HEADER_SIZE + self.max_aliens * ALIEN_STRIDE
+        frame_ints = alien_end + self.max_bullets * BULLET_STRIDE
+        self._frame_bytes = frame_ints * ctypes.sizeof(ctypes.c_int)
+
+        # One row per env in the get_snapshot() layout; every observation
+        # below is a view into it, so C writes them all in place
+        self.frames = np.zeros((num_envs, frame_ints), dtype=np.intc)
+        header = self.frames[:, :SNAPSHOT_HEADER_SIZE]
+        self.observations = {
+            'player': header[:, SNAP_PLAYER_X:SNAP_PLAYER_HEALTH + 1],  # (x, y, health)
+            'aliens': self.frames[:, SNAPSHOT_HEADER_SIZE:alien_end].reshape(
+                num_envs, self.max_aliens, ALIEN_STRIDE),  # (x, y, active, prev_x, prev_y)
+            'bullets': self.frames[:, alien_end:].reshape(
+                num_envs, self.max_bullets, BULLET_STRIDE),  # (x, y, is_player, active, prev_x, prev_y)
+            'score': header[:, SNAP_SCORE],
+            'level': header[:, SNAP_LEVEL],
+        }
+        self._game_over = header[:, SNAP_GAME_OVER]
+        self._tick = header[:, SNAP_TICK]
+
+        self._actions = np.zeros((num_envs, INPUT_STRIDE), dtype=np.intc)
+        self._last_score = np.zeros(num_envs, dtype=np.intc)
+        self.rewards = np.zeros(num_envs, dtype=np.float32)
+        self.terminated = np.zeros(num_envs, dtype=bool)
+        self.truncated = np.zeros(num_envs, dtype=bool)
+        self.dones = np.zeros(num_envs, dtype=bool)
+        self.final_score = np.zeros(num_envs, dtype=np.intc)
+        self.final_level = np.zeros(num_envs, dtype=np.intc)
+        self.final_ticks = np.zeros(num_envs, dtype=np.intc)
+        self.episodes = 0
+
+    def _start(self, i, seed):
+        engine = self.engines[i]
+        engine.set_seed(int(seed))
+        engine.start_game()
+        for _ in range(self.start_level - 1):
+            engine.advance_level()
+        self.seeds[i] = seed
+
+    def _refresh(self, first, count):
+        """Copy the current frames of envs [first, first + count) without stepping."""
+        self.lib.step_engines(ctypes.addressof(self._handles) + first * ctypes.sizeof(c_void_p),
+                              count, 0, self._actions.ctypes.data,
+                              self.frames.ctypes.data + first * self._frame_bytes,
+                              self.max_aliens, self.max_bullets)
+
+    def reset(self):
+        """Start a new episode in every env and return the observations."""
+        for i in range(self.num_envs):
+            self._start(i, self.seeds[i])
+        self._actions[:] = 0
+        self._refresh(0, self.num_envs)
+        self._last_score[:] = self.observations['score']
+        self.dones[:] = False
+        return self.observations
+
+    def step(self, actions):
+        """Advance every env by frame_skip ticks.
+
+        actions is either (num_envs,) indexes into ACTIONS or a
+        (num_envs, 5) array of (left, right, up, down, fire) rows.
+        Returns (observations, rewards, dones).
+        """
+        actions = np.asarray(actions)
+        if actions.ndim == 1:
+            np.take(ACTIONS, actions, axis=0, out=self._actions, mode='clip')
+        else:
+            np.copyto(self._actions, actions, casting='unsafe')
+        self.lib.step_engines(self._handles, self.num_envs, self.frame_skip,
+                              self._actions.ctypes.data, self.frames.ctypes.data,
+                              self.max_aliens, self.max_bullets)
+
+        score = self.observations['score']
+        np.subtract(score, self._last_score, out=self.rewards)
+        self._last_score[:] = score
+        np.not_equal(self._game_over, 0, out=self.terminated)
+        np.greater_equal(self._tick, self.max_episode_ticks, out=self.truncated)
+        np.logical_or(self.terminated, self.truncated, out=self.dones)
+
+        if self.dones.any():
+            # Only finished envs are touched here, usually none or a few
+            finished = np.flatnonzero(self.dones)
+            self.final_score[finished] = score[finished]
+            self.final_level[finished] = self.observations['level'][finished]
+            self.final_ticks[finished] = self._tick[finished]
+            for i in finished.tolist():
+                self._start(i, self._next_seed)
+                self._next_seed += 1
+                self._refresh(i, 1)
+            self._last_score[finished] = score[finished]
+            self.episodes += len(finished)
+        return self.observations, self.rewards, self.dones
+
+    def close(self):
+        for engine in self.engines:
+            engine.cleanup()
+        self.engines = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()